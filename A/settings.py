@@ -44,11 +44,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'ticket.middleware.MetricsMiddleware',
+    'ticket.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'ticket.middleware.CachedAuthenticationMiddleware',
+    'ticket.middleware.TicketEventMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -57,7 +60,7 @@ ROOT_URLCONF = 'A.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'ticket.profiling.ProfilingTemplates',
         'DIRS': [BASE_DIR / 'templates']
         ,
         'APP_DIRS': True,
@@ -67,6 +70,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'ticket.context_processors.ticket_counts',
             ],
         },
     },
@@ -123,6 +127,109 @@ STATICFILES_DIRS = [
 
 MEDIA_ROOT = BASE_DIR / 'media'
 MEDIA_URL = '/media/'
+
+# Attachments are served by ticket.views.TicketAttachmentView after the access
+# check. Set to 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache) to let the
+# front-end server transfer the file; with nginx, TICKET_ATTACHMENT_SENDFILE_PREFIX
+# is the internal location aliased to MEDIA_ROOT.
+TICKET_ATTACHMENT_SENDFILE = None
+TICKET_ATTACHMENT_SENDFILE_PREFIX = '/protected-media/'
+
+# Chunked uploads (ticket.uploads): largest accepted file, largest single
+# chunk, where partial files are assembled and how long an untouched upload
+# is kept before cleanup_uploads removes it (seconds).
+TICKET_UPLOAD_MAX_SIZE = 2 * 1024 ** 3
+TICKET_UPLOAD_CHUNK_SIZE = 5 * 1024 ** 2
+TICKET_UPLOAD_TEMP_DIR = BASE_DIR / 'partial-uploads'
+TICKET_UPLOAD_EXPIRY = 24 * 60 * 60
+
+# Local memory is per process: use a shared backend (Redis, Memcached) when
+# running several workers so cached users and metrics are shared by all of
+# them (check --deploy warns otherwise).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'systemticketing',
+    }
+}
+
+# Rendered ticket threads (ticket.thread_cache) are keyed on the columns that
+# change with them, so they need no invalidation; the timeout bounds how old
+# their "x minutes ago" get and how long replaced fragments take up space.
+TICKET_THREAD_CACHE_TIMEOUT = 5 * 60
+
+# Authenticated users are cached by CachedAuthenticationMiddleware
+# (ticket.user_cache) and dropped whenever the user is saved or deleted; the
+# timeout bounds how long a change made with QuerySet.update() goes unseen.
+# The cache is skipped while the default cache is local memory, which other
+# processes could not invalidate.
+TICKET_USER_CACHE_TIMEOUT = 10 * 60
+
+# Staff work queue (ticket.work_queue): hours a customer may wait for a staff
+# reply before the ticket is flagged, and how long a claim keeps a ticket
+# away from other agents.
+TICKET_SLA_RESPONSE_HOURS = 24
+TICKET_CLAIM_MINUTES = 30
+
+# Rows per transaction of the bulk status changes (ticket.transitions).
+TICKET_BULK_BATCH_SIZE = 500
+
+# Tickets per query of the streamed exports (ticket.export).
+TICKET_EXPORT_CHUNK_SIZE = 2000
+
+# Daily ticket statistics (ticket.rollups): events younger than this many
+# seconds are looked at again by the next rollup_ticket_stats run.
+TICKET_ROLLUP_OVERLAP = 600
+
+# Time to first response and time to close on the admin dashboard
+# (ticket.events.lifecycle_metrics) are cached for this many seconds.
+TICKET_LIFECYCLE_CACHE_TIMEOUT = 5 * 60
+
+# Request profiling (ticket.profiling): share of the requests profiled, how
+# often one SQL statement may repeat in a request before it is reported as an
+# N+1 query, and budgets per URL name ('*' for the rest) with limits on
+# queries, duration, query_time and template_time in seconds. Exceeded
+# budgets are logged, or raised when TICKET_PROFILING_RAISE is on.
+TICKET_PROFILING_SAMPLE_RATE = 1.0 if DEBUG else 0.01
+TICKET_PROFILING_DUPLICATE_THRESHOLD = 3
+TICKET_PROFILING_BUDGETS = {
+    'home:home': {'queries': 10},
+    'ticket:ticket-detail': {'queries': 20},
+    '*': {'queries': 30, 'duration': 1.0},
+}
+TICKET_PROFILING_RAISE = False
+
+# Prometheus metrics (ticket.metrics, served at /metrics). Each worker writes
+# its counters to the cache at most every TICKET_METRICS_FLUSH_INTERVAL
+# seconds and scrapes add up all workers, so use a shared cache backend with
+# several workers (check --deploy warns otherwise). A worker holds one of
+# TICKET_METRICS_MAX_PROCESSES slots; after TICKET_METRICS_PROCESS_TIMEOUT
+# seconds without a flush its slot can be taken over and its counts move to
+# a retired total. Ticket gauges are recomputed every
+# TICKET_METRICS_GAUGE_TIMEOUT seconds. Scrapers send TICKET_METRICS_TOKEN
+# as "Authorization: Bearer <token>"; while it is unset, only logged in staff
+# members can read the metrics.
+TICKET_METRICS_FLUSH_INTERVAL = 5
+TICKET_METRICS_PROCESS_TIMEOUT = 10 * 60
+TICKET_METRICS_MAX_PROCESSES = 64
+TICKET_METRICS_GAUGE_TIMEOUT = 30
+TICKET_METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+TICKET_METRICS_TOKEN = None
+
+# Live ticket events (ticket.live). Streaming requires an ASGI server (the
+# view answers 204 under WSGI, where every stream would hold a worker). The
+# in-process broker only reaches clients connected to the same process; point
+# TICKET_PUBSUB_BROKER at a shared implementation when running several ASGI
+# workers. Streams send a heartbeat comment every TICKET_EVENTS_HEARTBEAT
+# seconds and are closed after TICKET_EVENTS_MAX_AGE seconds, after which
+# browsers reconnect. A process serves at most TICKET_EVENTS_MAX_STREAMS
+# streams and answers 503 with Retry-After past that.
+TICKET_PUBSUB_BROKER = 'ticket.pubsub.InProcessBroker'
+TICKET_EVENTS_HEARTBEAT = 15
+TICKET_EVENTS_MAX_AGE = 5 * 60
+TICKET_EVENTS_RETRY_MS = 3000
+TICKET_EVENTS_MAX_STREAMS = 1000
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
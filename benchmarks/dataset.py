@@ -0,0 +1,130 @@
+import math
+import random
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from ticket import importer, user_cache
+
+STATUS_WEIGHTS = {'Open': 25, 'In Progress': 15, 'Closed': 60}
+WORDS = ('account', 'login', 'password', 'invoice', 'payment', 'refund', 'error', 'page', 'upload', 'report',
+         'email', 'order', 'delivery', 'access', 'update', 'server', 'slow', 'broken', 'request', 'export',
+         'profile', 'settings', 'mobile', 'browser', 'timeout', 'missing', 'duplicate', 'billing', 'plan', 'team')
+SOURCE = 'benchmark-seed'
+
+
+def parse_distribution(spec):
+    """
+    Parse a messages-per-ticket distribution.
+
+    Args:
+        spec: fixed:N, uniform:LOW-HIGH or geometric:MEAN (most tickets
+              short, a long tail of long conversations)
+
+    Returns:
+        callable: Draws a message count from a random.Random
+
+    Raises:
+        ValueError: For an unknown or malformed spec
+    """
+    kind, _, value = spec.partition(':')
+    try:
+        if kind == 'fixed':
+            count = int(value)
+            return lambda rng: count
+        if kind == 'uniform':
+            low, high = (int(part) for part in value.split('-'))
+            return lambda rng: rng.randint(low, high)
+        if kind == 'geometric':
+            mean = float(value)
+            if mean <= 0:
+                return lambda rng: 0
+            failure = mean / (mean + 1)
+            return lambda rng: int(math.log(1 - rng.random()) / math.log(failure))
+    except ValueError:
+        pass
+    raise ValueError(f'Invalid distribution {spec!r}; use fixed:N, uniform:LOW-HIGH or geometric:MEAN.')
+
+
+def _text(rng, words):
+    return ' '.join(rng.choices(WORDS, k=words))
+
+
+def generate(tickets, users=100, staff=5, messages='geometric:4', days=365, seed=0, now=None):
+    """
+    Generate ticket records in the shape read by ticket.importer.
+
+    The same arguments and seed produce the same records, relative to now.
+    Tickets are spread over the last days in creation order; every
+    conversation starts with a staff reply and then alternates with the
+    owner.
+
+    Args:
+        tickets: Number of tickets
+        users: Number of ticket owners, named bench-user-<n>
+        staff: Number of staff members, named bench-staff-<n>
+        messages: Messages-per-ticket distribution, see parse_distribution
+        days: Period the creation times are spread over
+        seed: Random seed
+        now: End of the period, defaults to the current time
+
+    Yields:
+        dict: One ticket record with its messages
+    """
+    rng = random.Random(seed)
+    draw = parse_distribution(messages)
+    now = now or timezone.now()
+    start = now - timedelta(days=days)
+    step = timedelta(days=days) / max(tickets, 1)
+    statuses, weights = list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values())
+    for number in range(tickets):
+        owner = f'bench-user-{rng.randrange(users)}'
+        created_at = start + step * number
+        sent_at = created_at
+        conversation = []
+        for position in range(draw(rng)):
+            sent_at += timedelta(minutes=rng.randint(5, 24 * 60))
+            from_staff = position % 2 == 0
+            conversation.append({
+                'sender': f'bench-staff-{rng.randrange(staff)}' if from_staff else owner,
+                'content': _text(rng, rng.randint(10, 60)),
+                'is_admin_response': from_staff,
+                'created_at': min(sent_at, now).isoformat(),
+            })
+        yield {
+            'subject': _text(rng, rng.randint(3, 8)).capitalize(),
+            'description': _text(rng, rng.randint(20, 120)),
+            'status': rng.choices(statuses, weights)[0],
+            'user': owner,
+            'email': f'{owner}@example.com',
+            'created_at': created_at.isoformat(),
+            'updated_at': min(sent_at, now).isoformat(),
+            'messages': conversation,
+        }
+
+
+def seed(tickets, users=100, staff=5, messages='geometric:4', days=365, seed=0, batch_size=5000, resume=False,
+         progress=None):
+    """
+    Load a generated dataset through the batched ticket import.
+
+    The import checkpoint makes an interrupted seed resumable with resume,
+    as long as the same arguments are passed again. Staff members are
+    flagged once the import is done.
+
+    Args:
+        tickets, users, staff, messages, days, seed: See generate
+        batch_size: Tickets per transaction
+        resume: Continue an interrupted seed
+        progress: Optional callable receiving the import stats after every batch
+
+    Returns:
+        dict: The import stats
+    """
+    records = generate(tickets, users, staff, messages, days, seed)
+    stats = importer.import_tickets(records, SOURCE, batch_size, resume, progress)
+    staff = User.objects.filter(username__startswith='bench-staff-')
+    staff.update(is_staff=True)
+    user_cache.invalidate(list(staff.values_list('pk', flat=True)))
+    return stats
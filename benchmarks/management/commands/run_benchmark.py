@@ -0,0 +1,57 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import runner
+
+
+class Command(BaseCommand):
+    help = 'Measure latency, queries and peak memory of every page against the benchmark database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100, help='Timed requests per case.')
+        parser.add_argument('--warmup', type=int, default=10, help='Untimed requests per case before them.')
+        parser.add_argument('--only', action='append',
+                            help='URL name or case key to measure, e.g. home:admin; repeatable.')
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+        parser.add_argument('--baseline', help='JSON results of an earlier run to compare with.')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed relative p95 growth against the baseline.')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as file:
+                baseline = json.load(file)
+        try:
+            runner.pick_targets()
+        except ValueError as error:
+            raise CommandError(error)
+
+        self.stdout.write(f'{"case":<46} {"status":>6} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} '
+                          f'{"queries":>7} {"dup":>4} {"peak KiB":>9}')
+
+        def report(key, result):
+            self.stdout.write(f'{key:<46} {result["status"]:>6} {result["p50_ms"]:>8.1f} {result["p95_ms"]:>8.1f} '
+                              f'{result["p99_ms"]:>8.1f} {result["queries"]:>7} {result["duplicate_queries"]:>4} '
+                              f'{result["peak_memory_kb"]:>9.0f}')
+
+        results = runner.run(options['requests'], options['warmup'], options['only'], report)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, indent=2, sort_keys=True)
+            self.stdout.write(f'Results written to {options["output"]}.')
+        if baseline is None:
+            return
+
+        rows, warnings = runner.compare(baseline, results, options['tolerance'], partial=bool(options['only']))
+        for warning in warnings:
+            self.stdout.write(self.style.WARNING(warning))
+        self.stdout.write(f'\n{"case":<46} {"p95 before":>10} {"p95 now":>9} {"queries":>11}')
+        for key, p95_before, p95_now, queries_before, queries_now, regressed in rows:
+            line = (f'{key:<46} {p95_before:>10.1f} {p95_now:>9.1f} {queries_before:>5} -> {queries_now:<3}'
+                    + (' REGRESSED' if regressed else ''))
+            self.stdout.write(self.style.ERROR(line) if regressed else line)
+        regressions = [row[0] for row in rows if row[-1]]
+        if regressions:
+            raise CommandError(f'{len(regressions)} case(s) regressed against {options["baseline"]}.')
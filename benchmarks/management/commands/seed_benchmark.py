@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import dataset
+
+
+class Command(BaseCommand):
+    help = 'Seed the benchmark database with generated tickets, messages and users.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=10000, help='Number of tickets, e.g. 10000 or 1000000.')
+        parser.add_argument('--users', type=int, default=1000, help='Number of ticket owners.')
+        parser.add_argument('--staff', type=int, default=20, help='Number of staff members.')
+        parser.add_argument('--messages', default='geometric:4',
+                            help='Messages per ticket: fixed:N, uniform:LOW-HIGH or geometric:MEAN.')
+        parser.add_argument('--days', type=int, default=365, help='Days the tickets are spread over.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Tickets per transaction.')
+        parser.add_argument('--resume', action='store_true',
+                            help='Continue an interrupted seed run with the same arguments.')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['staff'] < 1:
+            raise CommandError('--users and --staff must be at least 1.')
+        try:
+            dataset.parse_distribution(options['messages'])
+        except ValueError as error:
+            raise CommandError(error)
+
+        def report(stats):
+            self.stdout.write(f'{stats["records"]}/{options["tickets"]} ticket(s), {stats["messages"]} message(s), '
+                              f'{stats["rows_per_second"]:.0f} rows/s')
+
+        stats = dataset.seed(options['tickets'], options['users'], options['staff'], options['messages'],
+                             options['days'], options['seed'], options['batch_size'], options['resume'], report)
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {stats["tickets"]} ticket(s) and {stats["messages"]} message(s) in {stats["elapsed"]:.1f}s.'))
@@ -0,0 +1,281 @@
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Max
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from home import urls as home_urls
+from ticket import counters, profiling
+from ticket import urls as ticket_urls
+from ticket.models import Messages, Ticket
+
+from .dataset import WORDS
+
+ROLES = ('user', 'staff')
+
+# URL name, roles, path arguments and query string of every scenario; the
+# callables receive the targets picked by pick_targets(). Dates are relative
+# to the newest ticket, so a run selects the same rows however long ago the
+# dataset was seeded.
+SCENARIOS = [
+    ('home:home', ('anonymous',) + ROLES, None, None),
+    ('home:login', ('anonymous',), None, None),
+    ('home:register', ('anonymous',), None, None),
+    ('home:profile', ROLES, lambda targets: [targets['owner'].username], None),
+    ('home:admin', ROLES, None, None),
+    ('ticket:ticket-detail', ROLES, lambda targets: [targets['ticket'].pk], None),
+    ('ticket:ticket-messages', ROLES, lambda targets: [targets['ticket'].pk], None),
+    ('ticket:ticket-create', ROLES, None, None),
+    ('ticket:ticket-close', ROLES, lambda targets: [targets['ticket'].pk], None),
+    ('ticket:ticket-open', ROLES, lambda targets: [targets['ticket'].pk], None),
+    ('ticket:ticket-in-progress', ROLES, lambda targets: [targets['ticket'].pk], None),
+    ('ticket:ticket-export', ROLES, None,
+     lambda targets: {'status': 'Open', 'created_after': timezone.localdate(targets['newest']) - timedelta(days=7)}),
+    ('ticket:ticket-open-lists', ROLES, None, None),
+    ('ticket:ticket-in-progress-lists', ROLES, None, None),
+    ('ticket:ticket-close-lists', ROLES, None, None),
+    ('ticket:work-queue', ROLES, None, None),
+    ('ticket:ticket-search', ROLES, None, lambda targets: {'q': WORDS[0]}),
+]
+
+# Variants measured on top of the scenarios, keyed by name.
+VARIANTS = {
+    'ticket:ticket-detail:longest': (('staff',), 'ticket:ticket-detail', lambda targets: [targets['longest'].pk]),
+}
+
+# URL names left out, with the reason.
+SKIPPED = {
+    'home:logout': 'ends the session of the client',
+    'ticket:ticket-events': 'long-lived event stream; see benchmarks/throughput.py',
+    'ticket:ticket-attachment': 'seeded tickets have no attachments',
+    'ticket:message-attachment': 'seeded messages have no attachments',
+    'ticket:upload-start': 'write path',
+    'ticket:upload': 'needs an upload in progress',
+    'ticket:ticket-bulk-status': 'write path changing the dataset',
+    'ticket:work-queue-claim': 'write path changing the dataset',
+    'ticket:work-queue-release': 'write path changing the dataset',
+}
+
+
+def url_names():
+    """
+    Every URL name of home.urls and ticket.urls.
+    """
+    return {f'{module.app_name}:{pattern.name}' for module in (home_urls, ticket_urls)
+            for pattern in module.urlpatterns}
+
+
+def pick_targets():
+    """
+    Pick the users and tickets the scenarios request.
+
+    Returns:
+        dict: owner and ticket (the newest ticket of a regular user), staff,
+              longest (the ticket with the most messages) and newest (the
+              creation time of the newest ticket)
+    """
+    ticket = Ticket.objects.filter(user__is_staff=False).select_related('user').order_by('-pk').first()
+    longest = Ticket.objects.order_by('-message_count', '-pk').first()
+    staff = User.objects.filter(is_staff=True, is_active=True).order_by('pk').first()
+    if ticket is None or staff is None:
+        raise ValueError('The database needs tickets of a regular user and a staff member; run seed_benchmark.')
+    newest = Ticket.objects.aggregate(newest=Max('created_at'))['newest']
+    return {'owner': ticket.user, 'ticket': ticket, 'staff': staff, 'longest': longest, 'newest': newest}
+
+
+def cases(targets, only=None):
+    """
+    Expand the scenarios into (key, role, path) cases.
+
+    Args:
+        targets: Result of pick_targets()
+        only: Optional collection of URL names or keys to keep
+
+    Returns:
+        list: Cases keyed like ticket:ticket-detail[staff]
+    """
+    expanded = []
+    for name, roles, args, query in SCENARIOS:
+        for role in roles:
+            expanded.append((name, role, reverse(name, args=args(targets) if args else None),
+                             query(targets) if query else None))
+    for variant, (roles, name, args) in VARIANTS.items():
+        for role in roles:
+            expanded.append((variant, role, reverse(name, args=args(targets)), None))
+    return [(f'{name}[{role}]', role, path, query) for name, role, path, query in expanded
+            if not only or name in only or f'{name}[{role}]' in only]
+
+
+def _request(client, path, query):
+    response = client.get(path, query)
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    response.close()
+    return response
+
+
+def _instrumented(client, path, query):
+    """
+    Request once with the profiler and tracemalloc on.
+
+    Returns:
+        tuple: The RequestProfile and the peak traced memory in bytes
+    """
+    profiles = []
+
+    def collect(profile, **kwargs):
+        profiles.append(profile)
+
+    profiling.request_profiled.connect(collect)
+    tracemalloc.start()
+    try:
+        with override_settings(TICKET_PROFILING_SAMPLE_RATE=1, TICKET_PROFILING_RAISE=False):
+            _request(client, path, query)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        profiling.request_profiled.disconnect(collect)
+    return profiles[-1], peak
+
+
+def _percentiles(timings):
+    quantiles = statistics.quantiles(timings, n=100) if len(timings) > 1 else timings * 99
+    return {'p50_ms': quantiles[49] * 1000, 'p95_ms': quantiles[94] * 1000, 'p99_ms': quantiles[98] * 1000}
+
+
+def measure(client, path, query=None, requests=100, warmup=10):
+    """
+    Measure one case: latency percentiles, then one profiled and traced request.
+
+    The warmup requests fill the caches, so the numbers describe the steady
+    state. Latency is measured with profiling and tracemalloc off. The body
+    of streamed responses is read in full and counts towards the latency,
+    but not towards the profile.
+
+    Returns:
+        dict: status, p50/p95/p99 and mean latency in milliseconds, queries,
+              query_ms, template_ms, duplicate_queries and peak_memory_kb
+    """
+    for _ in range(warmup):
+        _request(client, path, query)
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = _request(client, path, query)
+        timings.append(time.perf_counter() - started)
+    profile, peak = _instrumented(client, path, query)
+    return dict(
+        _percentiles(timings),
+        status=response.status_code,
+        mean_ms=statistics.fmean(timings) * 1000,
+        queries=profile.queries,
+        query_ms=profile.query_time * 1000,
+        template_ms=profile.template_time * 1000,
+        duplicate_queries=sum(count for _, count in profile.duplicates()),
+        peak_memory_kb=peak / 1024,
+    )
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=settings.BASE_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def describe_dataset():
+    counts = counters.get_counts()
+    newest = Ticket.objects.aggregate(newest=Max('created_at'))['newest']
+    return {
+        'tickets': counts['total'],
+        'newest_ticket_at': newest.isoformat() if newest else None,
+        'statuses': {status: counts[key] for status, key in counters.STATUS_KEYS.items()},
+        'messages': Messages.objects.count(),
+        'users': User.objects.count(),
+    }
+
+
+def run(requests=100, warmup=10, only=None, progress=None):
+    """
+    Run every case against the current database.
+
+    Args:
+        requests: Timed requests per case
+        warmup: Untimed requests per case before them
+        only: Optional collection of URL names or keys to keep
+        progress: Optional callable receiving key and result after every case
+
+    Returns:
+        dict: meta (revision, versions, dataset, run parameters) and results by case key
+    """
+    targets = pick_targets()
+    clients = {'anonymous': Client(), 'user': Client(), 'staff': Client()}
+    clients['user'].force_login(targets['owner'])
+    clients['staff'].force_login(targets['staff'])
+    results = {}
+    for key, role, path, query in cases(targets, only):
+        results[key] = dict(measure(clients[role], path, query, requests, warmup), path=path)
+        if progress:
+            progress(key, results[key])
+    return {
+        'meta': {
+            'created_at': timezone.now().isoformat(),
+            'revision': _git_revision(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'dataset': describe_dataset(),
+            'requests': requests,
+            'warmup': warmup,
+        },
+        'results': results,
+    }
+
+
+def compare(baseline, current, tolerance=0.25, noise_ms=1.0, partial=False):
+    """
+    Compare two runs case by case.
+
+    A case regresses when it executes more queries than in the baseline, or
+    when its p95 latency grew by more than tolerance and by more than noise_ms.
+
+    Args:
+        baseline: Result of an earlier run()
+        current: Result of this run()
+        tolerance: Allowed relative p95 growth
+        noise_ms: p95 growth always accepted, for very fast cases
+        partial: This run measured a subset of the cases on purpose
+
+    Returns:
+        tuple: Rows of (key, baseline p95, current p95, baseline queries,
+               current queries, regressed) and a list of warnings about
+               differences between the runs themselves
+    """
+    warnings = []
+    if baseline['meta']['dataset'] != current['meta']['dataset']:
+        warnings.append('The runs used different datasets.')
+    rows = []
+    for key, result in current['results'].items():
+        before = baseline['results'].get(key)
+        if before is None:
+            continue
+        slower = (result['p95_ms'] > before['p95_ms'] * (1 + tolerance)
+                  and result['p95_ms'] - before['p95_ms'] > noise_ms)
+        rows.append((key, before['p95_ms'], result['p95_ms'], before['queries'], result['queries'],
+                     slower or result['queries'] > before['queries']))
+    missing = sorted(set(baseline['results']) - set(current['results']))
+    if missing and not partial:
+        warnings.append(f'Not measured in this run: {", ".join(missing)}.')
+    return rows, warnings
@@ -0,0 +1,30 @@
+"""
+Settings for the benchmark suite: the project settings on a dedicated database.
+
+    python manage.py migrate --settings=benchmarks.settings
+    python manage.py seed_benchmark --tickets 100000 --settings=benchmarks.settings
+    python manage.py run_benchmark --output results.json --settings=benchmarks.settings
+
+BENCHMARK_DATABASE overrides the database file, e.g. to keep one per size.
+"""
+import os
+
+from A.settings import *  # noqa: F401,F403
+from A.settings import BASE_DIR, INSTALLED_APPS
+
+DEBUG = False
+ALLOWED_HOSTS = ['testserver', 'localhost', '127.0.0.1']
+
+INSTALLED_APPS = INSTALLED_APPS + ['benchmarks']
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('BENCHMARK_DATABASE', BASE_DIR / 'benchmarks' / 'benchmark.sqlite3'),
+    }
+}
+
+# run_benchmark profiles one request per scenario itself; budgets would only
+# repeat its report as log warnings.
+TICKET_PROFILING_SAMPLE_RATE = 0
+TICKET_PROFILING_BUDGETS = {}
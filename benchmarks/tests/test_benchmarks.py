@@ -0,0 +1,96 @@
+import random
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, modify_settings, override_settings
+from django.utils import timezone
+
+from benchmarks import dataset, runner
+from ticket import importer
+from ticket.models import Messages, Ticket
+
+
+class TestDataset(TestCase):
+
+    def test_distributions(self):
+        rng = random.Random(1)
+        self.assertEqual(dataset.parse_distribution('fixed:3')(rng), 3)
+        self.assertTrue(all(2 <= dataset.parse_distribution('uniform:2-5')(rng) <= 5 for _ in range(50)))
+        draws = [dataset.parse_distribution('geometric:4')(rng) for _ in range(5000)]
+        self.assertAlmostEqual(sum(draws) / len(draws), 4, delta=0.5)
+        for spec in ('poisson:3', 'uniform:5', 'fixed:x'):
+            with self.assertRaises(ValueError):
+                dataset.parse_distribution(spec)
+
+    def test_generate_is_reproducible(self):
+        now = timezone.now()
+        first = list(dataset.generate(20, users=3, staff=2, seed=7, now=now))
+        self.assertEqual(first, list(dataset.generate(20, users=3, staff=2, seed=7, now=now)))
+        self.assertNotEqual(first, list(dataset.generate(20, users=3, staff=2, seed=8, now=now)))
+
+    def test_seed(self):
+        stats = dataset.seed(30, users=3, staff=2, messages='fixed:2', batch_size=10)
+        self.assertEqual((stats['tickets'], stats['messages']), (30, 60))
+        self.assertEqual(Ticket.objects.count(), 30)
+        self.assertFalse(Messages.objects.filter(is_admin_response=True).exclude(sender__is_staff=True).exists())
+        self.assertFalse(User.objects.filter(username__startswith='bench-user-', is_staff=True).exists())
+
+
+@override_settings(TICKET_PROFILING_BUDGETS={})
+class TestRunner(TestCase):
+
+    def test_every_url_name_is_covered(self):
+        measured = {name for name, *_ in runner.SCENARIOS}
+        self.assertEqual(measured & set(runner.SKIPPED), set())
+        self.assertEqual(measured | set(runner.SKIPPED), runner.url_names())
+
+    def test_run(self):
+        dataset.seed(20, users=2, staff=1, messages='fixed:3')
+        results = runner.run(requests=3, warmup=1, only={'home:admin', 'ticket:ticket-detail'})
+        self.assertEqual(set(results['results']), {'home:admin[user]', 'home:admin[staff]',
+                                                   'ticket:ticket-detail[user]', 'ticket:ticket-detail[staff]'})
+        admin = results['results']['home:admin[staff]']
+        self.assertEqual(admin['status'], 200)
+        self.assertGreater(admin['queries'], 0)
+        self.assertGreater(admin['peak_memory_kb'], 0)
+        self.assertLessEqual(admin['p50_ms'], admin['p99_ms'])
+        self.assertEqual(results['results']['home:admin[user]']['status'], 302)
+        self.assertEqual(results['meta']['dataset']['tickets'], 20)
+        self.assertEqual(results['meta']['dataset']['newest_ticket_at'],
+                         Ticket.objects.latest('created_at').created_at.isoformat())
+
+    def test_dates_follow_the_dataset(self):
+        now = timezone.now() - timedelta(days=100)
+        importer.import_tickets(dataset.generate(20, users=2, staff=1, messages='fixed:1', days=30, now=now),
+                                dataset.SOURCE)
+        User.objects.filter(username__startswith='bench-staff-').update(is_staff=True)
+        query = dict((key, query) for key, _, _, query in runner.cases(runner.pick_targets(), {'ticket:ticket-export'}))
+        self.assertEqual(query['ticket:ticket-export[staff]']['created_after'],
+                         timezone.localdate(Ticket.objects.latest('created_at').created_at) - timedelta(days=7))
+
+    def test_compare(self):
+        meta = {'dataset': {'tickets': 1}}
+        baseline = {'meta': meta, 'results': {
+            'a': {'p95_ms': 10.0, 'queries': 3},
+            'b': {'p95_ms': 10.0, 'queries': 3},
+            'c': {'p95_ms': 0.5, 'queries': 3},
+            'd': {'p95_ms': 10.0, 'queries': 3},
+        }}
+        current = {'meta': meta, 'results': {
+            'a': {'p95_ms': 12.0, 'queries': 3},
+            'b': {'p95_ms': 20.0, 'queries': 3},
+            'c': {'p95_ms': 1.0, 'queries': 3},
+            'd': {'p95_ms': 10.0, 'queries': 4},
+        }}
+        rows, warnings = runner.compare(baseline, current, tolerance=0.25)
+        self.assertEqual({row[0]: row[-1] for row in rows}, {'a': False, 'b': True, 'c': False, 'd': True})
+        self.assertEqual(warnings, [])
+
+    @modify_settings(INSTALLED_APPS={'append': 'benchmarks'})
+    def test_command(self):
+        dataset.seed(10, users=2, staff=1, messages='fixed:1')
+        out = StringIO()
+        call_command('run_benchmark', requests=2, warmup=0, only=['home:home'], stdout=out)
+        self.assertIn('home:home[anonymous]', out.getvalue())
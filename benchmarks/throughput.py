@@ -0,0 +1,91 @@
+"""
+Compare sustained concurrent-request throughput of the ASGI and WSGI deployments.
+
+Start both servers against the same database, for example:
+
+    uvicorn A.asgi:application --port 8001 --workers 1
+    gunicorn A.wsgi:application --bind :8000 --workers 1 --threads 8
+
+then log in once in a browser and pass its sessionid cookie:
+
+    python benchmarks/throughput.py --asgi http://127.0.0.1:8001 --wsgi http://127.0.0.1:8000 \
+        --session <sessionid> --path /ticket/detail/1/ --path /ticket/lists-open/ \
+        --concurrency 50 --duration 20
+
+Each path is hammered by --concurrency keep-alive clients for --duration
+seconds per server; requests per second and latency percentiles are printed
+side by side. Only the standard library is used.
+"""
+import argparse
+import http.client
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def worker(base, path, session, deadline, latencies, errors):
+    url = urlsplit(base)
+    connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+    headers = {'Cookie': f'sessionid={session}'} if session else {}
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            errors.append(1)
+            connection.close()
+            continue
+        if response.status >= 400:
+            errors.append(response.status)
+        latencies.append(time.perf_counter() - started)
+    connection.close()
+
+
+def run(base, path, session, concurrency, duration):
+    """
+    Load one path of one server and summarize the results.
+
+    Returns:
+        dict: Requests per second, error count and p50/p95/p99 latency in milliseconds
+    """
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=worker, args=(base, path, session, deadline, latencies, errors))
+               for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0] * 99
+    return {
+        'rps': len(latencies) / duration,
+        'errors': len(errors),
+        'p50': quantiles[49] * 1000,
+        'p95': quantiles[94] * 1000,
+        'p99': quantiles[98] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--asgi', required=True, help='Base URL of the ASGI server (uvicorn).')
+    parser.add_argument('--wsgi', required=True, help='Base URL of the WSGI server.')
+    parser.add_argument('--path', action='append', required=True, help='Path to load; repeatable.')
+    parser.add_argument('--session', help='sessionid cookie of a logged-in user.')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=20)
+    args = parser.parse_args()
+
+    print(f'{"path":<32} {"server":<6} {"req/s":>9} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errors":>7}')
+    for path in args.path:
+        for name, base in (('asgi', args.asgi), ('wsgi', args.wsgi)):
+            result = run(base, path, args.session, args.concurrency, args.duration)
+            print(f'{path:<32} {name:<6} {result["rps"]:>9.1f} {result["p50"]:>8.1f} '
+                  f'{result["p95"]:>8.1f} {result["p99"]:>8.1f} {result["errors"]:>7}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from model_bakery import baker
+
+from ticket.models import Ticket
+from ticket.tests.utils import QueryBudgetMixin
+
+
+class TestAdminView(TestCase):
+
+    def setUp(self):
+        self.staff = baker.make(User, is_staff=True)
+        baker.make(Ticket, status='Open', _quantity=3)
+        baker.make(Ticket, status='In Progress', _quantity=2)
+        baker.make(Ticket, status='Closed')
+        self.client.force_login(self.staff)
+
+    def test_dashboard_counts(self):
+        response = self.client.get(reverse('home:admin'))
+        self.assertEqual(response.status_code, 200)
+        stats = response.context['stats']
+        self.assertEqual(stats['total'], 6)
+        self.assertEqual(stats['open'], 3)
+        self.assertEqual(stats['in_progress'], 2)
+        self.assertEqual(stats['closed'], 1)
+        self.assertEqual(stats['created_today'], 6)
+        self.assertEqual(stats['closed_today'], 1)
+
+    def test_dashboard_non_staff_redirect(self):
+        self.client.force_login(baker.make(User))
+        response = self.client.get(reverse('home:admin'))
+        self.assertRedirects(response, reverse('home:home'))
+
+
+class TestProfileView(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        self.user = baker.make(User)
+        self.client.force_login(self.user)
+
+    def test_profile_query_budget(self):
+        baker.make(Ticket, user=self.user, _quantity=2)
+        self.assertQueriesDoNotGrow(
+            lambda: self.client.get(reverse('home:profile', args=[self.user.username])),
+            lambda: baker.make(Ticket, user=self.user, _quantity=20),
+            limit=6,
+        )
@@ -1,10 +1,15 @@
+from asgiref.sync import sync_to_async
 from django.contrib import messages
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.models import User
-from django.shortcuts import redirect, get_object_or_404
+from django.db.models import Count, Max
+from django.shortcuts import redirect
 from django.views.generic import TemplateView, FormView, View
 
+from ticket import counters, events, rollups
+from ticket.async_utils import AsyncLoginRequiredMixin, aget_object_or_404, aload_user
+from ticket.conditional import ConditionalGetMixin
 from ticket.models import Ticket
 from .forms import UserLoginForm, UserRegisterForm
 
@@ -132,35 +137,42 @@ class RegisterView(FormView):
         return redirect('home:register')
 
 
-class ProfileView(LoginRequiredMixin, TemplateView):
+class ProfileView(AsyncLoginRequiredMixin, ConditionalGetMixin, TemplateView):
     """
     User profile view.
 
     Displays user profile information and their tickets.
-    Access is restricted to the profile owner only.
+    Access is restricted to the profile owner only. The handler is async and
+    reads through the async ORM; an unchanged profile is answered with 304.
     """
     template_name = 'users/profile.html'
     model = User
 
-    def setup(self, request, *args, **kwargs):
+    async def dispatch(self, request, *args, **kwargs):
         """
-        Initialize view attributes before dispatch.
+        Load the profile owner and check permissions before proceeding with request handling.
 
-        Sets up the user instance based on the username URL parameter.
+        Ensures users can only view their own profiles.
 
         Args:
             request: HTTP request object
             *args: Variable length argument list
             **kwargs: Arbitrary keyword arguments including username
+
+        Returns:
+            HTTP response: Redirect to home if not the profile owner,
+                          otherwise proceed with normal dispatch
         """
-        super().setup(request, *args, **kwargs)
-        self.user_instance = get_object_or_404(User, username=kwargs.get('username'))
+        self.user_instance = await aget_object_or_404(User.objects.all(), username=kwargs.get('username'))
+        if await aload_user(request) != self.user_instance:
+            return redirect('home:home')
+        return await super().dispatch(request, *args, **kwargs)
 
-    def dispatch(self, request, *args, **kwargs):
+    async def get(self, request, *args, **kwargs):
         """
-        Check permissions before proceeding with request handling.
+        Handle GET request to display the profile and the user's tickets.
 
-        Ensures users can only view their own profiles.
+        Only the columns shown in the ticket table are loaded.
 
         Args:
             request: HTTP request object
@@ -168,29 +180,39 @@ class ProfileView(LoginRequiredMixin, TemplateView):
             **kwargs: Arbitrary keyword arguments
 
         Returns:
-            HTTP response: Redirect to home if not the profile owner,
-                          otherwise proceed with normal dispatch
+            HTTP response: 304 when the client copy is current, otherwise the
+                          rendered profile page
         """
-        if self.request.user != self.user_instance:
-            return redirect('home:home')
-        return super().dispatch(request, *args, **kwargs)
+        not_modified = await self.anot_modified()
+        if not_modified:
+            return not_modified
+        tickets = Ticket.objects.filter(user=self.user_instance).only('id', 'subject', 'status')
+        context = self.get_context_data(user_ticket=[ticket async for ticket in tickets], **kwargs)
+        return self.add_validators(self.render_to_response(context))
+
+    async def aget_validators(self):
+        """
+        Read the newest change and the number of the user's tickets in one aggregate.
 
-    def get_context_data(self, **kwargs):
+        Both come from the user's rows of the user_id index; any status change
+        moves updated_at, which also covers the navbar badge.
         """
-        Add user profile and ticket data to template context.
+        row = await Ticket.objects.filter(user=self.user_instance).aaggregate(
+            last_modified=Max('updated_at'), count=Count('id'))
+        return (row['last_modified'], row['count']), row['last_modified']
 
-        Retrieves user information and their tickets to display in the template.
+    def get_context_data(self, **kwargs):
+        """
+        Add user profile data to template context.
 
         Args:
-            **kwargs: Arbitrary keyword arguments
+            **kwargs: Arbitrary keyword arguments including user_ticket
 
         Returns:
             dict: Context dictionary with user profile and ticket information
         """
         contex = super().get_context_data(**kwargs)
         contex['user'] = self.user_instance
-        contex['user_ticket'] = Ticket.objects.filter(user=self.user_instance)
-
         return contex
 
 
@@ -221,16 +243,19 @@ class LogoutView(LoginRequiredMixin, View):
         return redirect('home:home')
 
 
-class AdminView(LoginRequiredMixin, TemplateView):
+class AdminView(AsyncLoginRequiredMixin, TemplateView):
     """
     Admin dashboard view.
 
     Displays ticket statistics and system overview.
-    Access is restricted to staff members only.
+    Access is restricted to staff members only. The handler is async and
+    reads through the async ORM.
     """
     template_name = 'users/admin-dashboard.html'
+    metrics_days = 30
+    trend_days = 90
 
-    def dispatch(self, request, *args, **kwargs):
+    async def dispatch(self, request, *args, **kwargs):
         """
         Check staff permissions before proceeding with request handling.
 
@@ -245,27 +270,36 @@ class AdminView(LoginRequiredMixin, TemplateView):
             HTTP response: Redirect to home if not staff,
                           otherwise proceed with normal dispatch
         """
-        if not request.user.is_staff:
-            messages.error(request, 'Just admin can see this page.', extra_tags='danger')
+        user = await aload_user(request)
+        if not user.is_staff:
+            await sync_to_async(messages.error)(request, 'Just admin can see this page.', extra_tags='danger')
             return redirect('home:home')
-        return super().dispatch(request, *args, **kwargs)
+        return await super().dispatch(request, *args, **kwargs)
 
-    def get_context_data(self, **kwargs):
+    async def get(self, request, *args, **kwargs):
         """
-        Add ticket statistics to template context.
+        Handle GET request with ticket statistics in the template context.
 
-        Retrieves tickets in different statuses to display in the admin dashboard.
+        Status counts are read from the ticket counters table and the daily
+        numbers from one indexed aggregate, so the template only receives
+        plain numbers and never evaluates a queryset. Time to first response
+        and time to close over the last metrics_days come from the ticket
+        event log, and the trend chart from trend_days daily rollup rows.
 
         Args:
+            request: HTTP request object
+            *args: Variable length argument list
             **kwargs: Arbitrary keyword arguments
 
         Returns:
-            dict: Context dictionary with ticket statistics by status
+            HTTP response: Rendered dashboard with ticket statistics by status
         """
-        context = super().get_context_data(**kwargs)
-        ticket = Ticket.objects.all()
-        context['tickets'] = ticket
-        context['open_tickets'] = ticket.filter(status='Open')
-        context['in_progress_tickets'] = ticket.filter(status='In Progress')
-        context['closed_tickets'] = ticket.filter(status='Closed')
-        return context
\ No newline at end of file
+        stats = await counters.aget_counts()
+        stats.update(await Ticket.objects.atoday_stats())
+        lifecycle = await events.alifecycle_metrics(self.metrics_days)
+        trend = await rollups.atrend(self.trend_days)
+        trend_max = max([1] + [max(row.opened, row.closed) for row in trend])
+        return self.render_to_response(self.get_context_data(stats=stats, lifecycle=lifecycle,
+                                                             metrics_days=self.metrics_days, trend=trend,
+                                                             trend_max=trend_max, trend_days=self.trend_days,
+                                                             **kwargs))
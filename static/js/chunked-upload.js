@@ -0,0 +1,87 @@
+// Sends large attachments of forms marked with data-upload-url in resumable
+// chunks, then submits the form with the upload id instead of the file.
+(function () {
+    const THRESHOLD = 5 * 1024 * 1024;
+
+    function csrfToken(form) {
+        return form.querySelector('[name=csrfmiddlewaretoken]').value;
+    }
+
+    function resumeKey(file) {
+        return 'upload:' + file.name + ':' + file.size + ':' + file.lastModified;
+    }
+
+    async function startUpload(form, file) {
+        const saved = sessionStorage.getItem(resumeKey(file));
+        if (saved) {
+            const upload = JSON.parse(saved);
+            const response = await fetch(upload.url);
+            if (response.ok) {
+                upload.offset = (await response.json()).offset;
+                return upload;
+            }
+        }
+        const body = new FormData();
+        body.append('filename', file.name);
+        body.append('size', file.size);
+        const response = await fetch(form.dataset.uploadUrl, {
+            method: 'POST', body: body, headers: {'X-CSRFToken': csrfToken(form)},
+        });
+        if (!response.ok) {
+            throw new Error((await response.json()).error);
+        }
+        const upload = await response.json();
+        sessionStorage.setItem(resumeKey(file), JSON.stringify(upload));
+        return upload;
+    }
+
+    async function sendChunks(form, file, upload, progress) {
+        let offset = upload.offset;
+        let retries = 0;
+        while (offset < file.size) {
+            const chunk = file.slice(offset, offset + upload.chunk_size);
+            let response;
+            try {
+                response = await fetch(upload.url, {
+                    method: 'PUT', body: chunk,
+                    headers: {'X-CSRFToken': csrfToken(form), 'Upload-Offset': offset},
+                });
+            } catch (error) {
+                if (++retries > 5) {
+                    throw error;
+                }
+                await new Promise(function (resolve) { setTimeout(resolve, 1000 * retries); });
+                continue;
+            }
+            const data = await response.json();
+            if (!response.ok && response.status !== 409) {
+                throw new Error(data.error);
+            }
+            offset = data.offset;
+            retries = 0;
+            progress.textContent = Math.floor(100 * offset / file.size) + '%';
+        }
+    }
+
+    document.querySelectorAll('form[data-upload-url]').forEach(function (form) {
+        form.addEventListener('submit', async function (event) {
+            const input = form.querySelector('input[type=file]');
+            const file = input && input.files[0];
+            if (!file || file.size < THRESHOLD) {
+                return;
+            }
+            event.preventDefault();
+            const progress = form.querySelector('.upload-progress');
+            try {
+                const upload = await startUpload(form, file);
+                await sendChunks(form, file, upload, progress);
+                form.querySelector('[name=upload]').value = upload.id;
+                sessionStorage.removeItem(resumeKey(file));
+                input.value = '';
+                form.submit();
+            } catch (error) {
+                progress.textContent = 'Upload interrupted, submit again to resume. ' + error.message;
+            }
+        });
+    });
+})();
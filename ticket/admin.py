@@ -1,25 +1,117 @@
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.widgets import ForeignKeyRawIdWidget
 
-from ticket.models import Ticket, Messages
+from django.db.models import Q
+
+from ticket import search, transitions
+from ticket.models import Ticket, Messages, TicketEvent
 
 
 # Register your models here.
 
 
+class CachedRawIdWidget(ForeignKeyRawIdWidget):
+    """
+    Raw id widget that resolves each distinct value only once per formset.
+
+    Widgets are shallow-copied for every inline form, so the label cache is
+    shared by all rows of the formset and a thread with two participants
+    costs two lookups instead of one per message.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.labels = {}
+
+    def label_and_url_for_value(self, value):
+        if value not in self.labels:
+            self.labels[value] = super().label_and_url_for_value(value)
+        return self.labels[value]
+
+
 class MessageInline(admin.TabularInline):
     model = Messages
     extra = 0
     list_editable = ['sender', 'created_at']
     raw_id_fields = ['sender', ]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('ticket__user', 'sender')
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.raw_id_fields:
+            kwargs['widget'] = CachedRawIdWidget(db_field.remote_field, self.admin_site, using=kwargs.get('using'))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
 
 @admin.register(Ticket)
 class TicketAdmin(admin.ModelAdmin):
-    list_display = ['id', 'user', 'subject', 'status', 'created_at', 'updated_at']
-    list_filter = ('status', 'status', 'created_at')
+    list_display = ['id', 'user', 'subject', 'status', 'message_count', 'last_message_at', 'created_at', 'updated_at']
+    list_filter = ('status', 'status', 'last_message_is_admin', 'created_at')
     search_fields = ('subject', 'description', 'user__username')
     list_editable = ('status',)
+    list_select_related = ('user',)
     inlines = (MessageInline,)
+    actions = ['close_tickets', 'reopen_tickets', 'mark_tickets_in_progress']
+
+    def change_status(self, request, queryset, status):
+        """
+        Move the selected tickets to status in batched UPDATEs and report the outcome.
+
+        Unlike list_editable, rows are not saved one by one: every batch of
+        TICKET_BULK_BATCH_SIZE tickets is one transaction with one UPDATE.
+        """
+        selected = queryset.count()
+        for progress in transitions.bulk_transition(queryset, status, settings.TICKET_BULK_BATCH_SIZE):
+            pass
+        self.message_user(request, f'{progress["changed"]} ticket(s) moved to {status}; '
+                                   f'{selected - progress["changed"]} left unchanged.')
+
+    @admin.action(description='Close selected tickets')
+    def close_tickets(self, request, queryset):
+        self.change_status(request, queryset, 'Closed')
+
+    @admin.action(description='Reopen selected tickets')
+    def reopen_tickets(self, request, queryset):
+        self.change_status(request, queryset, 'Open')
+
+    @admin.action(description='Mark selected tickets in progress')
+    def mark_tickets_in_progress(self, request, queryset):
+        self.change_status(request, queryset, 'In Progress')
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Search through the full-text index instead of LIKE scans over every column.
+
+        Message content is matched too; an exact username still finds the
+        tickets of that user.
+        """
+        if not search_term.strip():
+            return queryset, False
+        ticket_ids = search.matching_ticket_ids(search_term)
+        return queryset.filter(Q(pk__in=ticket_ids) | Q(user__username=search_term.strip())), False
+
+
+@admin.register(TicketEvent)
+class TicketEventAdmin(admin.ModelAdmin):
+    """
+    Read-only view of the append-only ticket event log.
+    """
+    list_display = ['id', 'ticket', 'kind', 'old_status', 'new_status', 'actor', 'created_at']
+    list_filter = ('kind', 'new_status')
+    list_select_related = ('ticket__user', 'actor')
+    raw_id_fields = ['ticket', 'actor']
+    date_hierarchy = 'created_at'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 # @admin.register(Messages)
 # class MessagesAdmin(admin.ModelAdmin):
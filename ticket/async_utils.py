@@ -0,0 +1,74 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.mixins import AccessMixin
+from django.http import Http404
+
+
+async def aload_user(request):
+    """
+    Resolve the lazy request.user without blocking the event loop.
+
+    Django 4.2 has no request.auser(); touching request.user inside an async
+    view would run the session and user queries synchronously and raise
+    SynchronousOnlyOperation. After this call request.user is a plain object.
+
+    Args:
+        request: HTTP request object
+
+    Returns:
+        User: The authenticated user or AnonymousUser
+    """
+    await sync_to_async(lambda: request.user.pk)()
+    return request.user
+
+
+async def aget_object_or_404(queryset, **kwargs):
+    """
+    Async counterpart of django.shortcuts.get_object_or_404 for a queryset.
+
+    Args:
+        queryset: QuerySet to look the object up in
+        **kwargs: Lookup arguments
+
+    Returns:
+        Model: The matching object
+
+    Raises:
+        Http404: When no object matches
+    """
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+
+
+async def aiterate(iterator):
+    """
+    Consume a blocking iterator from async code, one item per worker thread hop.
+
+    StreamingHttpResponse in Django 4.2 reads a sync iterator completely
+    before sending anything under ASGI; wrapping it keeps the response
+    streaming. Items should be coarse (a chunk of rows, not a row) so the
+    thread switches stay cheap.
+
+    Args:
+        iterator: Sync iterator that may run queries
+
+    Yields:
+        The items of iterator
+    """
+    next_item = sync_to_async(next)
+    sentinel = object()
+    while (item := await next_item(iterator, sentinel)) is not sentinel:
+        yield item
+
+
+class AsyncLoginRequiredMixin(AccessMixin):
+    """
+    LoginRequiredMixin for views whose handlers are async.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await aload_user(request)
+        if not user.is_authenticated:
+            return self.handle_no_permission()
+        return await super().dispatch(request, *args, **kwargs)
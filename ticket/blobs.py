@@ -0,0 +1,59 @@
+from django.db import transaction
+from django.db.models import F
+
+from .models import Blob
+from .storage import attachment_storage
+
+
+def acquire(name):
+    """
+    Count one more reference to the blob stored under name.
+
+    Names outside the blob store (files uploaded before deduplication) are ignored.
+
+    Args:
+        name: Stored file name
+    """
+    digest = attachment_storage.digest_from_name(name)
+    if digest is None:
+        return
+    with transaction.atomic():
+        if Blob.objects.filter(name=name).update(ref_count=F('ref_count') + 1):
+            return
+        blob, created = Blob.objects.get_or_create(
+            name=name, defaults={'digest': digest, 'size': attachment_storage.size(name), 'ref_count': 1})
+        if not created:
+            Blob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+
+
+def release(name):
+    """
+    Drop one reference to the blob stored under name.
+
+    Once the transaction commits, a blob without references is deleted
+    together with its file.
+
+    Args:
+        name: Stored file name
+    """
+    if attachment_storage.digest_from_name(name) is None:
+        return
+    Blob.objects.filter(name=name).update(ref_count=F('ref_count') - 1)
+    transaction.on_commit(lambda: delete_if_unreferenced(name))
+
+
+def delete_if_unreferenced(name):
+    """
+    Delete the blob row and file when no ticket or message references them anymore.
+
+    Args:
+        name: Stored file name
+
+    Returns:
+        bool: True when the blob was deleted
+    """
+    with transaction.atomic():
+        deleted, _ = Blob.objects.filter(name=name, ref_count__lte=0).delete()
+    if deleted:
+        attachment_storage.delete(name)
+    return bool(deleted)
@@ -0,0 +1,30 @@
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+
+
+def cache_is_shared():
+    """
+    Tell whether every worker process sees the same default cache.
+
+    Returns:
+        bool: False for the local memory and dummy backends
+    """
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Warn on deployment checks when the default cache is private to each process.
+    """
+    if cache_is_shared():
+        return []
+    return [Warning(
+        'The default cache is private to each process.',
+        hint='With several worker processes, /metrics only adds up the process that answers the scrape '
+             'and authenticated users are loaded from the database on every request. '
+             'Use a shared backend such as Redis or Memcached.',
+        id='ticket.W001',
+    )]
@@ -0,0 +1,81 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.db.models import IntegerField, Subquery, Value
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .models import TicketCounter
+
+
+def open_count_subquery(user):
+    """
+    Subquery reading the open-ticket badge the navbar shows to a user.
+
+    Args:
+        user: Requesting user; staff see the site-wide count, anonymous
+              users no count at all
+
+    Returns:
+        Expression: Single-value subquery to annotate onto a validator query
+    """
+    if not user.is_authenticated:
+        return Value(None, output_field=IntegerField())
+    rows = TicketCounter.objects.filter(status='Open', user=None if user.is_staff else user)
+    return Subquery(rows.values('count')[:1])
+
+
+class ConditionalGetMixin:
+    """
+    Mixin answering repeated GETs with 304 Not Modified before anything is rendered.
+
+    Subclasses implement aget_validators(), which must read everything the
+    page depends on in one indexed query. The ETag also covers the user, the
+    CSRF cookie and the requested URL, and no 304 is sent while flash
+    messages are waiting to be shown.
+    """
+
+    async def aget_validators(self):
+        """
+        Return the values the page content depends on.
+
+        Returns:
+            tuple: (parts, last_modified) where parts is a tuple of
+                   reprable values and last_modified a datetime or None
+        """
+        raise NotImplementedError
+
+    async def anot_modified(self):
+        """
+        Compute the validators and compare them with the request preconditions.
+
+        Returns:
+            HTTP response: 304 when the client copy is current, otherwise None
+        """
+        request = self.request
+        self.etag = self.last_modified = None
+        if len(get_messages(request)):
+            # The page shows the pending messages once; it must not be reused.
+            return None
+        parts, last_modified = await self.aget_validators()
+        digest = hashlib.md5(repr((
+            request.user.pk, request.COOKIES.get(settings.CSRF_COOKIE_NAME), request.get_full_path(), parts,
+        )).encode(), usedforsecurity=False).hexdigest()
+        self.etag = quote_etag(digest)
+        self.last_modified = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=self.etag, last_modified=self.last_modified)
+        if response is not None:
+            self.add_validators(response)
+        return response
+
+    def add_validators(self, response):
+        """
+        Attach the computed validators to a response and require revalidation.
+        """
+        if self.etag is not None:
+            response['ETag'] = self.etag
+        if self.last_modified is not None:
+            response['Last-Modified'] = http_date(self.last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -0,0 +1,26 @@
+from django.utils.functional import SimpleLazyObject
+
+from . import counters
+
+
+def ticket_counts(request):
+    """
+    Expose the ticket counters to every template.
+
+    Staff members see the site-wide counts, other users see the counts of
+    their own tickets. The lookup is lazy, so pages that never render the
+    counts do not query the counters table.
+
+    Args:
+        request: HTTP request object
+
+    Returns:
+        dict: Context with a lazy ticket_counts mapping
+    """
+    def load():
+        user = request.user
+        if not user.is_authenticated:
+            return {}
+        return counters.get_counts(None if user.is_staff else user)
+
+    return {'ticket_counts': SimpleLazyObject(load)}
@@ -0,0 +1,177 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+
+from .models import Ticket, TicketCounter
+
+STATUS_KEYS = {
+    'Open': 'open',
+    'In Progress': 'in_progress',
+    'Closed': 'closed',
+}
+
+# Counter rows above which apply_deltas switches to set-based writes.
+BULK_THRESHOLD = 8
+
+
+def apply_deltas(deltas):
+    """
+    Add the given deltas to the per-user and site-wide counters.
+
+    A few counters are moved with one atomic increment each. Larger sets,
+    as produced by imports and bulk changes, are locked and read in one
+    query and written back with one bulk update plus one bulk insert.
+
+    Args:
+        deltas: Mapping of (status, user_id) to the change in ticket count; a
+                user_id of None moves the site-wide counter only
+    """
+    totals = Counter()
+    for (status, user_id), delta in deltas.items():
+        totals[(status, user_id)] += delta
+        if user_id is not None:
+            totals[(status, None)] += delta
+    totals = {key: delta for key, delta in totals.items() if delta}
+
+    with transaction.atomic():
+        if len(totals) > BULK_THRESHOLD:
+            totals = _apply_in_bulk(totals)
+        for (status, user_id), delta in totals.items():
+            _apply_one(status, user_id, delta)
+
+
+def _apply_one(status, user_id, delta):
+    counter = TicketCounter.objects.filter(status=status, user_id=user_id)
+    if counter.update(count=F('count') + delta):
+        return
+    _, created = TicketCounter.objects.get_or_create(status=status, user_id=user_id, defaults={'count': delta})
+    if not created:
+        counter.update(count=F('count') + delta)
+
+
+def _apply_in_bulk(totals):
+    """
+    Apply totals with set-based writes.
+
+    Returns:
+        dict: The totals still to apply one by one, for counter rows another
+              transaction created concurrently
+    """
+    statuses = {status for status, _ in totals}
+    user_ids = {user_id for _, user_id in totals if user_id is not None}
+    rows = TicketCounter.objects.select_for_update().filter(
+        Q(user_id__in=user_ids) | Q(user__isnull=True), status__in=statuses)
+    existing = []
+    for counter in rows:
+        delta = totals.get((counter.status, counter.user_id))
+        if delta:
+            counter.count += delta
+            existing.append(counter)
+    TicketCounter.objects.bulk_update(existing, ['count'], batch_size=500)
+    found = {(counter.status, counter.user_id) for counter in existing}
+    missing = {key: delta for key, delta in totals.items() if key not in found}
+    try:
+        with transaction.atomic():
+            TicketCounter.objects.bulk_create([TicketCounter(status=status, user_id=user_id, count=delta)
+                                               for (status, user_id), delta in missing.items()])
+    except IntegrityError:
+        return missing
+    return {}
+
+
+def ticket_created(status, user_id):
+    """
+    Count a newly created ticket.
+
+    Args:
+        status: Status the ticket was created with
+        user_id: Primary key of the ticket owner
+    """
+    apply_deltas({(status, user_id): 1})
+
+
+def ticket_deleted(status, user_id, owner_deleted=False):
+    """
+    Forget a deleted ticket.
+
+    Args:
+        status: Status the ticket had when it was deleted
+        user_id: Primary key of the ticket owner
+        owner_deleted: The ticket goes with its owner, whose counters the
+                       cascade already removed; only the site-wide count moves
+    """
+    apply_deltas({(status, None if owner_deleted else user_id): -1})
+
+
+def status_changed(user_id, old_status, new_status):
+    """
+    Move a ticket from one status counter to another.
+
+    Args:
+        user_id: Primary key of the ticket owner
+        old_status: Status before the change
+        new_status: Status after the change
+    """
+    if old_status != new_status:
+        apply_deltas({(old_status, user_id): -1, (new_status, user_id): 1})
+
+
+def get_counts(user=None):
+    """
+    Read the ticket counts for every status from the counters table.
+
+    Args:
+        user: Optional ticket owner; the site-wide counts are returned when omitted
+
+    Returns:
+        dict: Plain integer counts keyed by total, open, in_progress and closed
+    """
+    return _counts(TicketCounter.objects.filter(user=user).values_list('status', 'count'))
+
+
+async def aget_counts(user=None):
+    """
+    Async version of get_counts using the async ORM.
+    """
+    rows = TicketCounter.objects.filter(user=user).values_list('status', 'count')
+    return _counts([row async for row in rows])
+
+
+def _counts(rows):
+    counts = dict.fromkeys(STATUS_KEYS.values(), 0)
+    for status, count in rows:
+        counts[STATUS_KEYS[status]] = count
+    counts['total'] = sum(counts.values())
+    return counts
+
+
+def rebuild():
+    """
+    Recount every ticket and overwrite the counters table with the result.
+
+    Returns:
+        list: (status, user_id, stored, actual) tuples for every counter that had drifted
+    """
+    with transaction.atomic():
+        actual = Counter()
+        rows = Ticket.objects.order_by().values_list('status', 'user_id').annotate(total=Count('id'))
+        for status, user_id, total in rows:
+            actual[(status, user_id)] += total
+            actual[(status, None)] += total
+
+        stored = {(counter.status, counter.user_id): counter
+                  for counter in TicketCounter.objects.select_for_update()}
+        drift = []
+        for key in set(actual) | set(stored):
+            counter = stored.get(key)
+            stored_count = counter.count if counter else 0
+            if stored_count == actual[key]:
+                continue
+            drift.append((key[0], key[1], stored_count, actual[key]))
+            if counter:
+                counter.count = actual[key]
+                counter.save(update_fields=['count'])
+            else:
+                TicketCounter.objects.create(status=key[0], user_id=key[1], count=actual[key])
+    return sorted(drift, key=lambda row: (row[0], row[1] or 0))
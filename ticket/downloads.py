@@ -0,0 +1,165 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date
+
+from .storage import ContentAddressedStorage
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+# Uploads of these types are shown in the browser; everything else, HTML and
+# SVG included, is only offered as a download so it never runs on our origin.
+INLINE_TYPES = {'image/png', 'image/jpeg', 'image/gif', 'image/webp', 'application/pdf'}
+
+
+def attachment_etag(name, stat):
+    """
+    Build a strong ETag for a stored attachment.
+
+    Blobs are named after the SHA-256 of their content, so the digest is the
+    ETag; older files fall back to their modification time and size.
+
+    Args:
+        name: Stored file name
+        stat: os.stat result of the file
+
+    Returns:
+        str: Quoted ETag value
+    """
+    digest = ContentAddressedStorage.digest_from_name(name)
+    if digest:
+        return f'"{digest}"'
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def parse_range(header, size):
+    """
+    Parse a single-range Range header.
+
+    Args:
+        header: Value of the Range request header
+        size: Size of the file in bytes
+
+    Returns:
+        tuple: (start, end) inclusive byte positions, None when the header is
+               absent or not a single byte range, or False when it cannot be satisfied
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if start == '':
+        length = int(end)
+        if not length:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def iter_file_range(path, start, length):
+    """
+    Yield length bytes of the file starting at start, one bounded chunk at a time.
+    """
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def sendfile_response(name, path):
+    """
+    Hand the transfer over to the front-end server when TICKET_ATTACHMENT_SENDFILE is configured.
+
+    Returns:
+        HttpResponse: Empty response carrying X-Accel-Redirect or X-Sendfile,
+                      or None when offloading is disabled
+    """
+    backend = getattr(settings, 'TICKET_ATTACHMENT_SENDFILE', None)
+    if backend == 'x-accel-redirect':
+        response = HttpResponse()
+        response['X-Accel-Redirect'] = settings.TICKET_ATTACHMENT_SENDFILE_PREFIX + name
+    elif backend == 'x-sendfile':
+        response = HttpResponse()
+        response['X-Sendfile'] = path
+    else:
+        return None
+    # Let the front-end server pick the content type and answer Range requests.
+    del response['Content-Type']
+    return response
+
+
+def serve_attachment(request, field_file, filename=''):
+    """
+    Build the response delivering an attachment with validators and Range support.
+
+    Only INLINE_TYPES are displayed inline. Every response is sent with
+    nosniff and a sandboxing Content-Security-Policy, so a file uploaded by a
+    user cannot run script on the site's origin.
+
+    Args:
+        request: HTTP request object
+        field_file: FieldFile of a ticket or message
+        filename: Name the file was uploaded under, offered to the browser
+
+    Returns:
+        HTTP response: 304/412 for matching preconditions, an offloaded response,
+                       206 for a satisfiable Range, 416 for an unsatisfiable one,
+                       otherwise the full file
+    """
+    name = field_file.name
+    path = field_file.storage.path(name)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404('Attachment not found.')
+
+    guessed = mimetypes.guess_type(name)[0]
+    inline = guessed in INLINE_TYPES
+    content_type = guessed if inline else 'application/octet-stream'
+    filename = filename or 'attachment' + os.path.splitext(name)[1]
+    etag = attachment_etag(name, stat)
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = sendfile_response(name, path)
+        if response is not None and not inline:
+            # The front-end server would guess text/html for an .html upload.
+            response['Content-Type'] = content_type
+    if response is None:
+        byte_range = parse_range(request.headers.get('Range'), stat.st_size)
+        if_range = request.headers.get('If-Range')
+        if byte_range is not None and if_range and if_range != etag:
+            byte_range = None
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+        elif byte_range:
+            start, end = byte_range
+            response = StreamingHttpResponse(iter_file_range(path, start, end - start + 1), status=206,
+                                             content_type=content_type)
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+            response['Content-Length'] = str(end - start + 1)
+        else:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+
+    if response.status_code != 304:
+        response['Content-Disposition'] = content_disposition_header(not inline, filename)
+    response['X-Content-Type-Options'] = 'nosniff'
+    response['Content-Security-Policy'] = 'sandbox'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = 'private, max-age=3600'
+    return response
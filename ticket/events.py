@@ -0,0 +1,156 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .models import Ticket, TicketEvent
+
+CACHE_KEY = 'ticket-lifecycle:{}'
+
+# The request being handled, set by TicketEventMiddleware to resolve the
+# acting user.
+_request = ContextVar('ticket_events_request', default=None)
+
+
+@contextmanager
+def acting(request):
+    """
+    Attribute the events recorded inside the block to the user of request.
+    """
+    token = _request.set(request)
+    try:
+        yield
+    finally:
+        _request.reset(token)
+
+
+def current_actor_id():
+    user = getattr(_request.get(), 'user', None)
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+def record(ticket_id, kind, actor_id=None, old_status='', new_status='', created_at=None):
+    """
+    Log a lifecycle event of a ticket in the surrounding transaction.
+
+    Args:
+        ticket_id: Primary key of the ticket
+        kind: One of the TicketEvent kinds
+        actor_id: Acting user, defaults to the user of the current request
+        old_status: Status before a status change
+        new_status: Status after a status change or at creation
+        created_at: Time of the event, defaults to now
+    """
+    record_many([TicketEvent(
+        ticket_id=ticket_id, kind=kind, actor_id=actor_id or current_actor_id(),
+        old_status=old_status, new_status=new_status, created_at=created_at or timezone.now(),
+    )])
+
+
+def record_many(events):
+    """
+    Log several events with one INSERT in the surrounding transaction.
+
+    The events commit or roll back together with the change they describe,
+    savepoints included, so a crash can never keep one without the other.
+    Outside a transaction the INSERT follows the change in its own statement.
+
+    Args:
+        events: Unsaved TicketEvent instances
+    """
+    TicketEvent.objects.bulk_create(events)
+
+
+def _round(duration):
+    return None if duration is None else timedelta(seconds=round(duration.total_seconds()))
+
+
+def _median(middle):
+    return _round(sum(middle, timedelta()) / len(middle)) if middle else None
+
+
+def _metric_queries(since):
+    first_reply = TicketEvent.objects.filter(
+        ticket=OuterRef('pk'), kind=TicketEvent.ADMIN_REPLIED,
+    ).order_by('created_at').values('created_at')[:1]
+    replies = Ticket.objects.filter(created_at__gte=since).annotate(
+        first_reply_at=Subquery(first_reply),
+        duration=ExpressionWrapper(F('first_reply_at') - F('created_at'), output_field=DurationField()),
+    )
+    closes = TicketEvent.objects.filter(
+        kind=TicketEvent.STATUS_CHANGED, created_at__gte=since, new_status='Closed',
+    ).annotate(
+        duration=ExpressionWrapper(F('created_at') - F('ticket__created_at'), output_field=DurationField()),
+    )
+    return replies, closes
+
+
+def _aggregates(unanswered=False):
+    aggregates = {'count': Count('pk', filter=Q(duration__isnull=False)), 'mean': Avg('duration')}
+    if unanswered:
+        aggregates['unanswered'] = Count('pk', filter=Q(duration__isnull=True))
+    return aggregates
+
+
+def _middle(rows, count):
+    # The one or two middle durations, read in order without loading the rest.
+    if not count:
+        return rows.none()
+    return rows.filter(duration__isnull=False).order_by('duration').values_list(
+        'duration', flat=True)[(count - 1) // 2:count // 2 + 1]
+
+
+def _metrics(first_response, first_middle, close, close_middle):
+    first_response.update(mean=_round(first_response['mean']), median=_median(first_middle))
+    close.update(mean=_round(close['mean']), median=_median(close_middle))
+    return {'first_response': first_response, 'close': close}
+
+
+def lifecycle_metrics(days=30):
+    """
+    Compute time to first response and time to close over the last days.
+
+    Time to first response covers the tickets created in the period, read
+    through the created_at index, with their first staff reply looked up in
+    the (ticket, kind, created_at) event index. Time to close covers the
+    closes logged in the period, read through the (kind, created_at) index.
+    Counts and means are aggregated in SQL and the medians read as the middle
+    rows in duration order; the result is cached for
+    TICKET_LIFECYCLE_CACHE_TIMEOUT seconds.
+
+    Args:
+        days: Length of the period
+
+    Returns:
+        dict: first_response (count, unanswered, mean, median) and close
+              (count, mean, median); durations are timedeltas
+    """
+    key = CACHE_KEY.format(days)
+    metrics = cache.get(key)
+    if metrics is None:
+        replies, closes = _metric_queries(timezone.now() - timedelta(days=days))
+        first_response, close = replies.aggregate(**_aggregates(unanswered=True)), closes.aggregate(**_aggregates())
+        metrics = _metrics(first_response, list(_middle(replies, first_response['count'])),
+                           close, list(_middle(closes, close['count'])))
+        cache.set(key, metrics, settings.TICKET_LIFECYCLE_CACHE_TIMEOUT)
+    return metrics
+
+
+async def alifecycle_metrics(days=30):
+    """
+    Async version of lifecycle_metrics using the async ORM.
+    """
+    key = CACHE_KEY.format(days)
+    metrics = await cache.aget(key)
+    if metrics is None:
+        replies, closes = _metric_queries(timezone.now() - timedelta(days=days))
+        first_response, close = (await replies.aaggregate(**_aggregates(unanswered=True)),
+                                 await closes.aaggregate(**_aggregates()))
+        metrics = _metrics(first_response, [row async for row in _middle(replies, first_response['count'])],
+                           close, [row async for row in _middle(closes, close['count'])])
+        await cache.aset(key, metrics, settings.TICKET_LIFECYCLE_CACHE_TIMEOUT)
+    return metrics
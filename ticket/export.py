@@ -0,0 +1,230 @@
+import csv
+import io
+import json
+from datetime import datetime, time, timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Ticket, Messages
+
+TICKET_FIELDS = ['id', 'subject', 'description', 'status', 'user__username', 'created_at', 'updated_at',
+                 'message_count', 'last_message_at']
+MESSAGE_FIELDS = ['id', 'sender__username', 'is_admin_response', 'content', 'created_at']
+# Leading characters that make spreadsheet applications evaluate a cell.
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+# Characters of serialized output collected before it is handed on.
+FLUSH_SIZE = 64 * 1024
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+}
+
+
+def filter_tickets(status=None, username=None, created_after=None, created_before=None):
+    """
+    Select the tickets to export.
+
+    Args:
+        status: Only tickets currently in this status
+        username: Only tickets of the user with this username
+        created_after: Only tickets created on or after this local date
+        created_before: Only tickets created on or before this local date
+
+    Returns:
+        QuerySet: The matching tickets
+    """
+    queryset = Ticket.objects.all()
+    if status:
+        queryset = queryset.filter(status=status)
+    if username:
+        queryset = queryset.filter(user__username=username)
+    if created_after:
+        queryset = queryset.filter(created_at__gte=timezone.make_aware(datetime.combine(created_after, time.min)))
+    if created_before:
+        queryset = queryset.filter(created_at__lt=timezone.make_aware(
+            datetime.combine(created_before + timedelta(days=1), time.min)))
+    return queryset
+
+
+def iter_chunks(queryset, chunk_size=2000):
+    """
+    Walk the tickets of a queryset in primary key order, one chunk at a time.
+
+    Each chunk is read with its own keyset query (id greater than the last
+    id seen), so no query or transaction spans the whole export and nothing
+    but the current chunk is held in memory.
+
+    Args:
+        queryset: Tickets to export
+        chunk_size: Tickets per query
+
+    Yields:
+        list: Ticket dicts of one chunk
+    """
+    tickets = queryset.order_by('pk').values(*TICKET_FIELDS)
+    last_pk = 0
+    while True:
+        chunk = list(tickets.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            return
+        last_pk = chunk[-1]['id']
+        yield chunk
+
+
+def iter_messages(ticket_ids, batch_size=2000):
+    """
+    Walk the messages of some tickets in (ticket, created_at, id) order, one batch at a time.
+
+    Every batch is read with its own keyset query continuing after the last
+    message seen, along the (ticket, created_at, id) index, so a ticket with
+    a very long conversation is never loaded at once.
+
+    Args:
+        ticket_ids: Primary keys of the tickets
+        batch_size: Messages per query
+
+    Yields:
+        dict: One message, with its ticket_id
+    """
+    messages = Messages.objects.filter(ticket_id__in=ticket_ids).order_by('ticket_id', 'created_at', 'id').values(
+        'ticket_id', *MESSAGE_FIELDS)
+    after = Q()
+    while True:
+        batch = list(messages.filter(after)[:batch_size])
+        yield from batch
+        if len(batch) < batch_size:
+            return
+        last = batch[-1]
+        after = (Q(ticket_id__gt=last['ticket_id'])
+                 | Q(ticket_id=last['ticket_id'], created_at__gt=last['created_at'])
+                 | Q(ticket_id=last['ticket_id'], created_at=last['created_at'], id__gt=last['id']))
+
+
+def iter_threads(queryset, chunk_size=2000):
+    """
+    Pair every ticket of a queryset with an iterator over its messages.
+
+    Tickets are read with iter_chunks() and the messages of each chunk with
+    iter_messages(), so memory use is bounded by one chunk of tickets and one
+    batch of messages. Each message iterator must be consumed before the
+    next ticket is taken.
+
+    Args:
+        queryset: Tickets to export
+        chunk_size: Tickets, and messages, per query
+
+    Yields:
+        tuple: The ticket dict and an iterator of its message dicts
+    """
+    for chunk in iter_chunks(queryset, chunk_size):
+        messages = iter_messages([ticket['id'] for ticket in chunk], chunk_size)
+        threads = groupby(messages, key=itemgetter('ticket_id'))
+        ticket_id, thread = next(threads, (None, iter(())))
+        for ticket in chunk:
+            if ticket_id == ticket['id']:
+                yield ticket, thread
+                ticket_id, thread = next(threads, (None, iter(())))
+            else:
+                yield ticket, iter(())
+
+
+def csv_escape(value):
+    """
+    Keep spreadsheet applications from evaluating a text cell as a formula.
+
+    Text starting with =, +, -, @, a tab or a carriage return, possibly
+    after apostrophes, gets one more apostrophe in front, so csv_unescape()
+    restores every value exactly.
+    """
+    if isinstance(value, str) and value.lstrip("'").startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_unescape(value):
+    """
+    Undo csv_escape().
+    """
+    if isinstance(value, str) and value[:1] == "'" and value[1:].lstrip("'").startswith(FORMULA_PREFIXES):
+        return value[1:]
+    return value
+
+
+def _csv_header(with_messages):
+    header = [field.replace('__', '_') for field in TICKET_FIELDS]
+    if with_messages:
+        header += ['message_' + field.replace('__', '_') for field in MESSAGE_FIELDS]
+    return header
+
+
+def _csv_rows(ticket, messages):
+    values = [csv_escape(ticket[field]) for field in TICKET_FIELDS]
+    if messages is None:
+        yield values
+        return
+    # One row per message; a ticket without messages still gets one row.
+    empty = True
+    for message in messages:
+        empty = False
+        yield values + [csv_escape(message[field]) for field in MESSAGE_FIELDS]
+    if empty:
+        yield values + [''] * len(MESSAGE_FIELDS)
+
+
+def _jsonl_line(ticket):
+    return json.dumps(ticket, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def _threads(queryset, with_messages, chunk_size):
+    if with_messages:
+        return iter_threads(queryset, chunk_size)
+    return ((ticket, None) for chunk in iter_chunks(queryset, chunk_size) for ticket in chunk)
+
+
+def _drain(buffer):
+    value = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return value
+
+
+def stream(queryset, fmt='csv', with_messages=False, chunk_size=2000):
+    """
+    Serialize an export as the rows are read.
+
+    Output is handed on whenever about FLUSH_SIZE characters are ready, so
+    neither the rows of a chunk nor a long conversation pile up in memory.
+
+    Args:
+        queryset: Tickets to export
+        fmt: csv (one row per ticket, or per message with with_messages) or
+             jsonl (one ticket object per line, messages nested)
+        with_messages: Include the messages of every ticket
+        chunk_size: Tickets, and messages, per query
+
+    Yields:
+        str: The header, then the serialized rows
+    """
+    buffer = io.StringIO()
+    if fmt == 'jsonl':
+        for ticket, messages in _threads(queryset, with_messages, chunk_size):
+            if messages is not None:
+                ticket['messages'] = [
+                    {field: message[field] for field in MESSAGE_FIELDS} for message in messages]
+            buffer.write(_jsonl_line(ticket))
+            if buffer.tell() >= FLUSH_SIZE:
+                yield _drain(buffer)
+    else:
+        writer = csv.writer(buffer)
+        writer.writerow(_csv_header(with_messages))
+        for ticket, messages in _threads(queryset, with_messages, chunk_size):
+            for row in _csv_rows(ticket, messages):
+                writer.writerow(row)
+                if buffer.tell() >= FLUSH_SIZE:
+                    yield _drain(buffer)
+    if buffer.tell():
+        yield _drain(buffer)
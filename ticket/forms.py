@@ -1,9 +1,56 @@
+from datetime import timedelta
+
 from django import forms
+from django.utils import timezone
+
+from ticket import export, metrics, uploads
+from ticket.models import STARTS_CHOICES, Ticket, Messages, ChunkedUpload
 
-from ticket.models import Ticket, Messages
 
+class ChunkedUploadFormMixin(forms.Form):
+    """
+    Form mixin accepting a completed chunked upload in place of the file field.
+
+    The hidden upload field carries the id returned by UploadStartView. When
+    it is set, clean() opens the assembled file as the file field value;
+    call discard_upload() once the instance has been saved.
 
-class CreateTicketForm(forms.ModelForm):
+    Args:
+        user: Owner the upload must belong to
+    """
+    upload = forms.UUIDField(required=False, widget=forms.HiddenInput)
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+
+    def clean_upload(self):
+        upload_id = self.cleaned_data['upload']
+        if not upload_id:
+            return None
+        upload = ChunkedUpload.objects.filter(id=upload_id, user=self.user).first()
+        if upload is None or not upload.is_complete:
+            raise forms.ValidationError('The upload is missing or incomplete.')
+        return upload
+
+    def clean(self):
+        cleaned_data = super().clean()
+        upload = cleaned_data.get('upload')
+        posted = self.files.get(self.add_prefix('file'))
+        if posted:
+            metrics.upload_received('form', posted.size)
+        if upload and not cleaned_data.get('file'):
+            cleaned_data['file'] = uploads.open_completed(upload)
+        return cleaned_data
+
+    def discard_upload(self):
+        upload = self.cleaned_data.get('upload')
+        if upload:
+            self.cleaned_data['file'].close()
+            uploads.discard(upload)
+
+
+class CreateTicketForm(ChunkedUploadFormMixin, forms.ModelForm):
     """
     Form for creating a new support ticket.
 
@@ -11,6 +58,7 @@ class CreateTicketForm(forms.ModelForm):
     - subject: Brief description of the ticket issue
     - description: Detailed explanation of the problem
     - file: Optional attachment for additional information
+    - upload: Optional completed chunked upload used as the attachment
 
     All fields have Bootstrap styling applied via form widgets,
     with appropriate placeholders to guide user input.
@@ -28,13 +76,14 @@ class CreateTicketForm(forms.ModelForm):
         }
 
 
-class MessageForm(forms.ModelForm):
+class MessageForm(ChunkedUploadFormMixin, forms.ModelForm):
     """
     Form for adding messages to an existing ticket.
 
     This ModelForm is tied to the Messages model and collects the following information:
     - content: The message text from the user or staff member
     - file: Optional attachment to provide additional context
+    - upload: Optional completed chunked upload used as the attachment
 
     All fields have Bootstrap styling applied via form widgets,
     with appropriate placeholders to guide user input.
@@ -49,3 +98,63 @@ class MessageForm(forms.ModelForm):
                 attrs={'class': 'form-control', 'placeholder': 'Describe your issue in detail'}),
             'file': forms.FileInput(attrs={'class': 'form-control'}),
         }
+
+
+class BulkStatusForm(forms.Form):
+    """
+    Form selecting the tickets of a bulk status change and their new status.
+
+    Every filter is optional:
+    - status: Only tickets currently in this status
+    - older_than_days: Only tickets not updated for at least this many days
+    - user: Only tickets of the user with this username
+    """
+    to_status = forms.ChoiceField(choices=STARTS_CHOICES)
+    status = forms.ChoiceField(choices=[('', 'Any status')] + STARTS_CHOICES, required=False)
+    older_than_days = forms.IntegerField(min_value=0, required=False)
+    user = forms.CharField(max_length=150, required=False)
+
+    def get_queryset(self):
+        """
+        Build the ticket selection from the cleaned filters.
+
+        Returns:
+            QuerySet: Tickets matching every given filter
+        """
+        data = self.cleaned_data
+        queryset = Ticket.objects.all()
+        if data['status']:
+            queryset = queryset.filter(status=data['status'])
+        if data['older_than_days'] is not None:
+            queryset = queryset.filter(updated_at__lt=timezone.now() - timedelta(days=data['older_than_days']))
+        if data['user']:
+            queryset = queryset.filter(user__username=data['user'])
+        return queryset
+
+
+class TicketExportForm(forms.Form):
+    """
+    Form with the filters and format of a ticket export.
+
+    Every filter is optional; the date range is inclusive and in local time.
+    """
+    format = forms.ChoiceField(choices=[('csv', 'CSV'), ('jsonl', 'JSON Lines')], required=False)
+    messages = forms.BooleanField(required=False)
+    status = forms.ChoiceField(choices=[('', 'Any status')] + STARTS_CHOICES, required=False)
+    user = forms.CharField(max_length=150, required=False)
+    created_after = forms.DateField(required=False)
+    created_before = forms.DateField(required=False)
+
+    def clean_format(self):
+        return self.cleaned_data['format'] or 'csv'
+
+    def get_queryset(self):
+        """
+        Build the ticket selection from the cleaned filters.
+
+        Returns:
+            QuerySet: Tickets matching every given filter
+        """
+        data = self.cleaned_data
+        return export.filter_tickets(status=data['status'], username=data['user'],
+                                     created_after=data['created_after'], created_before=data['created_before'])
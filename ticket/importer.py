@@ -0,0 +1,239 @@
+import csv
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager
+from itertools import groupby, islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import counters, thread_meta
+from .export import csv_unescape
+from .models import STARTS_CHOICES, ImportCheckpoint, Messages, Ticket, TicketEvent
+
+STATUSES = {value for value, _ in STARTS_CHOICES}
+TRUE_VALUES = {'1', 'true', 'yes', 'on'}
+
+
+class ImportRecordError(ValueError):
+    """
+    Raised for an input record that cannot be imported.
+
+    Args:
+        number: 1-based position of the record in the source
+        message: What is wrong with it
+    """
+
+    def __init__(self, number, message):
+        super().__init__(f'Record {number}: {message}')
+        self.number = number
+
+
+def _first(row, *keys):
+    for key in keys:
+        if row.get(key) not in (None, ''):
+            return row[key]
+    return None
+
+
+def _datetime(value, number, default=None):
+    if value in (None, ''):
+        return default
+    parsed = parse_datetime(str(value))
+    if parsed is None:
+        raise ImportRecordError(number, f'invalid datetime {value!r}')
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+def _flag(value):
+    return value if isinstance(value, bool) else str(value or '').lower() in TRUE_VALUES
+
+
+def read_jsonl(stream):
+    """
+    Read ticket records from JSON Lines, one ticket object per line.
+
+    The keys written by the JSON Lines export are accepted as they are.
+    """
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_csv(stream):
+    """
+    Read ticket records from CSV.
+
+    Consecutive rows with the same id column are one ticket; their message_
+    columns become its messages, as written by the CSV export. Without an id
+    column every row is a ticket of its own. Values escaped against formula
+    injection by the export are restored.
+    """
+    rows = ({key: csv_unescape(value) for key, value in row.items()} for row in csv.DictReader(stream))
+    for _, group in groupby(enumerate(rows), key=lambda item: item[1].get('id') or item[0]):
+        group = [row for _, row in group]
+        record = dict(group[0])
+        record['messages'] = [
+            {key[len('message_'):]: value for key, value in row.items() if key.startswith('message_')}
+            for row in group if row.get('message_content')
+        ]
+        yield record
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+
+
+def _normalize(record, number):
+    """
+    Validate a raw record and bring it to the shape used by the import.
+    """
+    subject, username = _first(record, 'subject'), _first(record, 'user', 'user__username', 'user_username')
+    if not subject or not username:
+        raise ImportRecordError(number, 'subject and user are required')
+    status = _first(record, 'status') or 'Open'
+    if status not in STATUSES:
+        raise ImportRecordError(number, f'unknown status {status!r}')
+    created_at = _datetime(record.get('created_at'), number, timezone.now())
+    messages = []
+    for message in record.get('messages') or ():
+        sent_at = _datetime(message.get('created_at'), number, created_at)
+        messages.append({
+            'sender': _first(message, 'sender', 'sender__username', 'sender_username') or username,
+            'content': message.get('content') or '',
+            'is_admin_response': _flag(message.get('is_admin_response')),
+            'created_at': sent_at,
+        })
+    return {
+        'subject': subject,
+        'description': _first(record, 'description') or '',
+        'status': status,
+        'user': username,
+        'email': _first(record, 'email', 'user_email') or '',
+        'created_at': created_at,
+        'updated_at': _datetime(record.get('updated_at'), number, created_at),
+        'messages': messages,
+    }
+
+
+@contextmanager
+def preserved_timestamps(*models):
+    """
+    Let created_at and updated_at values set on instances reach the database.
+
+    auto_now_add and auto_now would overwrite them in bulk_create; they are
+    switched off on the model fields for the duration of the block. The
+    switch is process-wide, so this is meant for management commands only.
+    """
+    fields = [model._meta.get_field(name) for model in models for name in ('created_at', 'updated_at')]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def resolve_users(names):
+    """
+    Map usernames to user ids, creating the missing users in one batch.
+
+    New users get an unusable password. Users created concurrently are
+    picked up by the second lookup instead of failing the insert.
+
+    Args:
+        names: Dict of username to email for new users
+
+    Returns:
+        dict: Username to user id
+    """
+    found = dict(User.objects.filter(username__in=list(names)).values_list('username', 'pk'))
+    missing = [name for name in names if name not in found]
+    if missing:
+        User.objects.bulk_create([User(username=name, email=names[name], password=make_password(None))
+                                  for name in missing], ignore_conflicts=True)
+        found.update(User.objects.filter(username__in=missing).values_list('username', 'pk'))
+    return found
+
+
+def _import_batch(records):
+    names = {}
+    for record in records:
+        names.setdefault(record['user'], record['email'])
+        for message in record['messages']:
+            names.setdefault(message['sender'], '')
+    users = resolve_users(names)
+
+    tickets = Ticket.objects.bulk_create([Ticket(
+        subject=record['subject'], description=record['description'], status=record['status'],
+        user_id=users[record['user']], created_at=record['created_at'], updated_at=record['updated_at'],
+    ) for record in records])
+    messages = Messages.objects.bulk_create([Messages(
+        ticket_id=ticket.pk, sender_id=users[message['sender']], content=message['content'],
+        is_admin_response=message['is_admin_response'], created_at=message['created_at'],
+        updated_at=message['created_at'],
+    ) for ticket, record in zip(tickets, records) for message in record['messages']])
+
+    # bulk_create sends no signals: fill what the signal handlers maintain.
+    thread_meta.refresh(Ticket.objects.filter(pk__in=[ticket.pk for ticket in tickets]))
+    counters.apply_deltas(Counter((ticket.status, ticket.user_id) for ticket in tickets))
+    TicketEvent.objects.bulk_create([
+        TicketEvent(ticket_id=ticket.pk, kind=TicketEvent.CREATED, actor_id=ticket.user_id,
+                    new_status=ticket.status, created_at=ticket.created_at)
+        for ticket in tickets
+    ] + [
+        TicketEvent(ticket_id=message.ticket_id, actor_id=message.sender_id, created_at=message.created_at,
+                    kind=TicketEvent.ADMIN_REPLIED if message.is_admin_response else TicketEvent.MESSAGE_ADDED)
+        for message in messages
+    ])
+    return len(tickets), len(messages)
+
+
+def import_tickets(records, source, batch_size=1000, resume=False, progress=None):
+    """
+    Import ticket records with batched inserts in one transaction per batch.
+
+    Users are resolved or created per batch, tickets and messages are
+    inserted with bulk_create keeping their original timestamps, and the
+    thread metadata, counters and event log are filled in the same
+    transaction. The ImportCheckpoint of source is advanced in that
+    transaction too, so with resume=True an interrupted import continues
+    right after the last committed batch. The full-text index is kept up to
+    date by its database triggers.
+
+    Args:
+        records: Iterable of raw ticket dicts, e.g. from read_jsonl or read_csv
+        source: Name identifying the input, used for the checkpoint
+        batch_size: Tickets per transaction
+        resume: Skip the records already committed for source
+        progress: Optional callable receiving a stats dict after every batch
+
+    Returns:
+        dict: records (total committed for source), tickets, messages,
+              elapsed seconds and rows_per_second of this run
+    """
+    checkpoint, _ = ImportCheckpoint.objects.get_or_create(source=source)
+    done = checkpoint.records if resume else 0
+    stats = {'records': done, 'tickets': 0, 'messages': 0, 'elapsed': 0.0, 'rows_per_second': 0.0}
+    started = time.perf_counter()
+    records = islice(records, done, None)
+    with preserved_timestamps(Ticket, Messages):
+        while batch := list(islice(records, batch_size)):
+            batch = [_normalize(record, done + offset + 1) for offset, record in enumerate(batch)]
+            with transaction.atomic():
+                tickets, messages = _import_batch(batch)
+                done += len(batch)
+                ImportCheckpoint.objects.filter(pk=checkpoint.pk).update(records=done, updated_at=timezone.now())
+            stats['records'] = done
+            stats['tickets'] += tickets
+            stats['messages'] += messages
+            stats['elapsed'] = time.perf_counter() - started
+            stats['rows_per_second'] = (stats['tickets'] + stats['messages']) / (stats['elapsed'] or 1e-9)
+            if progress:
+                progress(dict(stats))
+    return stats
@@ -0,0 +1,138 @@
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.template.loader import render_to_string
+
+from .models import Messages
+from .pubsub import get_broker, ticket_channel
+
+# Event streams currently open in this process; all of them run on its event
+# loop, so the count needs no lock.
+_open_streams = 0
+
+
+def publish_message(message):
+    """
+    Push a new message to the ticket's live subscribers once the transaction commits.
+
+    The message fragment is rendered once here rather than once per subscriber.
+
+    Args:
+        message: The saved Messages instance
+    """
+    def publish():
+        html = render_to_string('ticket/message-list.html', {'thread': [message]})
+        get_broker().publish(ticket_channel(message.ticket_id),
+                             {'event': 'message', 'id': message.id, 'data': {'html': html}})
+
+    transaction.on_commit(publish)
+
+
+def publish_status(ticket_id, status):
+    """
+    Push a status change to the ticket's live subscribers once the transaction commits.
+
+    Args:
+        ticket_id: Primary key of the ticket
+        status: The new status
+    """
+    transaction.on_commit(lambda: get_broker().publish(
+        ticket_channel(ticket_id), {'event': 'status', 'data': {'status': status}}))
+
+
+def format_event(event):
+    """
+    Serialize an event in the text/event-stream format.
+
+    Args:
+        event: Dict with event, data and an optional id
+
+    Returns:
+        str: One server-sent event
+    """
+    lines = []
+    if event.get('id') is not None:
+        lines.append(f'id: {event["id"]}')
+    lines.append(f'event: {event["event"]}')
+    lines.append(f'data: {json.dumps(event["data"])}')
+    return '\n'.join(lines) + '\n\n'
+
+
+async def missed_message_events(ticket_id, last_id):
+    """
+    Build the events for messages created after last_id, oldest first.
+    """
+    rows = Messages.objects.filter(ticket_id=ticket_id, id__gt=last_id).order_by('id')
+    return [{'event': 'message', 'id': message.id,
+             'data': {'html': render_to_string('ticket/message-list.html', {'thread': [message]})}}
+            async for message in rows]
+
+
+def open_streams():
+    """
+    Return the number of event streams open in this process.
+    """
+    return _open_streams
+
+
+def close_connection():
+    """
+    Close the database connection of the calling thread.
+    """
+    connection.close()
+
+
+async def stream(ticket_id, last_id):
+    """
+    Yield the live events of a ticket as server-sent events.
+
+    The subscription is opened before the catch-up query, so nothing published
+    in between is lost; events already sent are skipped by id. A comment line
+    is sent every TICKET_EVENTS_HEARTBEAT seconds to keep proxies from closing
+    the connection, and the stream ends after TICKET_EVENTS_MAX_AGE seconds
+    (or when the subscriber overflows) so the browser reconnects with
+    Last-Event-ID.
+
+    Authentication and the catch-up query run in the request's sync thread,
+    which would keep its database connection open until the stream ends.
+    That connection is closed once the catch-up is sent, so waiting streams
+    hold a queue, this generator and an idle thread, but no connection.
+    Open streams are counted for the TICKET_EVENTS_MAX_STREAMS limit.
+
+    Args:
+        ticket_id: Primary key of the ticket
+        last_id: Id of the newest message the client already has, or None
+                 to send only events published from now on
+
+    Yields:
+        str: Event stream chunks
+    """
+    global _open_streams
+    _open_streams += 1
+    try:
+        deadline = time.monotonic() + settings.TICKET_EVENTS_MAX_AGE
+        async with get_broker().subscribe(ticket_channel(ticket_id)) as subscription:
+            yield f'retry: {settings.TICKET_EVENTS_RETRY_MS}\n\n'
+            if last_id is not None:
+                for event in await missed_message_events(ticket_id, last_id):
+                    last_id = event['id']
+                    yield format_event(event)
+            await sync_to_async(close_connection)()
+            while not subscription.overflowed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                event = await subscription.get(min(settings.TICKET_EVENTS_HEARTBEAT, remaining))
+                if event is None:
+                    yield ': keep-alive\n\n'
+                    continue
+                if event.get('id') is not None:
+                    if last_id is not None and event['id'] <= last_id:
+                        continue
+                    last_id = event['id']
+                yield format_event(event)
+    finally:
+        _open_streams -= 1
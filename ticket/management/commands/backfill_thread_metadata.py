@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from ticket import thread_meta
+
+
+class Command(BaseCommand):
+    help = 'Recompute message_count, last_message_at and last_message_is_admin of every ticket.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Tickets updated per statement.')
+
+    def handle(self, *args, **options):
+        total = thread_meta.backfill(options['batch_size'], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f'Backfilled thread metadata of {total} ticket(s).'))
@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from ticket import uploads
+
+
+class Command(BaseCommand):
+    help = 'Remove chunked uploads that were abandoned before completion.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, default=None,
+                            help='Age after which an untouched upload is removed (default TICKET_UPLOAD_EXPIRY).')
+
+    def handle(self, *args, **options):
+        max_age = timedelta(hours=options['hours']) if options['hours'] is not None else None
+        removed, orphans = uploads.cleanup(max_age)
+        self.stdout.write(self.style.SUCCESS(
+            f'Removed {removed} abandoned upload(s) and {orphans} orphaned temporary file(s).'))
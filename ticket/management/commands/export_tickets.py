@@ -0,0 +1,35 @@
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ticket import export
+from ticket.models import STARTS_CHOICES
+
+
+class Command(BaseCommand):
+    help = 'Stream tickets, optionally with their messages, as CSV or JSON Lines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(export.FORMATS), default='csv')
+        parser.add_argument('--messages', action='store_true', help='Include the messages of every ticket.')
+        parser.add_argument('--status', choices=[value for value, _ in STARTS_CHOICES])
+        parser.add_argument('--user', help='Only tickets of the user with this username.')
+        parser.add_argument('--created-after', type=date.fromisoformat, help='First creation date, YYYY-MM-DD.')
+        parser.add_argument('--created-before', type=date.fromisoformat, help='Last creation date, YYYY-MM-DD.')
+        parser.add_argument('--output', help='File to write to instead of standard output.')
+        parser.add_argument('--chunk-size', type=int, default=settings.TICKET_EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        queryset = export.filter_tickets(status=options['status'], username=options['user'],
+                                         created_after=options['created_after'],
+                                         created_before=options['created_before'])
+        chunks = export.stream(queryset, options['format'], options['messages'], options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(chunks)
+            self.stderr.write(self.style.SUCCESS(f'Exported to {options["output"]}.'))
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            self.stdout.flush()
@@ -0,0 +1,39 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ticket import importer
+
+
+class Command(BaseCommand):
+    help = 'Import tickets, their messages and owners from a JSON Lines or CSV file in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import, in the format written by export_tickets.')
+        parser.add_argument('--format', choices=sorted(importer.READERS),
+                            help='Input format; guessed from the file extension by default.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Tickets per transaction.')
+        parser.add_argument('--source', help='Checkpoint name; defaults to the absolute path of the file.')
+        parser.add_argument('--resume', action='store_true',
+                            help='Skip the records committed by a previous run of the same source.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if fmt not in importer.READERS:
+            raise CommandError(f'Cannot tell the format of {path}; pass --format.')
+        source = options['source'] or os.path.abspath(path)
+
+        def report(stats):
+            self.stdout.write(f'{stats["records"]} record(s) committed: {stats["tickets"]} ticket(s), '
+                              f'{stats["messages"]} message(s), {stats["rows_per_second"]:.0f} rows/s')
+
+        with open(path, encoding='utf-8', newline='') as stream:
+            try:
+                stats = importer.import_tickets(importer.READERS[fmt](stream), source, options['batch_size'],
+                                                options['resume'], progress=report)
+            except importer.ImportRecordError as error:
+                raise CommandError(f'{error}; rerun with --resume to continue after the last committed batch.')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {stats["tickets"]} ticket(s) and {stats["messages"]} message(s) in {stats["elapsed"]:.1f}s '
+            f'({stats["rows_per_second"]:.0f} rows/s).'))
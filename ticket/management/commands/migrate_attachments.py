@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ticket import blobs
+from ticket.models import Ticket, Messages
+from ticket.storage import BLOB_PREFIX, attachment_storage
+
+
+class Command(BaseCommand):
+    help = 'Move attachments uploaded before deduplication into the content-addressed blob store.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows loaded per query.')
+        parser.add_argument('--dry-run', action='store_true', help='Only list the attachments to migrate.')
+
+    def handle(self, *args, **options):
+        migrated, missing, migrated_bytes = 0, 0, 0
+        blob_sizes = {}
+        for model in (Ticket, Messages):
+            rows = model.objects.exclude(file='').exclude(file__isnull=True).exclude(
+                file__startswith=f'{BLOB_PREFIX}/').only('id', 'file').order_by('id')
+            last_id = 0
+            while True:
+                batch = list(rows.filter(id__gt=last_id)[:options['batch_size']])
+                if not batch:
+                    break
+                last_id = batch[-1].id
+                for row in batch:
+                    old_name = row.file.name
+                    if not attachment_storage.exists(old_name):
+                        missing += 1
+                        self.stderr.write(f'{model.__name__} {row.id}: {old_name} is missing, skipped')
+                        continue
+                    size = attachment_storage.size(old_name)
+                    if options['dry_run']:
+                        self.stdout.write(f'{model.__name__} {row.id}: {old_name} ({size} bytes)')
+                    else:
+                        new_name = self.migrate_row(model, row, old_name)
+                        blob_sizes[new_name] = size
+                        self.stdout.write(f'{model.__name__} {row.id}: {old_name} -> {new_name}')
+                    migrated += 1
+                    migrated_bytes += size
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Would migrate {migrated} attachment(s) ({migrated_bytes} bytes), {missing} missing.'))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Migrated {migrated} attachment(s) ({migrated_bytes} bytes) into {len(blob_sizes)} blob(s) '
+            f'({sum(blob_sizes.values())} bytes), {missing} missing.'))
+
+    def migrate_row(self, model, row, old_name):
+        """
+        Copy one attachment into the blob store, repoint the row and remove the old file.
+
+        Returns:
+            str: Name of the blob now referenced by the row
+        """
+        with attachment_storage.open(old_name) as old_file:
+            new_name = attachment_storage.save(old_name, old_file)
+        with transaction.atomic():
+            if model.objects.filter(pk=row.pk, file=old_name).update(file=new_name):
+                blobs.acquire(new_name)
+        if not (Ticket.objects.filter(file=old_name).exists() or Messages.objects.filter(file=old_name).exists()):
+            attachment_storage.delete(old_name)
+        return new_name
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ticket import search
+
+
+class Command(BaseCommand):
+    help = 'Reindex the subject, description and message content of every ticket.'
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError('The full-text index is only available on SQLite with FTS5; run migrate first.')
+        totals = search.rebuild_index()
+        for index, total in totals.items():
+            self.stdout.write(self.style.SUCCESS(f'{index}: {total} rows indexed.'))
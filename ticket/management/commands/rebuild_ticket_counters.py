@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from ticket import counters
+
+
+class Command(BaseCommand):
+    help = 'Recount tickets per status and user, overwrite the counters table and report any drift.'
+
+    def handle(self, *args, **options):
+        drift = counters.rebuild()
+        for status, user_id, stored, actual in drift:
+            owner = f'user {user_id}' if user_id else 'all users'
+            self.stdout.write(f'{status} ({owner}): stored {stored}, actual {actual}')
+        if drift:
+            self.stdout.write(self.style.WARNING(f'Fixed {len(drift)} drifted counter(s).'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Counters are in sync.'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from ticket import rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily ticket statistics of the days with events logged since the last run.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Ignore the watermark and recompute every day with logged events.')
+
+    def handle(self, *args, **options):
+        days = rollups.rollup(full=options['full'])
+        for day in days:
+            self.stdout.write(f'Recomputed {day.isoformat()}')
+        self.stdout.write(self.style.SUCCESS(f'Recomputed {len(days)} day(s).'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ticket import thread_cache
+from ticket.checks import cache_is_shared
+
+
+class Command(BaseCommand):
+    help = 'Show the hit and miss counters of the rendered ticket thread cache, over every worker process.'
+
+    def handle(self, *args, **options):
+        if not cache_is_shared():
+            raise CommandError('The counters of each worker stay in its own process with a process-local '
+                               'default cache; configure a shared cache backend.')
+        stats = thread_cache.stats()
+        ratio = f'{stats["hit_ratio"]:.1%}' if stats['hit_ratio'] is not None else 'n/a'
+        self.stdout.write(f'Hits: {stats["hits"]}, misses: {stats["misses"]}, hit ratio: {ratio}')
@@ -0,0 +1,361 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import STARTS_CHOICES, Ticket, TicketCounter
+
+LEASE_KEY = 'ticket-metrics:lease:{}'
+PROCESS_KEY = 'ticket-metrics:process:{}'
+TOTAL_KEY = 'ticket-metrics:total'
+FOLD_LOCK_KEY = 'ticket-metrics:fold-lock'
+GAUGES_KEY = 'ticket-metrics:gauges'
+
+logger = logging.getLogger(__name__)
+
+# Name, type and help text of every metric family, in exposition order.
+FAMILIES = {
+    'ticket_http_requests_total': ('counter', 'Requests handled, by URL name, method and status code.'),
+    'ticket_http_request_duration_seconds': ('histogram', 'Request latency by URL name and method.'),
+    'ticket_db_queries_total': ('counter', 'Database queries executed, by URL name.'),
+    'ticket_db_query_duration_seconds_total': ('counter', 'Time spent executing database queries, by URL name.'),
+    'ticket_upload_bytes_total': ('counter', 'Attachment bytes received, by upload kind.'),
+    'ticket_thread_cache_requests_total': ('counter', 'Ticket thread cache lookups, by result.'),
+    'ticket_thread_cache_hit_ratio': ('gauge', 'Share of ticket thread cache lookups served from the cache.'),
+    'ticket_tickets': ('gauge', 'Tickets by status, from the ticket counters.'),
+    'ticket_oldest_ticket_age_seconds': ('gauge', 'Age of the oldest ticket in each status that is not closed.'),
+}
+
+# Queries of the request being handled, as a [count, seconds] list, or None.
+_queries = ContextVar('ticket_metrics_queries', default=None)
+
+
+class Registry:
+    """
+    Counters and histograms of this process, shared with the other workers through the cache.
+
+    Samples are summed in memory and the whole set is written to the cache
+    at most every TICKET_METRICS_FLUSH_INTERVAL seconds, so recording a
+    request costs no cache round trip. Each process writes to one of
+    TICKET_METRICS_MAX_PROCESSES slots, held by a lease that every flush
+    renews. A slot whose lease lapsed for TICKET_METRICS_PROCESS_TIMEOUT
+    seconds can be taken over; its last snapshot is first folded into the
+    retired total, so the sums Prometheus sees never go down and a scrape
+    reads a bounded number of keys.
+    """
+
+    def __init__(self):
+        self.samples = {}
+        self.written = {}
+        self.lock = threading.Lock()
+        self.slot = None
+        self.owner = None
+        self.pid = None
+        self.flushed = 0.0
+
+    def inc(self, name, labels=(), amount=1):
+        key = (name, tuple(labels))
+        with self.lock:
+            self.samples[key] = self.samples.get(key, 0) + amount
+
+    def observe(self, name, labels, value, buckets):
+        """
+        Add one value to a histogram, given as the cumulative le buckets plus sum and count.
+        """
+        labels = tuple(labels)
+        with self.lock:
+            for bound in [bound for bound in buckets if value <= bound] + ['+Inf']:
+                key = (f'{name}_bucket', labels + (('le', str(bound)),))
+                self.samples[key] = self.samples.get(key, 0) + 1
+            for key, amount in (((f'{name}_sum', labels), value), ((f'{name}_count', labels), 1)):
+                self.samples[key] = self.samples.get(key, 0) + amount
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.samples)
+
+    def _forget_written(self):
+        # The snapshot last written is, or is about to be, part of the
+        # retired total; only what was recorded since moves to a new slot.
+        with self.lock:
+            for key, value in self.written.items():
+                self.samples[key] -= value
+        self.written, self.slot, self.owner = {}, None, None
+
+    def _claim(self):
+        owner = uuid.uuid4().hex
+        for slot in range(1, settings.TICKET_METRICS_MAX_PROCESSES + 1):
+            if cache.add(LEASE_KEY.format(slot), owner, settings.TICKET_METRICS_PROCESS_TIMEOUT):
+                if retire(slot):
+                    return slot, owner
+                cache.delete(LEASE_KEY.format(slot))
+                return None
+        logger.warning('All %d metrics slots are taken; raise TICKET_METRICS_MAX_PROCESSES.',
+                       settings.TICKET_METRICS_MAX_PROCESSES)
+        return None
+
+    def _slot(self):
+        if self.pid != os.getpid():
+            if self.pid is not None:
+                # A forked worker must not write to the slot of its parent or
+                # report the samples its parent recorded before the fork.
+                with self.lock:
+                    self.samples = {}
+            self.written, self.slot, self.owner, self.pid = {}, None, None, os.getpid()
+        elif self.slot is not None:
+            lease = LEASE_KEY.format(self.slot)
+            if cache.get(lease) == self.owner:
+                cache.touch(lease, settings.TICKET_METRICS_PROCESS_TIMEOUT)
+            else:
+                self._forget_written()
+        if self.slot is None:
+            self.slot, self.owner = self._claim() or (None, None)
+        return self.slot
+
+    def due(self):
+        return time.monotonic() - self.flushed >= settings.TICKET_METRICS_FLUSH_INTERVAL
+
+    def flush(self, force=False):
+        """
+        Write the samples of this process to its cache slot when the flush interval has passed.
+        """
+        if not force and not self.due():
+            return
+        self.flushed = time.monotonic()
+        slot = self._slot()
+        if slot is None:
+            return
+        samples = self.snapshot()
+        cache.set(PROCESS_KEY.format(slot), {'owner': self.owner, 'samples': samples}, None)
+        self.written = samples
+
+
+def retire(slot):
+    """
+    Fold the last snapshot written to a slot into the retired total.
+
+    The total remembers the owner of every snapshot it absorbed, so the
+    snapshot stops being counted in the same write that adds it to the
+    total. Writers of the total take a short lock.
+
+    Args:
+        slot: Slot number, leased by the caller
+
+    Returns:
+        bool: Whether the slot is free to be written, False when the lock was busy
+    """
+    if not cache.add(FOLD_LOCK_KEY, 1, 10):
+        return False
+    try:
+        previous = cache.get(PROCESS_KEY.format(slot))
+        if previous is None:
+            return True
+        total = cache.get(TOTAL_KEY) or {'samples': {}, 'folded': {}}
+        if total['folded'].get(slot) != previous['owner']:
+            for key, value in previous['samples'].items():
+                total['samples'][key] = total['samples'].get(key, 0) + value
+            total['folded'][slot] = previous['owner']
+            cache.set(TOTAL_KEY, total, None)
+        return True
+    finally:
+        cache.delete(FOLD_LOCK_KEY)
+
+
+registry = Registry()
+
+
+def request_finished(view_name, method, status, duration, queries, query_time):
+    """
+    Record one handled request.
+
+    Args:
+        view_name: Resolved URL name
+        method: HTTP method
+        status: Response status code
+        duration: Latency in seconds
+        queries: Number of database queries
+        query_time: Seconds spent on them
+    """
+    registry.inc('ticket_http_requests_total', (('view', view_name), ('method', method), ('status', str(status))))
+    registry.observe('ticket_http_request_duration_seconds', (('view', view_name), ('method', method)), duration,
+                     settings.TICKET_METRICS_LATENCY_BUCKETS)
+    if queries:
+        registry.inc('ticket_db_queries_total', (('view', view_name),), queries)
+        registry.inc('ticket_db_query_duration_seconds_total', (('view', view_name),), query_time)
+
+
+def upload_received(kind, size):
+    """
+    Count received attachment bytes.
+
+    Args:
+        kind: form for files posted with a form, chunked for chunked uploads
+        size: Number of bytes
+    """
+    registry.inc('ticket_upload_bytes_total', (('kind', kind),), size)
+
+
+class counting_queries:
+    """
+    Count the queries run inside the block, in this thread or in threads started from it.
+
+    The result is available as queries and query_time once the block exits.
+    """
+
+    def __enter__(self):
+        self.totals = [0, 0.0]
+        self.token = _queries.set(self.totals)
+        return self
+
+    def __exit__(self, *exc_info):
+        _queries.reset(self.token)
+        self.queries, self.query_time = self.totals
+
+
+def _count_query(execute, sql, params, many, context):
+    totals = _queries.get()
+    if totals is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        totals[0] += 1
+        totals[1] += time.perf_counter() - started
+
+
+def install(connection):
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+@receiver(connection_created)
+def install_on_connect(sender, connection, **kwargs):
+    install(connection)
+
+
+def install_all():
+    for connection in connections.all(initialized_only=True):
+        install(connection)
+
+
+def _read_gauges():
+    counts = dict(TicketCounter.objects.filter(user=None).values_list('status', 'count'))
+    oldest = {}
+    for status, _ in STARTS_CHOICES:
+        if status != 'Closed':
+            # One seek on the (status, created_at) index.
+            oldest[status] = Ticket.objects.filter(status=status).order_by('created_at').values_list(
+                'created_at', flat=True).first()
+    return {'counts': counts, 'oldest': oldest}
+
+
+def gauges():
+    """
+    Read the ticket gauges from values cached for TICKET_METRICS_GAUGE_TIMEOUT seconds.
+
+    Ticket counts come from the site-wide rows of the counters table and the
+    oldest ticket of each status from one index seek, so a cache miss costs
+    three small queries however many tickets there are. Ages are computed at
+    read time from the cached creation times.
+
+    Returns:
+        dict: Samples keyed by (name, labels)
+    """
+    values = cache.get_or_set(GAUGES_KEY, _read_gauges, settings.TICKET_METRICS_GAUGE_TIMEOUT)
+    now = timezone.now()
+    samples = {}
+    for status, _ in STARTS_CHOICES:
+        samples[('ticket_tickets', (('status', status),))] = values['counts'].get(status, 0)
+        if status in values['oldest']:
+            oldest = values['oldest'][status]
+            samples[('ticket_oldest_ticket_age_seconds', (('status', status),))] = (
+                (now - oldest).total_seconds() if oldest else 0)
+    return samples
+
+
+def totals():
+    """
+    Add up the counters and histograms of every worker process, live or retired.
+
+    Returns:
+        dict: Samples keyed by (name, labels)
+    """
+    registry.flush(force=True)
+    keys = [PROCESS_KEY.format(slot) for slot in range(1, settings.TICKET_METRICS_MAX_PROCESSES + 1)]
+    stored = cache.get_many(keys + [TOTAL_KEY])
+    total = stored.pop(TOTAL_KEY, None) or {'samples': {}, 'folded': {}}
+    summed = dict(total['samples'])
+    for slot, key in enumerate(keys, 1):
+        snapshot = stored.get(key)
+        if snapshot is not None and total['folded'].get(slot) != snapshot['owner']:
+            for name, value in snapshot['samples'].items():
+                summed[name] = summed.get(name, 0) + value
+    return summed
+
+
+def collect():
+    """
+    Add up the samples of every worker process and add the derived and ticket gauges.
+
+    Returns:
+        dict: Samples keyed by (name, labels)
+    """
+    samples = totals()
+    hits, misses = (samples.get(('ticket_thread_cache_requests_total', (('result', result),)), 0)
+                    for result in ('hit', 'miss'))
+    if hits + misses:
+        samples[('ticket_thread_cache_hit_ratio', ())] = hits / (hits + misses)
+    samples.update(gauges())
+    return samples
+
+
+def _family(name):
+    for suffix in ('_bucket', '_sum', '_count'):
+        if name.endswith(suffix) and FAMILIES.get(name[:-len(suffix)], ('',))[0] == 'histogram':
+            return name[:-len(suffix)]
+    return name
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _sort_key(sample):
+    (name, labels), _ = sample
+    return name, [(key, float(value) if key == 'le' else 0, value) for key, value in labels]
+
+
+def exposition(samples):
+    """
+    Render samples in the Prometheus text exposition format.
+
+    Args:
+        samples: Dict of (name, labels) to value, as returned by collect()
+
+    Returns:
+        str: The exposition document
+    """
+    by_family = {}
+    for sample in sorted(samples.items(), key=_sort_key):
+        by_family.setdefault(_family(sample[0][0]), []).append(sample)
+    lines = []
+    for family, (kind, help_text) in FAMILIES.items():
+        lines += [f'# HELP {family} {help_text}', f'# TYPE {family} {kind}']
+        for (name, labels), value in by_family.get(family, ()):
+            rendered = ','.join(f'{key}="{_escape(label)}"' for key, label in labels)
+            lines.append(f'{name}{{{rendered}}} {_value(value)}' if rendered else f'{name} {_value(value)}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,132 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.functional import SimpleLazyObject
+
+from . import events, metrics, profiling, user_cache
+from .async_utils import aload_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+    AuthenticationMiddleware serving request.user from the shared cache.
+
+    The user stays lazy, so requests that never look at it do not touch the
+    cache either. Once cached, an authenticated request loads its user with
+    one cache read and no query until the user row changes; see
+    ticket.user_cache.
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: user_cache.get_user(request))
+
+
+class TicketEventMiddleware:
+    """
+    Attribute the ticket lifecycle events recorded during a request to the requesting user.
+
+    Works in both the sync and async middleware chains without a thread
+    switch. Must come after AuthenticationMiddleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with events.acting(request):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with events.acting(request):
+            return await self.get_response(request)
+
+
+class ProfilingMiddleware:
+    """
+    Profile a sample of requests: latency, queries and template rendering per URL name.
+
+    TICKET_PROFILING_SAMPLE_RATE of the requests are profiled; the others
+    only pay for one random number. Repeated queries and exceeded budgets of
+    a profiled request are logged (or raised, see TICKET_PROFILING_RAISE)
+    and the request_profiled signal is sent. The Server-Timing header
+    reveals query counts and timings, so it is only added for staff members
+    or with DEBUG on. Put it first to measure the whole middleware chain.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        profiling.install_all()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not profiling.sampled():
+            return self.get_response(request)
+        with profiling.profiling() as profile:
+            response = self.get_response(request)
+        profiling.finish(profile, request, response)
+        return response
+
+    async def __acall__(self, request):
+        if not profiling.sampled():
+            return await self.get_response(request)
+        with profiling.profiling() as profile:
+            response = await self.get_response(request)
+        if not settings.DEBUG and hasattr(request, 'user'):
+            await aload_user(request)
+        profiling.finish(profile, request, response)
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Record the latency and query count of every request for the metrics endpoint.
+
+    Samples are summed in process memory and written to the shared cache at
+    most every TICKET_METRICS_FLUSH_INTERVAL seconds; see ticket.metrics.
+    Put it first to measure the whole middleware chain.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        metrics.install_all()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with metrics.counting_queries() as counted:
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - started, counted)
+        metrics.registry.flush()
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with metrics.counting_queries() as counted:
+            response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - started, counted)
+        if metrics.registry.due():
+            await sync_to_async(metrics.registry.flush)()
+        return response
+
+    def record(self, request, response, duration, counted):
+        metrics.request_finished(profiling.view_name(request), request.method, response.status_code, duration,
+                                 counted.queries, counted.query_time)
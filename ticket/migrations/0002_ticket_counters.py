@@ -0,0 +1,58 @@
+# Generated by Django 4.2.20 on 2026-10-17 20:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_counters(apps, schema_editor):
+    Ticket = apps.get_model('ticket', 'Ticket')
+    TicketCounter = apps.get_model('ticket', 'TicketCounter')
+    totals = {}
+    rows = Ticket.objects.order_by().values_list('status', 'user_id').annotate(total=models.Count('id'))
+    for status, user_id, total in rows:
+        TicketCounter.objects.create(status=status, user_id=user_id, count=total)
+        totals[status] = totals.get(status, 0) + total
+    for status, total in totals.items():
+        TicketCounter.objects.create(status=status, user=None, count=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('ticket', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('Open', 'Open'), ('In Progress', 'In Progress'), ('Closed', 'Closed')], max_length=50)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['created_at'], name='ticket_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['updated_at'], name='ticket_updated_at_idx'),
+        ),
+        migrations.AddField(
+            model_name='ticketcounter',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ticket_counters', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='ticketcounter',
+            constraint=models.UniqueConstraint(fields=('status', 'user'), name='unique_ticket_counter_per_user'),
+        ),
+        migrations.AddConstraint(
+            model_name='ticketcounter',
+            constraint=models.UniqueConstraint(condition=models.Q(('user__isnull', True)), fields=('status',), name='unique_ticket_counter_global'),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
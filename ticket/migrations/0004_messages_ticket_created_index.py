@@ -0,0 +1,17 @@
+# Generated by Django 4.2.20 on 2026-10-17 20:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0003_ticket_status_created_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='messages',
+            index=models.Index(fields=['ticket', '-created_at', '-id'], name='messages_ticket_created_idx'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+from django.db import migrations
+
+TICKET_INDEX = 'ticket_ticket_fts'
+MESSAGE_INDEX = 'ticket_messages_fts'
+
+CREATE_INDEX_SQL = [
+    f"""CREATE VIRTUAL TABLE {TICKET_INDEX} USING fts5(
+        subject, description, content='ticket_ticket', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER {TICKET_INDEX}_ai AFTER INSERT ON ticket_ticket BEGIN
+        INSERT INTO {TICKET_INDEX}(rowid, subject, description) VALUES (new.id, new.subject, new.description);
+    END""",
+    f"""CREATE TRIGGER {TICKET_INDEX}_ad AFTER DELETE ON ticket_ticket BEGIN
+        INSERT INTO {TICKET_INDEX}({TICKET_INDEX}, rowid, subject, description)
+        VALUES ('delete', old.id, old.subject, old.description);
+    END""",
+    f"""CREATE TRIGGER {TICKET_INDEX}_au AFTER UPDATE OF subject, description ON ticket_ticket
+    WHEN old.subject IS NOT new.subject OR old.description IS NOT new.description BEGIN
+        INSERT INTO {TICKET_INDEX}({TICKET_INDEX}, rowid, subject, description)
+        VALUES ('delete', old.id, old.subject, old.description);
+        INSERT INTO {TICKET_INDEX}(rowid, subject, description) VALUES (new.id, new.subject, new.description);
+    END""",
+    f"""CREATE VIRTUAL TABLE {MESSAGE_INDEX} USING fts5(
+        content, content='ticket_messages', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER {MESSAGE_INDEX}_ai AFTER INSERT ON ticket_messages BEGIN
+        INSERT INTO {MESSAGE_INDEX}(rowid, content) VALUES (new.id, new.content);
+    END""",
+    f"""CREATE TRIGGER {MESSAGE_INDEX}_ad AFTER DELETE ON ticket_messages BEGIN
+        INSERT INTO {MESSAGE_INDEX}({MESSAGE_INDEX}, rowid, content) VALUES ('delete', old.id, old.content);
+    END""",
+    f"""CREATE TRIGGER {MESSAGE_INDEX}_au AFTER UPDATE OF content ON ticket_messages
+    WHEN old.content IS NOT new.content BEGIN
+        INSERT INTO {MESSAGE_INDEX}({MESSAGE_INDEX}, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO {MESSAGE_INDEX}(rowid, content) VALUES (new.id, new.content);
+    END""",
+]
+
+DROP_INDEX_SQL = [
+    f'DROP TRIGGER IF EXISTS {MESSAGE_INDEX}_au',
+    f'DROP TRIGGER IF EXISTS {MESSAGE_INDEX}_ad',
+    f'DROP TRIGGER IF EXISTS {MESSAGE_INDEX}_ai',
+    f'DROP TABLE IF EXISTS {MESSAGE_INDEX}',
+    f'DROP TRIGGER IF EXISTS {TICKET_INDEX}_au',
+    f'DROP TRIGGER IF EXISTS {TICKET_INDEX}_ad',
+    f'DROP TRIGGER IF EXISTS {TICKET_INDEX}_ai',
+    f'DROP TABLE IF EXISTS {TICKET_INDEX}',
+]
+
+
+def fts5_supported(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pragma_module_list WHERE name = 'fts5'")
+        return cursor.fetchone() is not None
+
+
+def create_search_index(apps, schema_editor):
+    if not fts5_supported(schema_editor.connection):
+        return
+    for statement in CREATE_INDEX_SQL:
+        schema_editor.execute(statement)
+    for index in (TICKET_INDEX, MESSAGE_INDEX):
+        schema_editor.execute(f"INSERT INTO {index}({index}) VALUES ('rebuild')")
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP_INDEX_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0004_messages_ticket_created_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
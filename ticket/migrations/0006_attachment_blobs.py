@@ -0,0 +1,35 @@
+# Generated by Django 4.2.20 on 2026-10-17 20:35
+
+from django.db import migrations, models
+import ticket.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0005_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('digest', models.CharField(db_index=True, max_length=64)),
+                ('size', models.BigIntegerField()),
+                ('ref_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='messages',
+            name='file',
+            field=models.FileField(blank=True, null=True, storage=ticket.storage.ContentAddressedStorage(), upload_to='tickets/%Y/%m/%d'),
+        ),
+        migrations.AlterField(
+            model_name='ticket',
+            name='file',
+            field=models.FileField(blank=True, null=True, storage=ticket.storage.ContentAddressedStorage(), upload_to='tickets/%Y/%m/%d'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.20 on 2026-10-17 21:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0012_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='messages',
+            name='filename',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='filename',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+    ]
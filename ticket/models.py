@@ -1,6 +1,12 @@
+import uuid
+
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models import Count, Q
 from django.urls import reverse
+from django.utils import timezone
+
+from .storage import attachment_storage
 
 
 # Create your models here.
@@ -21,16 +27,86 @@ STARTS_CHOICES = [
 ]
 
 
+class TicketQuerySet(models.QuerySet):
+
+    def for_status_list(self, status):
+        """
+        Tickets with the given status, loading only the columns the staff lists display.
+
+        Args:
+            status: One of the STARTS_CHOICES values
+
+        Returns:
+            QuerySet: Tickets with their owner's username joined in
+        """
+        return self.filter(status=status).select_related('user').only(
+            'id', 'subject', 'created_at', 'user__username')
+
+    def today_stats(self):
+        """
+        Count tickets created and closed since local midnight in one aggregate query.
+
+        Only rows touched today are scanned thanks to the created_at and
+        updated_at indexes.
+
+        Returns:
+            dict: Plain integer counts keyed by created_today and closed_today
+        """
+        queryset, aggregates = self._today_query()
+        return queryset.aggregate(**aggregates)
+
+    async def atoday_stats(self):
+        """
+        Async version of today_stats using the async ORM.
+        """
+        queryset, aggregates = self._today_query()
+        return await queryset.aaggregate(**aggregates)
+
+    def _today_query(self):
+        today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        return self.filter(Q(created_at__gte=today) | Q(updated_at__gte=today)), {
+            'created_today': Count('id', filter=Q(created_at__gte=today)),
+            'closed_today': Count('id', filter=Q(status='Closed', updated_at__gte=today)),
+        }
+
+
 class Ticket(TimeStampedModel):
     subject = models.CharField(max_length=200)
     description = models.TextField()
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='user_ticket')
-    file = models.FileField(upload_to='tickets/%Y/%m/%d', null=True, blank=True)
+    file = models.FileField(upload_to='tickets/%Y/%m/%d', storage=attachment_storage, null=True, blank=True)
+    # Name the attachment was uploaded under; the stored name is its digest.
+    filename = models.CharField(max_length=255, blank=True, editable=False)
     status = models.CharField(max_length=50, choices=STARTS_CHOICES, default='Open')
+    # Thread metadata maintained by ticket.thread_meta; backfilled with the
+    # backfill_thread_metadata command.
+    message_count = models.PositiveIntegerField(default=0, editable=False)
+    last_message_at = models.DateTimeField(null=True, blank=True, editable=False)
+    last_message_is_admin = models.BooleanField(default=False, editable=False)
+    # Start of the customer's wait for a staff reply, empty once staff has
+    # answered; orders the staff work queue (ticket.work_queue).
+    waiting_since = models.DateTimeField(null=True, blank=True, default=timezone.now, editable=False)
+    claimed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+                                   related_name='claimed_tickets')
+    claimed_until = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = TicketQuerySet.as_manager()
 
     def __str__(self):
         return f'{self.id}- {self.user.username} -  {self.status}'
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='ticket_created_at_idx'),
+            models.Index(fields=['updated_at'], name='ticket_updated_at_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='ticket_status_created_idx'),
+            models.Index(fields=['-last_message_at', '-id'], name='ticket_last_message_idx'),
+            models.Index(fields=['status', 'last_message_is_admin', 'last_message_at'],
+                         name='ticket_awaiting_reply_idx'),
+            models.Index(fields=['waiting_since', 'id'], name='ticket_work_queue_idx',
+                         condition=Q(waiting_since__isnull=False) & ~Q(status='Closed')),
+        ]
+
     def get_absolute_url(self):
         return reverse('ticket:ticket-detail', kwargs={'ticket_id': self.pk})
 
@@ -39,8 +115,166 @@ class Messages(TimeStampedModel):
     ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='messages')
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='user_messages')
     content = models.TextField()
-    file = models.FileField(upload_to='tickets/%Y/%m/%d', null=True, blank=True)
+    file = models.FileField(upload_to='tickets/%Y/%m/%d', storage=attachment_storage, null=True, blank=True)
+    # Name the attachment was uploaded under; the stored name is its digest.
+    filename = models.CharField(max_length=255, blank=True, editable=False)
     is_admin_response = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['ticket', '-created_at', '-id'], name='messages_ticket_created_idx'),
+        ]
+
     def __str__(self):
         return f' {self.ticket.user.username}  -  {self.ticket.id}'
+
+
+class TicketEvent(models.Model):
+    """
+    One entry of the append-only ticket lifecycle log.
+
+    Rows are only ever inserted, by ticket.events, and back the time to first
+    response and time to close metrics. actor is the user whose request
+    caused the event, when known.
+    """
+    CREATED = 'created'
+    STATUS_CHANGED = 'status_changed'
+    MESSAGE_ADDED = 'message_added'
+    ADMIN_REPLIED = 'admin_replied'
+    KIND_CHOICES = [
+        (CREATED, 'Created'),
+        (STATUS_CHANGED, 'Status changed'),
+        (MESSAGE_ADDED, 'Message added'),
+        (ADMIN_REPLIED, 'Admin replied'),
+    ]
+
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='events')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='ticket_events')
+    old_status = models.CharField(max_length=50, choices=STARTS_CHOICES, blank=True)
+    new_status = models.CharField(max_length=50, choices=STARTS_CHOICES, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['ticket', 'kind', 'created_at'], name='ticket_event_ticket_kind_idx'),
+            models.Index(fields=['kind', 'created_at'], name='ticket_event_kind_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.ticket_id} - {self.kind} - {self.created_at}'
+
+
+class DailyTicketStats(models.Model):
+    """
+    Ticket activity of one local calendar day, aggregated from the event log.
+
+    Rows are recomputed by ticket.rollups for the days touched since the
+    last run of the rollup_ticket_stats command.
+    """
+    day = models.DateField(unique=True)
+    opened = models.PositiveIntegerField(default=0)
+    closed = models.PositiveIntegerField(default=0)
+    reopened = models.PositiveIntegerField(default=0)
+    messages = models.PositiveIntegerField(default=0)
+    admin_replies = models.PositiveIntegerField(default=0)
+    first_responses = models.PositiveIntegerField(default=0)
+    median_first_response = models.DurationField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.day} - {self.opened} opened - {self.closed} closed'
+
+
+class RollupWatermark(models.Model):
+    """
+    Id of the last source row a rollup has processed.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    position = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.name} - {self.position}'
+
+
+class ImportCheckpoint(models.Model):
+    """
+    Number of records of an import source already committed.
+
+    Updated by ticket.importer in the transaction of every batch, so an
+    interrupted import resumes exactly after the last committed record.
+    """
+    source = models.CharField(max_length=255, unique=True)
+    records = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.source} - {self.records}'
+
+
+class TicketCounter(models.Model):
+    """
+    Denormalized number of tickets per status.
+
+    Rows with an empty user hold the site-wide totals, the others hold the
+    totals for a single ticket owner. They are maintained by ticket.counters
+    and can be rebuilt with the rebuild_ticket_counters command.
+    """
+    status = models.CharField(max_length=50, choices=STARTS_CHOICES)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='ticket_counters')
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['status', 'user'], name='unique_ticket_counter_per_user'),
+            models.UniqueConstraint(fields=['status'], condition=Q(user__isnull=True),
+                                    name='unique_ticket_counter_global'),
+        ]
+
+    def __str__(self):
+        return f'{self.status} - {self.user_id or "all"} - {self.count}'
+
+
+class Blob(models.Model):
+    """
+    A deduplicated attachment file and the number of tickets and messages referencing it.
+
+    Maintained by ticket.blobs; the file is removed once nothing references it.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    digest = models.CharField(max_length=64, db_index=True)
+    size = models.BigIntegerField()
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.name} - {self.ref_count}'
+
+
+class ChunkedUpload(TimeStampedModel):
+    """
+    An attachment being uploaded in chunks.
+
+    The received bytes are appended to a temporary file under
+    TICKET_UPLOAD_TEMP_DIR; offset is the number of bytes stored so far. Once
+    complete the upload is attached to a ticket or message through the upload
+    field of their forms. Abandoned uploads are removed by the cleanup_uploads
+    command.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chunked_uploads')
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at'], name='chunked_upload_updated_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.filename} - {self.offset}/{self.size}'
+
+    @property
+    def is_complete(self):
+        return self.offset == self.size
@@ -0,0 +1,149 @@
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Q
+
+
+def encode_cursor(value, pk):
+    """
+    Build an opaque cursor pointing at a row of a keyset-ordered result.
+
+    Args:
+        value: Datetime value of the ordering field for the row
+        pk: Primary key of the row, used as tie breaker
+
+    Returns:
+        str: URL-safe cursor string
+    """
+    raw = f'{value.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Parse a cursor produced by encode_cursor.
+
+    Args:
+        cursor: Cursor string taken from the query string
+
+    Returns:
+        tuple: (datetime, pk) or None when the cursor is missing or malformed
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        value, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(value), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+class KeysetPage:
+    """
+    One page of a keyset-paginated result.
+
+    The rows are always listed newest first; next_cursor leads to older
+    rows and previous_cursor back to newer ones.
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset newest first on (field, id) without OFFSET.
+
+    Every page is fetched with a range condition on the ordering columns, so
+    with a matching index page N costs the same as page 1. With
+    oldest_first=True the order is reversed and next pages lead to newer rows.
+    """
+
+    def __init__(self, queryset, per_page, field='created_at', oldest_first=False):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.field = field
+        self.oldest_first = oldest_first
+
+    def _cursor(self, obj):
+        return encode_cursor(getattr(obj, self.field), obj.pk)
+
+    def _query(self, after, before):
+        """
+        Build the query for one page, fetching one extra row to detect a neighbour page.
+
+        Returns:
+            tuple: (queryset, backwards, after) where backwards tells the rows
+                   run in reverse order towards the `before` cursor
+        """
+        field = self.field
+        after, before = decode_cursor(after), decode_cursor(before)
+        forward, backward, order = ('gt', 'lt', '') if self.oldest_first else ('lt', 'gt', '-')
+        reverse = '' if order else '-'
+        if before and not after:
+            value, pk = before
+            queryset = self.queryset.filter(
+                Q(**{f'{field}__{backward}': value}) | Q(**{field: value, f'pk__{backward}': pk})
+            ).order_by(f'{reverse}{field}', f'{reverse}pk')
+            return queryset[:self.per_page + 1], True, after
+
+        queryset = self.queryset
+        if after:
+            value, pk = after
+            queryset = queryset.filter(Q(**{f'{field}__{forward}': value}) | Q(**{field: value, f'pk__{forward}': pk}))
+        return queryset.order_by(f'{order}{field}', f'{order}pk')[:self.per_page + 1], False, after
+
+    def _page(self, rows, backwards, after):
+        has_more = len(rows) > self.per_page
+        if backwards:
+            rows = rows[:self.per_page][::-1]
+            return KeysetPage(
+                rows,
+                next_cursor=self._cursor(rows[-1]) if rows else None,
+                previous_cursor=self._cursor(rows[0]) if rows and has_more else None,
+            )
+        rows = rows[:self.per_page]
+        return KeysetPage(
+            rows,
+            next_cursor=self._cursor(rows[-1]) if has_more else None,
+            previous_cursor=self._cursor(rows[0]) if rows and after else None,
+        )
+
+    def get_page(self, after=None, before=None):
+        """
+        Fetch the page following the `after` cursor or preceding the `before` cursor.
+
+        Args:
+            after: Cursor of the last row of the previous page (older rows follow)
+            before: Cursor of the first row of the next page (newer rows precede)
+
+        Returns:
+            KeysetPage: Rows of the page plus cursors to its neighbours
+        """
+        queryset, backwards, after = self._query(after, before)
+        return self._page(list(queryset), backwards, after)
+
+    async def aget_page(self, after=None, before=None):
+        """
+        Async version of get_page using the async ORM.
+        """
+        queryset, backwards, after = self._query(after, before)
+        return self._page([row async for row in queryset], backwards, after)
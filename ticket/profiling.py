@@ -0,0 +1,222 @@
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import Signal, receiver
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger(__name__)
+
+# The profile of the request being handled, or None when it is not sampled.
+# Context variables follow the request into sync_to_async threads, so queries
+# of async views are attributed to it as well.
+_profile = ContextVar('ticket_request_profile', default=None)
+
+# Sent with profile after every profiled request, once its budgets were checked.
+request_profiled = Signal()
+
+UNRESOLVED = '<unresolved>'
+
+
+class BudgetExceeded(Exception):
+    """
+    Raised for a profiled request over its budget when TICKET_PROFILING_RAISE is on.
+    """
+
+
+class RequestProfile:
+    """
+    Timings of one request: latency, database queries and template rendering.
+
+    Attributes:
+        view_name: Resolved URL name, e.g. ticket:ticket_detail
+        duration: Seconds spent in the rest of the middleware chain and the view
+        queries: Number of queries executed
+        query_time: Seconds spent executing them
+        template_time: Seconds spent rendering templates, queries run from
+                       templates included
+        statements: Counter of executed SQL, with parameters left out
+    """
+
+    def __init__(self):
+        self.view_name = UNRESOLVED
+        self.duration = self.query_time = self.template_time = 0.0
+        self.queries = 0
+        self.statements = Counter()
+
+    def duplicates(self, threshold=None):
+        """
+        SQL executed at least threshold times, the shape of an N+1 query.
+
+        Args:
+            threshold: Defaults to TICKET_PROFILING_DUPLICATE_THRESHOLD
+
+        Returns:
+            list: (sql, count) pairs, most repeated first
+        """
+        threshold = threshold or settings.TICKET_PROFILING_DUPLICATE_THRESHOLD
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= threshold]
+
+    def over_budget(self):
+        """
+        Compare the profile with TICKET_PROFILING_BUDGETS.
+
+        Budgets are keyed by URL name, with '*' applying to views without a
+        budget of their own, and may limit queries, duration, query_time and
+        template_time (seconds).
+
+        Returns:
+            list: Human readable descriptions of the exceeded limits
+        """
+        budgets = settings.TICKET_PROFILING_BUDGETS
+        budget = budgets.get(self.view_name, budgets.get('*', {}))
+        return [f'{name} {getattr(self, name):.4g} > {limit}'
+                for name, limit in budget.items() if getattr(self, name) > limit]
+
+    def server_timing(self):
+        return (f'db;desc="{self.queries} queries";dur={self.query_time * 1000:.1f}, '
+                f'tpl;dur={self.template_time * 1000:.1f}, total;dur={self.duration * 1000:.1f}')
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else UNRESOLVED
+
+
+def sampled():
+    rate = settings.TICKET_PROFILING_SAMPLE_RATE
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+@contextmanager
+def profiling():
+    """
+    Profile the queries and template renders inside the block.
+
+    Yields:
+        RequestProfile: The profile being filled
+    """
+    profile = RequestProfile()
+    token = _profile.set(profile)
+    started = time.perf_counter()
+    try:
+        yield profile
+    finally:
+        profile.duration = time.perf_counter() - started
+        _profile.reset(token)
+
+
+def shows_timing(request):
+    """
+    Whether the Server-Timing header may be sent for request: with DEBUG on or to staff members only.
+    """
+    if settings.DEBUG:
+        return True
+    user = getattr(request, 'user', None)
+    return user is not None and user.is_staff
+
+
+def finish(profile, request, response):
+    """
+    Record a finished request profile: log it, check its budget and announce it.
+
+    Args:
+        profile: RequestProfile of the request
+        request: HTTP request object
+        response: HTTP response, gets a Server-Timing header when
+                  shows_timing(request)
+
+    Raises:
+        BudgetExceeded: When over budget and TICKET_PROFILING_RAISE is on
+    """
+    profile.view_name = view_name(request)
+    if shows_timing(request):
+        response['Server-Timing'] = profile.server_timing()
+    logger.debug('%s %s: %.1f ms, %d queries in %.1f ms, templates %.1f ms', request.method, profile.view_name,
+                 profile.duration * 1000, profile.queries, profile.query_time * 1000, profile.template_time * 1000)
+    for sql, count in profile.duplicates():
+        logger.warning('%s ran the same query %d times: %s', profile.view_name, count, sql)
+    exceeded = profile.over_budget()
+    request_profiled.send(sender=RequestProfile, profile=profile, exceeded=exceeded)
+    if exceeded:
+        message = f'{profile.view_name} over budget: {", ".join(exceeded)}'
+        if settings.TICKET_PROFILING_RAISE:
+            raise BudgetExceeded(message)
+        logger.warning(message)
+
+
+def _record_query(execute, sql, params, many, context):
+    profile = _profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.query_time += time.perf_counter() - started
+        profile.queries += 1
+        profile.statements[sql] += 1
+
+
+def install(connection):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+@receiver(connection_created)
+def install_on_connect(sender, connection, **kwargs):
+    install(connection)
+
+
+def install_all():
+    """
+    Attach the query recorder to every open connection of this thread.
+
+    New connections get it through connection_created. Without a sampled
+    request the recorder only looks up a context variable.
+    """
+    for connection in connections.all(initialized_only=True):
+        install(connection)
+
+
+class ProfiledTemplate:
+    """
+    Template of the Django backend that adds its render time to the current profile.
+    """
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        profile = _profile.get()
+        if profile is None:
+            return self.template.render(context, request)
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            profile.template_time += time.perf_counter() - started
+
+
+class ProfilingTemplates(DjangoTemplates):
+    """
+    DjangoTemplates backend timing the templates rendered during a profiled request.
+
+    Only the outermost render is timed; included templates count towards
+    the template that includes them.
+    """
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return ProfiledTemplate(super().get_template(template_name))
@@ -0,0 +1,113 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class InProcessBroker:
+    """
+    Publish/subscribe hub delivering events to subscribers of the same process.
+
+    Every subscriber owns a bounded asyncio queue on its event loop; publish
+    may be called from any thread and hands the event over with
+    call_soon_threadsafe. A subscriber that falls more than queue_size events
+    behind is marked as overflowed and should reconnect, so one slow client
+    cannot grow memory without bound.
+
+    A broker shared between processes (for example Redis pub/sub) can be used
+    instead by pointing TICKET_PUBSUB_BROKER at a class with the same
+    publish() and subscribe() methods.
+    """
+    queue_size = 100
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def publish(self, channel, event):
+        """
+        Send an event to every current subscriber of a channel.
+
+        Args:
+            channel: Channel name
+            event: JSON-serializable event dict
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                # The subscriber's event loop has been closed.
+                pass
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        """
+        Subscribe to a channel for the duration of the block.
+
+        Yields:
+            Subscription: Object whose get() waits for the next event
+        """
+        subscription = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(channel)
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+
+class Subscription:
+    """
+    Receiving end of an InProcessBroker subscription.
+    """
+
+    def __init__(self, loop, queue_size):
+        self.loop = loop
+        self.queue = asyncio.Queue(queue_size)
+        self.overflowed = False
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout=None):
+        """
+        Wait for the next event.
+
+        Args:
+            timeout: Seconds to wait before giving up
+
+        Returns:
+            dict: The event, or None when the timeout expired
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    """
+    Return the process-wide broker configured by TICKET_PUBSUB_BROKER.
+    """
+    return import_string(settings.TICKET_PUBSUB_BROKER)()
+
+
+def ticket_channel(ticket_id):
+    return f'ticket-{ticket_id}'
@@ -0,0 +1,116 @@
+import statistics
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, Max, OuterRef, Q
+from django.utils import timezone
+
+from .models import DailyTicketStats, RollupWatermark, TicketEvent
+
+WATERMARK = 'daily_ticket_stats'
+
+
+def _day_range(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def recompute_day(day):
+    """
+    Recompute the DailyTicketStats row of one local day from the event log.
+
+    The counts come from one aggregate over the day's range of the
+    (kind, created_at) event index; the first staff replies of the day are
+    the replies without an earlier one on the same ticket.
+
+    Args:
+        day: Date to recompute
+
+    Returns:
+        DailyTicketStats: The stored row
+    """
+    start, end = _day_range(day)
+    in_day = TicketEvent.objects.filter(kind__in=[kind for kind, _ in TicketEvent.KIND_CHOICES],
+                                        created_at__gte=start, created_at__lt=end)
+    counts = in_day.aggregate(
+        opened=Count('id', filter=Q(kind=TicketEvent.CREATED)),
+        closed=Count('id', filter=Q(kind=TicketEvent.STATUS_CHANGED, new_status='Closed')),
+        reopened=Count('id', filter=Q(kind=TicketEvent.STATUS_CHANGED, old_status='Closed')),
+        messages=Count('id', filter=Q(kind=TicketEvent.MESSAGE_ADDED)),
+        admin_replies=Count('id', filter=Q(kind=TicketEvent.ADMIN_REPLIED)),
+    )
+    earlier_reply = TicketEvent.objects.filter(ticket=OuterRef('ticket'), kind=TicketEvent.ADMIN_REPLIED,
+                                               created_at__lt=OuterRef('created_at'))
+    first_replies = in_day.filter(~Exists(earlier_reply), kind=TicketEvent.ADMIN_REPLIED).values_list(
+        'ticket__created_at', 'created_at')
+    waits = [(replied - created).total_seconds() for created, replied in first_replies]
+    stats, _ = DailyTicketStats.objects.update_or_create(day=day, defaults=dict(
+        counts,
+        first_responses=len(waits),
+        median_first_response=timedelta(seconds=round(statistics.median(waits))) if waits else None,
+    ))
+    return stats
+
+
+def rollup(full=False):
+    """
+    Recompute the daily rows of every day with events logged since the last run.
+
+    The watermark is the id of the last event processed, so events logged
+    for past days (for example by an import) are picked up as well. It only
+    advances past events older than TICKET_ROLLUP_OVERLAP seconds: events
+    are inserted after their transaction commits and ids can become visible
+    out of order, so the newest events are looked at again on the next run.
+    Recomputing a day is idempotent.
+
+    Args:
+        full: Ignore the watermark and recompute every day with events
+
+    Returns:
+        list: The recomputed days, oldest first
+    """
+    settled = timezone.now() - timedelta(seconds=settings.TICKET_ROLLUP_OVERLAP)
+    watermark, _ = RollupWatermark.objects.get_or_create(name=WATERMARK)
+    position = 0 if full else watermark.position
+    new_events = TicketEvent.objects.filter(pk__gt=position)
+    days = sorted({timezone.localdate(moment) for moment in new_events.datetimes('created_at', 'day')})
+    for day in days:
+        with transaction.atomic():
+            recompute_day(day)
+    latest = new_events.filter(created_at__lt=settled).aggregate(latest=Max('pk'))['latest']
+    if latest is not None and latest > watermark.position:
+        RollupWatermark.objects.filter(pk=watermark.pk).update(position=latest)
+    return days
+
+
+def _fill(days, rows):
+    today = timezone.localdate()
+    by_day = {row.day: row for row in rows}
+    return [by_day.get(day) or DailyTicketStats(day=day)
+            for day in (today - timedelta(days=offset) for offset in range(days - 1, -1, -1))]
+
+
+def _trend_query(days):
+    return DailyTicketStats.objects.filter(day__gt=timezone.localdate() - timedelta(days=days)).order_by('day')
+
+
+def trend(days=90):
+    """
+    Read the daily rows of the last days with one query on the day index.
+
+    Args:
+        days: Number of days, today included
+
+    Returns:
+        list: One DailyTicketStats per day, oldest first; days without a row
+              get an unsaved row of zeros
+    """
+    return _fill(days, _trend_query(days))
+
+
+async def atrend(days=90):
+    """
+    Async version of trend using the async ORM.
+    """
+    return _fill(days, [row async for row in _trend_query(days)])
@@ -0,0 +1,203 @@
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
+
+from .models import Ticket
+
+TICKET_INDEX = 'ticket_ticket_fts'
+MESSAGE_INDEX = 'ticket_messages_fts'
+
+# Control characters used as highlight markers so the snippet can be escaped
+# before the markers are turned into <mark> tags.
+MARK_START, MARK_END = '\x02', '\x03'
+
+# SQLite drops a table's triggers when a migration rebuilds the table, so they
+# are re-created idempotently after every migrate (see install_triggers).
+TRIGGER_SQL = [
+    f"""CREATE TRIGGER IF NOT EXISTS {TICKET_INDEX}_ai AFTER INSERT ON ticket_ticket BEGIN
+        INSERT INTO {TICKET_INDEX}(rowid, subject, description) VALUES (new.id, new.subject, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TICKET_INDEX}_ad AFTER DELETE ON ticket_ticket BEGIN
+        INSERT INTO {TICKET_INDEX}({TICKET_INDEX}, rowid, subject, description)
+        VALUES ('delete', old.id, old.subject, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TICKET_INDEX}_au AFTER UPDATE OF subject, description ON ticket_ticket
+    WHEN old.subject IS NOT new.subject OR old.description IS NOT new.description BEGIN
+        INSERT INTO {TICKET_INDEX}({TICKET_INDEX}, rowid, subject, description)
+        VALUES ('delete', old.id, old.subject, old.description);
+        INSERT INTO {TICKET_INDEX}(rowid, subject, description) VALUES (new.id, new.subject, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {MESSAGE_INDEX}_ai AFTER INSERT ON ticket_messages BEGIN
+        INSERT INTO {MESSAGE_INDEX}(rowid, content) VALUES (new.id, new.content);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {MESSAGE_INDEX}_ad AFTER DELETE ON ticket_messages BEGIN
+        INSERT INTO {MESSAGE_INDEX}({MESSAGE_INDEX}, rowid, content) VALUES ('delete', old.id, old.content);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {MESSAGE_INDEX}_au AFTER UPDATE OF content ON ticket_messages
+    WHEN old.content IS NOT new.content BEGIN
+        INSERT INTO {MESSAGE_INDEX}({MESSAGE_INDEX}, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO {MESSAGE_INDEX}(rowid, content) VALUES (new.id, new.content);
+    END""",
+]
+
+SEARCH_SQL = f"""
+    SELECT ticket_id, MIN(score), snippet FROM (
+        SELECT {TICKET_INDEX}.rowid AS ticket_id, bm25({TICKET_INDEX}, 2.0, 1.0) AS score,
+               snippet({TICKET_INDEX}, -1, %s, %s, '…', 16) AS snippet
+        FROM {TICKET_INDEX} WHERE {TICKET_INDEX} MATCH %s
+        UNION ALL
+        SELECT ticket_messages.ticket_id, bm25({MESSAGE_INDEX}),
+               snippet({MESSAGE_INDEX}, 0, %s, %s, '…', 16)
+        FROM {MESSAGE_INDEX} JOIN ticket_messages ON ticket_messages.id = {MESSAGE_INDEX}.rowid
+        WHERE {MESSAGE_INDEX} MATCH %s
+    )
+    GROUP BY ticket_id ORDER BY MIN(score) LIMIT %s
+"""
+
+
+def is_available():
+    """
+    Tell whether the full-text index tables exist on the default database.
+
+    Returns:
+        bool: True when searches can use the FTS5 index
+    """
+    return connection.vendor == 'sqlite' and TICKET_INDEX in connection.introspection.table_names()
+
+
+def install_triggers(conn):
+    """
+    Create the triggers keeping the full-text indexes in sync, if they are missing.
+
+    Args:
+        conn: Database connection to install the triggers on
+
+    Returns:
+        bool: True when the indexes exist and the triggers are in place
+    """
+    if conn.vendor != 'sqlite' or TICKET_INDEX not in conn.introspection.table_names():
+        return False
+    with conn.cursor() as cursor:
+        for statement in TRIGGER_SQL:
+            cursor.execute(statement)
+    return True
+
+
+def build_match_query(text):
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+
+    Every word is quoted so FTS5 operators typed by the user are matched
+    literally, and the last word is prefix-matched.
+
+    Args:
+        text: Search text as typed by the user
+
+    Returns:
+        str: MATCH expression, empty when the text contains no words
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        return ''
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _highlight(snippet):
+    return mark_safe(escape(snippet).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>'))
+
+
+class SearchResult:
+    """
+    A ticket matched by a search together with its rank and highlighted snippet.
+    """
+
+    def __init__(self, ticket, score, snippet):
+        self.ticket = ticket
+        self.score = score
+        self.snippet = snippet
+
+
+def _ranked_matches(text, limit):
+    match = build_match_query(text)
+    if not match:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(SEARCH_SQL, [MARK_START, MARK_END, match, MARK_START, MARK_END, match, limit])
+        return cursor.fetchall()
+
+
+def matching_ticket_ids(text, limit=1000):
+    """
+    Ids of the tickets whose subject, description or messages match the text, best first.
+
+    Args:
+        text: Search text as typed by the user
+        limit: Maximum number of ids to return
+
+    Returns:
+        list: Ticket primary keys ordered by relevance
+    """
+    if not is_available():
+        return list(Ticket.objects.filter(
+            Q(subject__icontains=text) | Q(description__icontains=text) | Q(messages__content__icontains=text)
+        ).order_by('-id').values_list('id', flat=True).distinct()[:limit])
+    return [ticket_id for ticket_id, _, _ in _ranked_matches(text, limit)]
+
+
+def search_tickets(text, limit=50):
+    """
+    Ranked full-text search over tickets and their conversation.
+
+    Args:
+        text: Search text as typed by the user
+        limit: Maximum number of tickets to return
+
+    Returns:
+        list: SearchResult objects ordered by relevance
+    """
+    if is_available():
+        matches = _ranked_matches(text, limit)
+    else:
+        matches = [(ticket_id, None, None) for ticket_id in matching_ticket_ids(text, limit)]
+    tickets = Ticket.objects.select_related('user').only(
+        'id', 'subject', 'description', 'status', 'created_at', 'user__username'
+    ).in_bulk([ticket_id for ticket_id, _, _ in matches])
+    results = []
+    for ticket_id, score, snippet in matches:
+        ticket = tickets.get(ticket_id)
+        if ticket is None:
+            continue
+        if snippet is None:
+            snippet = escape(Truncator(ticket.description).words(30))
+        else:
+            snippet = _highlight(snippet)
+        results.append(SearchResult(ticket, score, snippet))
+    return results
+
+
+def rebuild_index():
+    """
+    Repopulate both full-text indexes from the ticket and message tables.
+
+    Each index is rebuilt with the FTS5 rebuild command in a single
+    transaction, so searches keep reading the old index until it commits and
+    the triggers cannot interleave with a half-built index.
+
+    Returns:
+        dict: Number of indexed rows per index table
+    """
+    totals = {}
+    for index, table in ((TICKET_INDEX, 'ticket_ticket'), (MESSAGE_INDEX, 'ticket_messages')):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {index}({index}) VALUES ('rebuild')")
+            cursor.execute(f'SELECT COUNT(*) FROM {table}')
+            totals[index] = cursor.fetchone()[0]
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {index}({index}) VALUES ('optimize')")
+    return totals
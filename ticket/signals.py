@@ -0,0 +1,247 @@
+import os
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.db import connections
+from django.db.models.signals import post_init, pre_save, post_save, post_delete, post_migrate
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import blobs, counters, events, live, search, thread_meta, user_cache
+from .models import Ticket, Messages, TicketEvent
+from .transitions import status_changed, statuses_changed
+
+
+@receiver(post_init, sender=Ticket)
+def remember_loaded_status(sender, instance, **kwargs):
+    """
+    Keep the status the ticket was loaded with so a later save can tell whether it changed.
+
+    Deferred fields are read from the instance dict to avoid triggering a query.
+    """
+    instance._loaded_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Ticket)
+def update_counters_on_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Count newly created tickets and announce status changes made through save().
+    """
+    if raw:
+        return
+    if created:
+        counters.ticket_created(instance.status, instance.user_id)
+        events.record(instance.id, TicketEvent.CREATED, actor_id=events.current_actor_id() or instance.user_id,
+                      new_status=instance.status, created_at=instance.created_at)
+    elif instance._loaded_status is not None and instance.status != instance._loaded_status:
+        status_changed.send(sender=Ticket, ticket_id=instance.id, user_id=instance.user_id,
+                            old_status=instance._loaded_status, new_status=instance.status)
+    instance._loaded_status = instance.__dict__.get('status')
+
+
+@receiver(status_changed, sender=Ticket)
+def update_counters_on_status_change(sender, user_id, old_status, new_status, **kwargs):
+    """
+    Move the ticket from its old status counter to the new one.
+    """
+    counters.status_changed(user_id, old_status, new_status)
+
+
+@receiver(status_changed, sender=Ticket)
+def log_status_change(sender, ticket_id, old_status, new_status, **kwargs):
+    """
+    Append the status change to the ticket event log.
+    """
+    events.record(ticket_id, TicketEvent.STATUS_CHANGED, old_status=old_status, new_status=new_status)
+
+
+@receiver(status_changed, sender=Ticket)
+def publish_status_change(sender, ticket_id, new_status, **kwargs):
+    """
+    Push status changes to the ticket's live event stream.
+    """
+    live.publish_status(ticket_id, new_status)
+
+
+@receiver(status_changed, sender=Ticket)
+def restart_wait_on_reopen(sender, ticket_id, old_status, **kwargs):
+    """
+    Put a reopened ticket back into the staff work queue from now.
+    """
+    if old_status == 'Closed':
+        thread_meta.reopened([ticket_id])
+
+
+@receiver(statuses_changed, sender=Ticket)
+def update_counters_on_bulk_change(sender, rows, new_status, **kwargs):
+    """
+    Apply the counter changes of a bulk status change in one step.
+    """
+    deltas = Counter()
+    for _, user_id, old_status in rows:
+        deltas[(old_status, user_id)] -= 1
+        deltas[(new_status, user_id)] += 1
+    counters.apply_deltas(deltas)
+
+
+@receiver(statuses_changed, sender=Ticket)
+def log_bulk_status_change(sender, rows, new_status, **kwargs):
+    """
+    Append every status change of a bulk change to the event log in one batch.
+    """
+    actor_id, now = events.current_actor_id(), timezone.now()
+    events.record_many([
+        TicketEvent(ticket_id=ticket_id, kind=TicketEvent.STATUS_CHANGED, actor_id=actor_id,
+                    old_status=old_status, new_status=new_status, created_at=now)
+        for ticket_id, _, old_status in rows
+    ])
+
+
+@receiver(statuses_changed, sender=Ticket)
+def publish_bulk_status_change(sender, rows, new_status, **kwargs):
+    """
+    Push a bulk status change to the live event stream of every ticket involved.
+    """
+    for ticket_id, _, _ in rows:
+        live.publish_status(ticket_id, new_status)
+
+
+@receiver(statuses_changed, sender=Ticket)
+def restart_wait_on_bulk_reopen(sender, rows, **kwargs):
+    """
+    Put the tickets a bulk change reopened back into the staff work queue.
+    """
+    reopened = [ticket_id for ticket_id, _, old_status in rows if old_status == 'Closed']
+    if reopened:
+        thread_meta.reopened(reopened)
+
+
+@receiver(post_delete, sender=Ticket)
+def update_counters_on_delete(sender, instance, origin=None, **kwargs):
+    """
+    Remove a deleted ticket from the counters.
+
+    When the ticket is deleted along with its owner, the owner's counter rows
+    are deleted by the same cascade and must not be recreated.
+    """
+    status = instance._loaded_status or instance.__dict__.get('status')
+    if status is not None:
+        owner_deleted = isinstance(origin, User) and origin.pk == instance.user_id
+        counters.ticket_deleted(status, instance.user_id, owner_deleted)
+
+
+@receiver(post_save, sender=Messages)
+def log_new_message(sender, instance, created, raw=False, **kwargs):
+    """
+    Append new messages to the ticket event log, staff replies under their own kind.
+    """
+    if created and not raw:
+        kind = TicketEvent.ADMIN_REPLIED if instance.is_admin_response else TicketEvent.MESSAGE_ADDED
+        events.record(instance.ticket_id, kind, actor_id=instance.sender_id, created_at=instance.created_at)
+
+
+@receiver(post_save, sender=Messages)
+def publish_new_message(sender, instance, created, raw=False, **kwargs):
+    """
+    Push newly created messages to the ticket's live event stream.
+    """
+    if created and not raw:
+        live.publish_message(instance)
+
+
+@receiver(post_save, sender=Messages)
+def update_thread_metadata_on_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Keep message_count and the last message fields of the ticket in step with its messages.
+    """
+    if raw:
+        return
+    if created:
+        thread_meta.message_added(instance)
+    else:
+        thread_meta.refresh(Ticket.objects.filter(pk=instance.ticket_id))
+
+
+@receiver(post_delete, sender=Messages)
+def update_thread_metadata_on_delete(sender, instance, origin=None, **kwargs):
+    """
+    Recompute the thread metadata after a message is deleted, unless its ticket is being deleted.
+    """
+    if isinstance(origin, Ticket) or getattr(origin, 'model', None) is Ticket:
+        return
+    thread_meta.refresh(Ticket.objects.filter(pk=instance.ticket_id))
+
+
+def _file_name(instance):
+    value = instance.__dict__.get('file')
+    return getattr(value, 'name', value) or None
+
+
+@receiver(post_init, sender=Ticket)
+@receiver(post_init, sender=Messages)
+def remember_loaded_file(sender, instance, **kwargs):
+    """
+    Keep the attachment name the row was loaded with to track blob references.
+    """
+    instance._loaded_file = _file_name(instance)
+
+
+@receiver(pre_save, sender=Ticket)
+@receiver(pre_save, sender=Messages)
+def remember_upload_name(sender, instance, raw=False, **kwargs):
+    """
+    Keep the name a new attachment was uploaded under before storage renames it after its digest.
+    """
+    if raw or 'file' in instance.get_deferred_fields():
+        return
+    if instance.file and not instance.file._committed:
+        instance.filename = os.path.basename(instance.file.name)[:255]
+    elif not instance.file:
+        instance.filename = ''
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_save, sender=Messages)
+def update_blob_references_on_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Move the blob reference when an attachment is added, replaced or cleared.
+    """
+    if raw or 'file' in instance.get_deferred_fields():
+        return
+    name = _file_name(instance)
+    previous = None if created else instance._loaded_file
+    if name != previous:
+        if name:
+            blobs.acquire(name)
+        if previous:
+            blobs.release(previous)
+    instance._loaded_file = name
+
+
+@receiver(post_delete, sender=Ticket)
+@receiver(post_delete, sender=Messages)
+def update_blob_references_on_delete(sender, instance, **kwargs):
+    """
+    Release the blob of a deleted ticket or message.
+    """
+    name = instance._loaded_file
+    if name:
+        blobs.release(name)
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using, **kwargs):
+    """
+    Re-create the full-text index triggers that SQLite drops when a migration rebuilds a table.
+    """
+    if sender.name == 'ticket':
+        search.install_triggers(connections[using])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Drop the cached copy of a user on any change, such as a staff flag, password or is_active change.
+    """
+    user_cache.invalidate([instance.pk])
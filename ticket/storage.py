@@ -0,0 +1,71 @@
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+
+BLOB_PREFIX = 'blobs'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage keeping every distinct upload once, named after its SHA-256 digest.
+
+    The content is hashed while it is streamed to a temporary file next to
+    the blobs, so memory use does not depend on the file size. When a blob
+    with the same digest already exists the temporary copy is discarded and
+    the existing name is returned.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Names are derived from the content in _save, so an existing file is
+        # the same blob and must not be renamed.
+        return name
+
+    @staticmethod
+    def blob_name(digest, extension=''):
+        return f'{BLOB_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+    @staticmethod
+    def digest_from_name(name):
+        """
+        Extract the digest from a blob name.
+
+        Args:
+            name: Stored file name
+
+        Returns:
+            str: Hex digest, or None when the name is not a blob name
+        """
+        if not name or not name.startswith(f'{BLOB_PREFIX}/'):
+            return None
+        return os.path.splitext(os.path.basename(name))[0]
+
+    def _save(self, name, content):
+        extension = os.path.splitext(name)[1].lower()[:10]
+        directory = os.path.join(self.location, BLOB_PREFIX)
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+            name = self.blob_name(digest.hexdigest(), extension)
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                os.remove(temp_path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                os.replace(temp_path, full_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(full_path, self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name
+
+
+attachment_storage = ContentAddressedStorage()
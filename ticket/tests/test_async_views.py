@@ -0,0 +1,55 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from model_bakery import baker
+
+from ticket.models import Ticket, Messages
+
+
+class TestAsyncReadPaths(TestCase):
+    """
+    Exercise the async views through the ASGI request handler.
+    """
+
+    def setUp(self):
+        self.owner = baker.make(User)
+        self.staff = baker.make(User, is_staff=True)
+        self.other = baker.make(User)
+        self.ticket = baker.make(Ticket, user=self.owner, status='Open')
+        baker.make(Messages, ticket=self.ticket, _quantity=3)
+
+    async def login(self, user):
+        await sync_to_async(self.async_client.force_login)(user)
+
+    async def test_ticket_detail(self):
+        await self.login(self.owner)
+        response = await self.async_client.get(reverse('ticket:ticket-detail', args=(self.ticket.id,)))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['thread']), 3)
+
+    async def test_ticket_detail_other_user_redirected(self):
+        await self.login(self.other)
+        response = await self.async_client.get(reverse('ticket:ticket-detail', args=(self.ticket.id,)))
+        self.assertRedirects(response, reverse('home:home'), fetch_redirect_response=False)
+
+    async def test_ticket_detail_missing_ticket(self):
+        await self.login(self.owner)
+        response = await self.async_client.get(reverse('ticket:ticket-detail', args=(self.ticket.id + 100,)))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_status_list_requires_staff(self):
+        url = reverse('ticket:ticket-open-lists')
+        await self.login(self.owner)
+        self.assertRedirects(await self.async_client.get(url), reverse('home:home'), fetch_redirect_response=False)
+        await self.login(self.staff)
+        response = await self.async_client.get(url)
+        self.assertEqual([ticket.id for ticket in response.context['open_list']], [self.ticket.id])
+
+    async def test_profile_and_dashboard(self):
+        await self.login(self.owner)
+        response = await self.async_client.get(reverse('home:profile', args=(self.owner.username,)))
+        self.assertEqual([ticket.id for ticket in response.context['user_ticket']], [self.ticket.id])
+        await self.login(self.staff)
+        response = await self.async_client.get(reverse('home:admin'))
+        self.assertEqual(response.context['stats']['open'], 1)
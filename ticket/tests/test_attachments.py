@@ -0,0 +1,95 @@
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from model_bakery import baker
+
+from ticket.models import Ticket, Messages
+
+
+class TestTicketAttachmentView(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.owner = baker.make(User)
+        self.ticket = baker.make(Ticket, user=self.owner, file=SimpleUploadedFile('notes.txt', b'0123456789'))
+        self.url = reverse('ticket:ticket-attachment', args=(self.ticket.id,))
+        self.client.force_login(self.owner)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_full_download_with_validators(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(response['ETag'], f'"{self.ticket.file.name.rsplit("/", 1)[1].split(".")[0]}"')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_downloaded_under_the_uploaded_name(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="notes.txt"')
+        self.assertEqual(response['Content-Type'], 'application/octet-stream')
+        self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+        self.assertEqual(response['Content-Security-Policy'], 'sandbox')
+
+    def test_only_safe_types_are_shown_inline(self):
+        for name, disposition in (('page.html', 'attachment'), ('drawing.svg', 'attachment'),
+                                  ('photo.png', 'inline')):
+            with self.subTest(name=name):
+                ticket = baker.make(Ticket, user=self.owner, file=SimpleUploadedFile(name, name.encode()))
+                response = self.client.get(reverse('ticket:ticket-attachment', args=(ticket.id,)))
+                self.assertEqual(response['Content-Disposition'], f'{disposition}; filename="{name}"')
+                self.assertNotIn(response['Content-Type'], ('text/html', 'image/svg+xml'))
+
+    def test_if_none_match_returns_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_range_requests(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-3')
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=20-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_stale_if_range_returns_full_file(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_message_attachment(self):
+        message = baker.make(Messages, ticket=self.ticket, file=SimpleUploadedFile('log.txt', b'message log'))
+        response = self.client.get(reverse('ticket:message-attachment', args=(self.ticket.id, message.id)))
+        self.assertEqual(b''.join(response.streaming_content), b'message log')
+
+        other = baker.make(Messages, file=SimpleUploadedFile('log.txt', b'other ticket'))
+        response = self.client.get(reverse('ticket:message-attachment', args=(self.ticket.id, other.id)))
+        self.assertEqual(response.status_code, 404)
+
+    def test_other_users_are_redirected(self):
+        self.client.force_login(baker.make(User))
+        response = self.client.get(self.url)
+        self.assertRedirects(response, reverse('home:home'))
+
+    @override_settings(TICKET_ATTACHMENT_SENDFILE='x-accel-redirect', TICKET_ATTACHMENT_SENDFILE_PREFIX='/protected/')
+    def test_sendfile_offload(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected/{self.ticket.file.name}')
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['Content-Type'], 'application/octet-stream')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="notes.txt"')
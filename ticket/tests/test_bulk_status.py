@@ -0,0 +1,93 @@
+import json
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from model_bakery import baker
+
+from ticket import counters, transitions
+from ticket.models import Ticket, Messages
+
+
+class TestBulkTransition(TestCase):
+
+    def setUp(self):
+        self.user = baker.make(User)
+        self.tickets = baker.make(Ticket, user=self.user, _quantity=7)
+        baker.make(Ticket, status='Closed', _quantity=2)
+
+    def test_batches_and_counters(self):
+        progress = list(transitions.bulk_transition(Ticket.objects.all(), 'Closed', batch_size=3))
+        self.assertEqual(progress[0], {'done': 0, 'changed': 0, 'total': 7})
+        self.assertEqual([row['done'] for row in progress[1:]], [3, 6, 7])
+        self.assertEqual(progress[-1]['changed'], 7)
+        self.assertFalse(Ticket.objects.exclude(status='Closed').exists())
+        self.assertEqual(counters.get_counts(), {'open': 0, 'in_progress': 0, 'closed': 9, 'total': 9})
+        self.assertEqual(counters.get_counts(self.user)['closed'], 7)
+        self.assertEqual(counters.rebuild(), [])
+
+    def test_one_update_per_batch(self):
+        batches = transitions.bulk_transition(Ticket.objects.filter(status='Open'), 'In Progress', batch_size=50)
+        next(batches)
+        with CaptureQueriesContext(connection) as queries:
+            next(batches)
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "ticket_ticket" ')]
+        self.assertEqual(len(updates), 1)
+
+    def test_bulk_reopen_restarts_wait(self):
+        closed = Ticket.objects.filter(status='Closed')
+        baker.make(Messages, ticket=closed[0], is_admin_response=True)
+        list(transitions.bulk_transition(closed, 'Open'))
+        self.assertFalse(Ticket.objects.filter(waiting_since__isnull=True).exists())
+
+
+class TestBulkStatusView(TestCase):
+
+    def setUp(self):
+        self.user = baker.make(User, username='alice')
+        self.staff = baker.make(User, is_staff=True)
+        self.stale = baker.make(Ticket, user=self.user, _quantity=3)
+        Ticket.objects.filter(pk__in=[ticket.pk for ticket in self.stale]).update(
+            updated_at=timezone.now() - timedelta(days=40))
+        self.fresh = baker.make(Ticket, user=self.user)
+        baker.make(Ticket, _quantity=2)
+        self.client.force_login(self.staff)
+
+    @override_settings(TICKET_BULK_BATCH_SIZE=2)
+    async def test_streams_progress(self):
+        await sync_to_async(self.async_client.force_login)(self.staff)
+        response = await self.async_client.post(reverse('ticket:ticket-bulk-status'),
+                                    {'to_status': 'Closed', 'status': 'Open', 'older_than_days': 30,
+                                     'user': 'alice'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(chunk) async for chunk in response.streaming_content]
+        self.assertEqual([line['done'] for line in lines], [0, 2, 3, 3])
+        self.assertEqual(lines[-1], {'done': 3, 'changed': 3, 'total': 3, 'finished': True})
+        closed = await sync_to_async(list)(Ticket.objects.filter(status='Closed'))
+        self.assertEqual(set(closed), set(self.stale))
+
+    def test_invalid_form(self):
+        response = self.client.post(reverse('ticket:ticket-bulk-status'), {'to_status': 'Done'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('to_status', response.json()['errors'])
+
+    def test_staff_only(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('ticket:ticket-bulk-status'), {'to_status': 'Closed'})
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Ticket.objects.filter(status='Closed').exists())
+
+    def test_admin_action(self):
+        admin = baker.make(User, is_staff=True, is_superuser=True)
+        self.client.force_login(admin)
+        response = self.client.post(reverse('admin:ticket_ticket_changelist'), {
+            'action': 'close_tickets',
+            '_selected_action': [ticket.pk for ticket in self.stale],
+        }, follow=True)
+        self.assertContains(response, '3 ticket(s) moved to Closed; 0 left unchanged.')
+        self.assertEqual(counters.get_counts()['closed'], 3)
@@ -0,0 +1,75 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from model_bakery import baker
+
+from ticket.models import Ticket, Messages
+
+
+class TestConditionalGet(TestCase):
+
+    def setUp(self):
+        self.user = baker.make(User)
+        self.staff = baker.make(User, is_staff=True)
+        self.ticket = baker.make(Ticket, user=self.user)
+        baker.make(Messages, ticket=self.ticket)
+        self.detail_url = reverse('ticket:ticket-detail', args=(self.ticket.id,))
+
+    def get_etag(self, url):
+        # The first page sets the CSRF cookie, which is part of the ETag.
+        self.client.get(url)
+        return self.client.get(url)['ETag']
+
+    def revalidate(self, url):
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertIn('no-cache', response['Cache-Control'])
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_anonymous_detail_request(self):
+        self.assertRedirects(self.client.get(self.detail_url), reverse('home:home'))
+        missing = reverse('ticket:ticket-detail', args=(self.ticket.id + 1,))
+        self.assertEqual(self.client.get(missing).status_code, 404)
+
+    def test_unchanged_detail_is_not_modified(self):
+        self.client.force_login(self.user)
+        etag = self.get_etag(self.detail_url)
+        with self.assertNumQueries(3):
+            # Session, user, and the ticket with its validators.
+            response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_message_changes_detail(self):
+        self.client.force_login(self.user)
+        etag = self.get_etag(self.detail_url)
+        baker.make(Messages, ticket=self.ticket)
+        self.assertEqual(self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_depends_on_user(self):
+        self.client.force_login(self.user)
+        etag = self.get_etag(self.detail_url)
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_pending_flash_message_is_never_cached(self):
+        self.client.force_login(self.user)
+        response = self.client.post(self.detail_url, {'content': 'hello'}, follow=True)
+        self.assertContains(response, 'Message has been sent.')
+        self.assertNotIn('ETag', response)
+
+    def test_status_list(self):
+        self.client.force_login(self.staff)
+        url = reverse('ticket:ticket-open-lists')
+        self.assertEqual(self.revalidate(url).status_code, 304)
+        etag = self.get_etag(url)
+        self.ticket.status = 'Closed'
+        self.ticket.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_profile(self):
+        self.client.force_login(self.user)
+        url = reverse('home:profile', args=(self.user.username,))
+        self.assertEqual(self.revalidate(url).status_code, 304)
+        etag = self.get_etag(url)
+        baker.make(Ticket, user=self.user)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
@@ -0,0 +1,51 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from model_bakery import baker
+
+from ticket import counters
+from ticket.models import Ticket, TicketCounter
+
+
+class TestTicketCounters(TestCase):
+
+    def setUp(self):
+        self.user = baker.make(User)
+        self.ticket = baker.make(Ticket, user=self.user)
+        baker.make(Ticket, status='Closed')
+
+    def test_counts_follow_creation(self):
+        self.assertEqual(counters.get_counts(), {'open': 1, 'in_progress': 0, 'closed': 1, 'total': 2})
+        self.assertEqual(counters.get_counts(self.user)['open'], 1)
+        self.assertEqual(counters.get_counts(self.user)['closed'], 0)
+
+    def test_counts_follow_status_change(self):
+        self.ticket.status = 'Closed'
+        self.ticket.save()
+        self.assertEqual(counters.get_counts()['closed'], 2)
+        self.assertEqual(counters.get_counts(self.user), {'open': 0, 'in_progress': 0, 'closed': 1, 'total': 1})
+
+    def test_counts_follow_deletion(self):
+        self.ticket.delete()
+        self.assertEqual(counters.get_counts()['total'], 1)
+
+    def test_counts_follow_owner_deletion(self):
+        baker.make(Ticket, user=self.user, status='Closed')
+        self.user.delete()
+        self.assertEqual(counters.get_counts(), {'open': 0, 'in_progress': 0, 'closed': 1, 'total': 1})
+        self.assertFalse(TicketCounter.objects.filter(user__isnull=False, count__lt=0).exists())
+        self.assertEqual(counters.rebuild(), [])
+
+    def test_get_counts_single_query(self):
+        with self.assertNumQueries(1):
+            counters.get_counts()
+
+    def test_rebuild_reports_drift(self):
+        TicketCounter.objects.filter(status='Open', user__isnull=True).update(count=10)
+        out = StringIO()
+        call_command('rebuild_ticket_counters', stdout=out)
+        self.assertIn('stored 10, actual 1', out.getvalue())
+        self.assertEqual(counters.get_counts()['open'], 1)
+        self.assertEqual(counters.rebuild(), [])
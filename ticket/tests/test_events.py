@@ -0,0 +1,125 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DatabaseError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from model_bakery import baker
+
+from ticket import events, transitions
+from ticket.models import Ticket, Messages, TicketEvent
+
+
+class TestEventRecording(TestCase):
+
+    def setUp(self):
+        self.user = baker.make(User)
+        self.staff = baker.make(User, is_staff=True)
+
+    def test_lifecycle_is_logged(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket = baker.make(Ticket, user=self.user)
+            baker.make(Messages, ticket=ticket, sender=self.user)
+            baker.make(Messages, ticket=ticket, sender=self.staff, is_admin_response=True)
+            transitions.transition(ticket, 'Closed')
+        self.assertEqual(list(ticket.events.order_by('id').values_list('kind', 'actor', 'old_status', 'new_status')), [
+            (TicketEvent.CREATED, self.user.id, '', 'Open'),
+            (TicketEvent.MESSAGE_ADDED, self.user.id, '', ''),
+            (TicketEvent.ADMIN_REPLIED, self.staff.id, '', ''),
+            (TicketEvent.STATUS_CHANGED, None, 'Open', 'Closed'),
+        ])
+
+    def test_rolled_back_events_are_dropped(self):
+        ticket = baker.make(Ticket, user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    transitions.transition(ticket, 'Closed')
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertFalse(TicketEvent.objects.filter(kind=TicketEvent.STATUS_CHANGED).exists())
+
+    def test_events_are_written_in_the_changing_transaction(self):
+        baker.make(Ticket, user=self.user, _quantity=5)
+        with transaction.atomic(), CaptureQueriesContext(connection) as queries:
+            list(transitions.bulk_transition(Ticket.objects.all(), 'Closed'))
+            self.assertEqual(TicketEvent.objects.filter(kind=TicketEvent.STATUS_CHANGED).count(), 5)
+        inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "ticket_ticketevent"')]
+        self.assertEqual(len(inserts), 1)
+
+    def test_failed_event_insert_rolls_back_the_change(self):
+        ticket = baker.make(Ticket, user=self.user)
+        with mock.patch.object(TicketEvent.objects, 'bulk_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                transitions.transition(ticket, 'Closed')
+        self.assertEqual(Ticket.objects.get(pk=ticket.pk).status, 'Open')
+
+
+class TestLifecycleMetrics(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_first_response_and_close(self):
+        now = timezone.now()
+        user, staff = baker.make(User), baker.make(User, is_staff=True)
+        answered = baker.make(Ticket, user=user)
+        Ticket.objects.filter(pk=answered.pk).update(created_at=now - timedelta(hours=3))
+        baker.make(Ticket, user=user)
+        old = baker.make(Ticket, user=user)
+        Ticket.objects.filter(pk=old.pk).update(created_at=now - timedelta(days=60))
+        TicketEvent.objects.bulk_create([
+            TicketEvent(ticket=answered, kind=TicketEvent.ADMIN_REPLIED, actor=staff, created_at=now - timedelta(hours=2)),
+            TicketEvent(ticket=answered, kind=TicketEvent.ADMIN_REPLIED, actor=staff, created_at=now - timedelta(hours=1)),
+            TicketEvent(ticket=answered, kind=TicketEvent.STATUS_CHANGED, old_status='Open', new_status='Closed',
+                        created_at=now),
+            TicketEvent(ticket=old, kind=TicketEvent.STATUS_CHANGED, old_status='Open', new_status='Closed',
+                        created_at=now - timedelta(days=40)),
+        ])
+        metrics = events.lifecycle_metrics(30)
+        self.assertEqual(metrics['first_response'],
+                         {'count': 1, 'mean': timedelta(hours=1), 'median': timedelta(hours=1), 'unanswered': 1})
+        self.assertEqual(metrics['close']['median'], timedelta(hours=3))
+        self.assertEqual(metrics['close']['count'], 1)
+
+    def test_even_count_median_and_cache(self):
+        now = timezone.now()
+        for hours in (1, 2, 4, 7):
+            ticket = baker.make(Ticket)
+            Ticket.objects.filter(pk=ticket.pk).update(created_at=now - timedelta(hours=hours))
+            baker.make(TicketEvent, ticket=ticket, kind=TicketEvent.STATUS_CHANGED, new_status='Closed',
+                       created_at=now)
+        with self.assertNumQueries(3):
+            metrics = events.lifecycle_metrics(30)
+        self.assertEqual(metrics['close'], {'count': 4, 'mean': timedelta(hours=3.5), 'median': timedelta(hours=3)})
+        self.assertEqual(metrics['first_response']['unanswered'], 4)
+        with self.assertNumQueries(0):
+            self.assertEqual(events.lifecycle_metrics(30), metrics)
+
+    def test_metric_queries_use_indexes(self):
+        replies, closes = events._metric_queries(timezone.now())
+        self.assertIn('ticket_created_at_idx', replies.explain())
+        self.assertIn('ticket_event_ticket_kind_idx', replies.explain())
+        self.assertIn('ticket_event_kind_created_idx', closes.explain())
+
+    def test_dashboard_shows_metrics(self):
+        self.client.force_login(baker.make(User, is_staff=True))
+        self.assertContains(self.client.get(reverse('home:admin')), 'Median First Response')
+
+
+class TestEventMiddleware(TransactionTestCase):
+
+    def test_request_events_are_written_with_actor(self):
+        user = baker.make(User)
+        ticket = baker.make(Ticket, user=user)
+        staff = baker.make(User, is_staff=True)
+        self.client.force_login(staff)
+        self.client.post(reverse('ticket:ticket-close', args=(ticket.id,)))
+        self.client.post(reverse('ticket:ticket-open', args=(ticket.id,)))
+        changes = TicketEvent.objects.filter(kind=TicketEvent.STATUS_CHANGED).order_by('id')
+        self.assertEqual(list(changes.values_list('actor', 'new_status')), [(staff.id, 'Closed'), (staff.id, 'Open')])
@@ -0,0 +1,109 @@
+import csv
+import io
+import json
+from datetime import timedelta
+from io import StringIO
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from model_bakery import baker
+
+from ticket import export
+from ticket.models import Ticket, Messages
+
+
+class TestExport(TestCase):
+
+    def setUp(self):
+        self.alice = baker.make(User, username='alice')
+        self.tickets = baker.make(Ticket, user=self.alice, subject='printer, "jammed"', _quantity=5)
+        baker.make(Messages, ticket=self.tickets[0], content='first', _quantity=2)
+        baker.make(Ticket, status='Closed', _quantity=2)
+
+    def test_chunks_are_bounded(self):
+        with self.assertNumQueries(3 + 1):
+            chunks = list(export.iter_chunks(Ticket.objects.all(), chunk_size=3))
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 3, 1])
+
+    def test_messages_are_read_in_batches(self):
+        baker.make(Messages, ticket=self.tickets[2], content='second', _quantity=3)
+        # Four ticket chunks (the last empty) and message batches of three:
+        # two for the first chunk, one for each of the others.
+        with self.assertNumQueries(4 + 4):
+            threads = [(ticket['id'], [message['content'] for message in messages])
+                       for ticket, messages in export.iter_threads(Ticket.objects.all(), chunk_size=3)]
+        self.assertEqual(threads[0], (self.tickets[0].id, ['first', 'first']))
+        self.assertEqual(threads[1], (self.tickets[1].id, []))
+        self.assertEqual(threads[2], (self.tickets[2].id, ['second'] * 3))
+        self.assertEqual(len(threads), 7)
+
+    def test_csv_formulas_are_escaped(self):
+        Ticket.objects.filter(pk=self.tickets[0].pk).update(subject='=HYPERLINK("x")', description="'-1")
+        Messages.objects.filter(ticket=self.tickets[0]).update(content='@SUM(A1)')
+        content = ''.join(export.stream(Ticket.objects.filter(pk=self.tickets[0].pk), 'csv', True))
+        row = next(csv.DictReader(io.StringIO(content)))
+        self.assertEqual((row['subject'], row['description'], row['message_content']),
+                         ('\'=HYPERLINK("x")', "''-1", "'@SUM(A1)"))
+        for value in ('=1', "'=1", "''+1", "'", 'plain', "'quoted"):
+            self.assertEqual(export.csv_unescape(export.csv_escape(value)), value)
+
+    def test_csv_with_messages(self):
+        content = ''.join(export.stream(Ticket.objects.filter(user=self.alice), 'csv', True, chunk_size=2))
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0]['subject'], 'printer, "jammed"')
+        self.assertEqual(rows[0]['message_content'], 'first')
+        self.assertEqual(rows[-1]['message_id'], '')
+
+    def test_empty_csv_has_header(self):
+        content = ''.join(export.stream(Ticket.objects.none(), 'csv'))
+        self.assertTrue(content.startswith('id,subject,'))
+
+    def test_filters(self):
+        Ticket.objects.filter(pk=self.tickets[0].pk).update(created_at=timezone.now() - timedelta(days=10))
+        today = timezone.localdate()
+        queryset = export.filter_tickets(username='alice', created_after=today - timedelta(days=1),
+                                         created_before=today)
+        self.assertEqual(queryset.count(), 4)
+        self.assertEqual(export.filter_tickets(status='Closed').count(), 2)
+
+    def test_command_writes_jsonl(self):
+        out = StringIO()
+        call_command('export_tickets', format='jsonl', messages=True, user='alice', stdout=out)
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(lines), 5)
+        self.assertEqual([message['content'] for message in lines[0]['messages']], ['first', 'first'])
+
+
+class TestExportView(TestCase):
+
+    def setUp(self):
+        self.staff = baker.make(User, is_staff=True)
+        baker.make(Ticket, _quantity=3)
+
+    def test_staff_only(self):
+        self.client.force_login(baker.make(User))
+        self.assertRedirects(self.client.get(reverse('ticket:ticket-export')), reverse('home:home'))
+
+    def test_streams_csv(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('ticket:ticket-export'), {'status': 'Open'})
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment;', response['Content-Disposition'])
+        self.assertEqual(len(b''.join(response.streaming_content).decode().splitlines()), 4)
+
+    def test_invalid_filters(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('ticket:ticket-export'), {'created_after': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_streams_under_asgi(self):
+        await sync_to_async(self.async_client.force_login)(self.staff)
+        response = await self.async_client.get(reverse('ticket:ticket-export'), {'format': 'jsonl'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = [line async for chunk in response.streaming_content for line in chunk.decode().splitlines()]
+        self.assertEqual(len(lines), 3)
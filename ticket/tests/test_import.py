@@ -0,0 +1,102 @@
+import json
+import os
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+
+from ticket import counters, export, importer
+from ticket.models import ImportCheckpoint, Messages, Ticket, TicketEvent
+
+CREATED = datetime(2020, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc)
+
+
+def record(number, **kwargs):
+    return dict({
+        'subject': f'ticket {number}',
+        'description': 'from the old helpdesk',
+        'user': f'customer{number % 3}',
+        'status': 'Closed' if number % 2 else 'Open',
+        'created_at': CREATED.isoformat(),
+        'messages': [
+            {'sender': f'customer{number % 3}', 'content': 'hello', 'created_at': '2020-01-02T04:00:00+00:00'},
+            {'sender': 'agent', 'content': 'hi', 'is_admin_response': True,
+             'created_at': '2020-01-02T05:00:00+00:00'},
+        ] if number % 2 else [],
+    }, **kwargs)
+
+
+class TestImport(TestCase):
+
+    def setUp(self):
+        self.existing = baker.make(User, username='customer0')
+
+    def test_batched_import(self):
+        stats = importer.import_tickets([record(number) for number in range(10)], 'test', batch_size=4)
+        self.assertEqual((stats['records'], stats['tickets'], stats['messages']), (10, 10, 10))
+        self.assertEqual(User.objects.filter(username__startswith='customer').count(), 3)
+        self.assertFalse(User.objects.get(username='agent').has_usable_password())
+        ticket = Ticket.objects.get(subject='ticket 1')
+        self.assertEqual(ticket.created_at, CREATED)
+        self.assertEqual(ticket.updated_at, CREATED)
+        self.assertEqual(ticket.message_count, 2)
+        self.assertTrue(ticket.last_message_is_admin)
+        self.assertIsNone(ticket.waiting_since)
+        self.assertEqual(Ticket.objects.get(subject='ticket 2').waiting_since, CREATED)
+        self.assertEqual(Messages.objects.filter(ticket=ticket).earliest('created_at').created_at.hour, 4)
+        self.assertEqual(counters.get_counts(), {'open': 5, 'in_progress': 0, 'closed': 5, 'total': 10})
+        self.assertEqual(counters.rebuild(), [])
+        self.assertEqual(TicketEvent.objects.count(), 20)
+        self.assertEqual(ImportCheckpoint.objects.get(source='test').records, 10)
+
+    def test_queries_per_batch_do_not_grow(self):
+        importer.import_tickets([record(number) for number in range(6)], 'warm-up')
+        with CaptureQueriesContext(connection) as queries:
+            marks = []
+            importer.import_tickets([record(number) for number in range(30)], 'batches', batch_size=10,
+                                    progress=lambda stats: marks.append(len(queries)))
+        self.assertEqual(marks[1] - marks[0], marks[2] - marks[1])
+        self.assertLess(marks[1] - marks[0], 20)
+
+    def test_resume_after_bad_record(self):
+        records = [record(number) for number in range(6)]
+        records[4]['status'] = 'Lost'
+        with self.assertRaises(importer.ImportRecordError) as raised:
+            importer.import_tickets(records, 'resume', batch_size=2)
+        self.assertEqual(raised.exception.number, 5)
+        self.assertEqual(Ticket.objects.count(), 4)
+        records[4]['status'] = 'Open'
+        stats = importer.import_tickets(records, 'resume', batch_size=2, resume=True)
+        self.assertEqual((stats['records'], stats['tickets']), (6, 2))
+        self.assertEqual(Ticket.objects.count(), 6)
+
+    def test_export_round_trip(self):
+        importer.import_tickets([record(number) for number in range(3)] + [record(3, description='=1+1')],
+                                'original')
+        originals = list(Ticket.objects.values_list('pk', flat=True))
+        for fmt in ('csv', 'jsonl'):
+            with self.subTest(fmt=fmt):
+                content = ''.join(export.stream(Ticket.objects.filter(pk__in=originals), fmt, True))
+                records = list(importer.READERS[fmt](StringIO(content)))
+                stats = importer.import_tickets(records, f'copy-{fmt}')
+                self.assertEqual((stats['tickets'], stats['messages']), (4, 4))
+        self.assertEqual(Ticket.objects.filter(subject='ticket 1', created_at=CREATED).count(), 3)
+        self.assertEqual(Ticket.objects.filter(description='=1+1').count(), 3)
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'tickets.jsonl')
+            with open(path, 'w') as output:
+                output.writelines(json.dumps(record(number)) + '\n' for number in range(3))
+            out = StringIO()
+            call_command('import_tickets', path, batch_size=2, stdout=out)
+            self.assertIn('rows/s', out.getvalue())
+            self.assertEqual(Ticket.objects.count(), 3)
+            with self.assertRaises(CommandError):
+                call_command('import_tickets', os.path.join(directory, 'tickets.xml'), stdout=out)
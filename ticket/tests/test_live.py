@@ -0,0 +1,106 @@
+import asyncio
+import threading
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.test import TestCase, SimpleTestCase, override_settings
+from django.urls import reverse
+from model_bakery import baker
+
+from ticket import live
+from ticket.models import Ticket, Messages
+from ticket.pubsub import InProcessBroker, get_broker, ticket_channel
+
+
+class TestInProcessBroker(SimpleTestCase):
+
+    async def test_publish_from_another_thread(self):
+        broker = InProcessBroker()
+        async with broker.subscribe('channel') as subscription:
+            thread = threading.Thread(target=broker.publish, args=('channel', {'event': 'status'}))
+            thread.start()
+            self.assertEqual(await subscription.get(timeout=1), {'event': 'status'})
+            thread.join()
+            self.assertIsNone(await subscription.get(timeout=0.01))
+        self.assertEqual(broker.subscriber_count('channel'), 0)
+
+    async def test_slow_subscriber_overflows(self):
+        broker = InProcessBroker()
+        broker.queue_size = 1
+        async with broker.subscribe('channel') as subscription:
+            broker.publish('channel', {'event': 'a'})
+            broker.publish('channel', {'event': 'b'})
+            await asyncio.sleep(0)
+            self.assertTrue(subscription.overflowed)
+
+
+@override_settings(TICKET_EVENTS_MAX_AGE=0.2, TICKET_EVENTS_HEARTBEAT=0.05)
+class TestTicketEventsView(TestCase):
+
+    def setUp(self):
+        self.owner = baker.make(User)
+        self.ticket = baker.make(Ticket, user=self.owner)
+        self.first, self.second = baker.make(Messages, ticket=self.ticket, _quantity=2)
+        self.url = reverse('ticket:ticket-events', args=(self.ticket.id,))
+
+    async def read_stream(self, response, publish=None):
+        chunks = []
+        async for chunk in response.streaming_content:
+            chunks.append(chunk.decode())
+            if publish and len(chunks) == 1:
+                await sync_to_async(publish)()
+        return ''.join(chunks)
+
+    def test_wsgi_answers_no_content(self):
+        self.client.force_login(self.owner)
+        self.assertEqual(self.client.get(self.url).status_code, 204)
+
+    async def test_stream_catches_up_and_pushes_status(self):
+        await sync_to_async(self.async_client.force_login)(self.owner)
+        response = await self.async_client.get(self.url, {'last_event_id': self.first.id})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        def close_ticket():
+            with self.captureOnCommitCallbacks(execute=True):
+                ticket = Ticket.objects.get(id=self.ticket.id)
+                ticket.status = 'Closed'
+                ticket.save()
+
+        body = await self.read_stream(response, publish=close_ticket)
+        self.assertIn(f'id: {self.second.id}\nevent: message', body)
+        self.assertNotIn(f'id: {self.first.id}\n', body)
+        self.assertIn('event: status\ndata: {"status": "Closed"}', body)
+        self.assertIn(': keep-alive', body)
+        self.assertEqual(get_broker().subscriber_count(ticket_channel(self.ticket.id)), 0)
+
+    async def test_database_connection_is_closed_before_waiting(self):
+        await sync_to_async(self.async_client.force_login)(self.owner)
+        response = await self.async_client.get(self.url, {'last_event_id': self.first.id})
+        with mock.patch.object(live, 'connection') as connection:
+            chunks = []
+            async for chunk in response.streaming_content:
+                chunks.append((chunk.decode(), connection.close.call_count))
+        self.assertTrue(chunks[1][0].startswith(f'id: {self.second.id}\n'))
+        self.assertEqual(chunks[1][1], 0)
+        self.assertEqual(chunks[-1], (': keep-alive\n\n', 1))
+
+    async def test_streams_are_capped_per_process(self):
+        await sync_to_async(self.async_client.force_login)(self.owner)
+        with self.settings(TICKET_EVENTS_MAX_STREAMS=1):
+            first = await self.async_client.get(self.url)
+            chunks = aiter(first.streaming_content)
+            await anext(chunks)
+            self.assertEqual(live.open_streams(), 1)
+            refused = await self.async_client.get(self.url)
+            self.assertEqual(refused.status_code, 503)
+            self.assertEqual(refused['Retry-After'], '3')
+            await self.read_stream(first)
+            self.assertEqual(live.open_streams(), 0)
+            self.assertEqual((await self.async_client.get(self.url)).status_code, 200)
+
+    async def test_other_users_are_redirected(self):
+        other = await sync_to_async(baker.make)(User)
+        await sync_to_async(self.async_client.force_login)(other)
+        response = await self.async_client.get(self.url)
+        self.assertRedirects(response, reverse('home:home'), fetch_redirect_response=False)
@@ -0,0 +1,121 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from model_bakery import baker
+
+from ticket import checks, metrics
+from ticket.models import Ticket
+
+
+class TestMetrics(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(metrics, 'registry', metrics.Registry())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = baker.make(User)
+        self.staff = baker.make(User, is_staff=True)
+
+    def scrape(self, **headers):
+        if 'HTTP_AUTHORIZATION' not in headers:
+            self.client.force_login(self.staff)
+        response = self.client.get(reverse('metrics'), **headers)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_requests_and_queries(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('home:home'))
+        body = self.scrape()
+        self.assertIn('ticket_http_requests_total{view="home:home",method="GET",status="200"} 1', body)
+        self.assertIn('ticket_http_request_duration_seconds_count{view="home:home",method="GET"} 1', body)
+        self.assertIn('ticket_http_request_duration_seconds_bucket{view="home:home",method="GET",le="+Inf"} 1', body)
+        self.assertIn('ticket_db_queries_total{view="home:home"}', body)
+        self.assertIn('# TYPE ticket_http_request_duration_seconds histogram', body)
+
+    def test_histogram_buckets_are_cumulative(self):
+        for value in (0.003, 0.2, 20):
+            metrics.registry.observe('ticket_http_request_duration_seconds', (('view', 'v'),), value, (0.01, 1))
+        body = metrics.exposition(metrics.registry.snapshot())
+        lines = [line for line in body.splitlines() if line.startswith('ticket_http_request_duration_seconds_bucket')]
+        self.assertEqual(lines, [
+            'ticket_http_request_duration_seconds_bucket{view="v",le="0.01"} 1',
+            'ticket_http_request_duration_seconds_bucket{view="v",le="1"} 2',
+            'ticket_http_request_duration_seconds_bucket{view="v",le="+Inf"} 3',
+        ])
+
+    def uploaded(self):
+        return metrics.collect()[('ticket_upload_bytes_total', (('kind', 'chunked'),))]
+
+    def test_processes_are_added_up(self):
+        metrics.upload_received('chunked', 100)
+        other = metrics.Registry()
+        other.inc('ticket_upload_bytes_total', (('kind', 'chunked'),), 50)
+        other.flush(force=True)
+        self.assertEqual(self.uploaded(), 150)
+
+    def test_stopped_process_is_folded_into_the_total(self):
+        stopped = metrics.Registry()
+        stopped.inc('ticket_upload_bytes_total', (('kind', 'chunked'),), 50)
+        stopped.flush(force=True)
+        # The lease of the stopped process lapses and a new worker takes its slot.
+        cache.delete(metrics.LEASE_KEY.format(stopped.slot))
+        metrics.upload_received('chunked', 100)
+        self.assertEqual(self.uploaded(), 150)
+        self.assertEqual(metrics.registry.slot, stopped.slot)
+        self.assertEqual(cache.get(metrics.TOTAL_KEY)['samples'],
+                         {('ticket_upload_bytes_total', (('kind', 'chunked'),)): 50})
+
+    def test_lapsed_process_moves_on_without_double_counting(self):
+        idle = metrics.Registry()
+        idle.inc('ticket_upload_bytes_total', (('kind', 'chunked'),), 50)
+        idle.flush(force=True)
+        cache.delete(metrics.LEASE_KEY.format(idle.slot))
+        self.assertEqual(self.uploaded(), 50)
+        idle.inc('ticket_upload_bytes_total', (('kind', 'chunked'),), 5)
+        idle.flush(force=True)
+        self.assertEqual(idle.slot, 2)
+        self.assertEqual(self.uploaded(), 55)
+
+    @override_settings(TICKET_METRICS_MAX_PROCESSES=1)
+    def test_slots_are_bounded(self):
+        metrics.registry.flush(force=True)
+        other = metrics.Registry()
+        with self.assertLogs('ticket.metrics', 'WARNING'):
+            other.flush(force=True)
+        self.assertIsNone(other.slot)
+
+    def test_process_local_cache_is_reported(self):
+        self.assertEqual([warning.id for warning in checks.check_shared_cache(None)], ['ticket.W001'])
+
+    def test_ticket_gauges_are_cached(self):
+        baker.make(Ticket, user=self.user, status='Open', _quantity=2)
+        baker.make(Ticket, user=self.user, status='Closed')
+        Ticket.objects.update(created_at=timezone.now() - timedelta(hours=1))
+        samples = metrics.collect()
+        self.assertEqual(samples[('ticket_tickets', (('status', 'Open'),))], 2)
+        self.assertEqual(samples[('ticket_tickets', (('status', 'Closed'),))], 1)
+        self.assertEqual(samples[('ticket_tickets', (('status', 'In Progress'),))], 0)
+        self.assertAlmostEqual(samples[('ticket_oldest_ticket_age_seconds', (('status', 'Open'),))], 3600, delta=60)
+        self.assertNotIn(('ticket_oldest_ticket_age_seconds', (('status', 'Closed'),)), samples)
+        with self.assertNumQueries(0):
+            metrics.collect()
+
+    def test_staff_only_without_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer None').status_code, 403)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.assertIn('ticket_tickets', self.scrape())
+
+    @override_settings(TICKET_METRICS_TOKEN='secret')
+    def test_token_required(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertIn('ticket_tickets', self.scrape(HTTP_AUTHORIZATION='Bearer secret'))
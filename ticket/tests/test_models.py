@@ -36,3 +36,16 @@ class TestTicketMessage(TestCase):
     def test_model_str(self):
         string = f'{self.ticket.user.username} - {self.ticket.id}'
         self.assertEqual(str(string), string)
+
+
+class TestTicketQuerySet(TestCase):
+
+    def setUp(self):
+        baker.make(Ticket, status='Open', _quantity=2)
+        baker.make(Ticket, status='Closed')
+
+    def test_today_stats_single_query(self):
+        with self.assertNumQueries(1):
+            stats = Ticket.objects.today_stats()
+        self.assertEqual(stats['created_today'], 3)
+        self.assertEqual(stats['closed_today'], 1)
@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from model_bakery import baker
+
+from ticket.models import Ticket
+from ticket.pagination import KeysetPaginator, decode_cursor
+
+
+class TestKeysetPaginator(TestCase):
+
+    def setUp(self):
+        now = timezone.now()
+        self.tickets = baker.make(Ticket, status='Closed', _quantity=7)
+        for index, ticket in enumerate(self.tickets):
+            Ticket.objects.filter(pk=ticket.pk).update(created_at=now - timedelta(minutes=index))
+        Ticket.objects.filter(pk=self.tickets[1].pk).update(created_at=now)
+        self.expected = list(Ticket.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.paginator = KeysetPaginator(Ticket.objects.for_status_list('Closed'), 3)
+
+    def test_walk_forward_and_back(self):
+        first = self.paginator.get_page()
+        second = self.paginator.get_page(after=first.next_cursor)
+        third = self.paginator.get_page(after=second.next_cursor)
+        seen = [ticket.id for page in (first, second, third) for ticket in page]
+        self.assertEqual(seen, self.expected)
+        self.assertFalse(first.has_previous)
+        self.assertFalse(third.has_next)
+
+        back = self.paginator.get_page(before=second.previous_cursor)
+        self.assertEqual([ticket.id for ticket in back], self.expected[:3])
+        self.assertFalse(back.has_previous)
+
+    def test_page_costs_one_query(self):
+        first = self.paginator.get_page()
+        with self.assertNumQueries(1):
+            page = self.paginator.get_page(after=first.next_cursor)
+            [ticket.user.username for ticket in page]
+
+    def test_invalid_cursor_returns_first_page(self):
+        self.assertIsNone(decode_cursor('not-a-cursor'))
+        page = self.paginator.get_page(after='not-a-cursor')
+        self.assertEqual([ticket.id for ticket in page], self.expected[:3])
+
+
+class TestStatusListViews(TestCase):
+
+    def setUp(self):
+        baker.make(Ticket, status='Open', _quantity=30)
+        self.client.force_login(baker.make(User, is_staff=True))
+
+    def test_open_list_is_paginated(self):
+        response = self.client.get(reverse('ticket:ticket-open-lists'))
+        self.assertEqual(len(response.context['open_list']), 25)
+        self.assertTrue(response.context['page'].has_next)
+        response = self.client.get(reverse('ticket:ticket-open-lists'),
+                                   {'after': response.context['page'].next_cursor})
+        self.assertEqual(len(response.context['open_list']), 5)
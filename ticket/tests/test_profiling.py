@@ -0,0 +1,90 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from model_bakery import baker
+
+from ticket import profiling
+from ticket.models import Ticket, Messages
+
+
+@override_settings(TICKET_PROFILING_SAMPLE_RATE=1.0, TICKET_PROFILING_BUDGETS={})
+class TestRequestProfiling(TestCase):
+
+    def setUp(self):
+        self.user = baker.make(User, is_staff=True)
+        self.ticket = baker.make(Ticket, user=self.user)
+        baker.make(Messages, ticket=self.ticket, _quantity=3)
+        self.profiles = []
+        profiling.request_profiled.connect(self.collect)
+        self.addCleanup(profiling.request_profiled.disconnect, self.collect)
+
+    def collect(self, profile, exceeded, **kwargs):
+        self.profiles.append((profile, exceeded))
+
+    def test_sync_view_profiled(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('home:home'))
+        profile, exceeded = self.profiles[-1]
+        self.assertEqual(profile.view_name, 'home:home')
+        self.assertGreater(profile.queries, 0)
+        self.assertGreater(profile.template_time, 0)
+        self.assertGreaterEqual(profile.duration, profile.query_time)
+        self.assertEqual(exceeded, [])
+        self.assertIn(f'"{profile.queries} queries"', response['Server-Timing'])
+
+    async def test_async_view_queries_attributed(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.get(reverse('ticket:ticket-detail', args=(self.ticket.id,)))
+        self.assertEqual(response.status_code, 200)
+        profile, _ = self.profiles[-1]
+        self.assertEqual(profile.view_name, 'ticket:ticket-detail')
+        self.assertGreater(profile.queries, 0)
+        self.assertIn('Server-Timing', response)
+
+    def test_timing_hidden_from_customers(self):
+        customer = baker.make(User)
+        self.client.force_login(customer)
+        self.assertNotIn('Server-Timing', self.client.get(reverse('home:home')))
+        self.client.logout()
+        self.assertNotIn('Server-Timing', self.client.get(reverse('home:home')))
+        with self.settings(DEBUG=True):
+            self.assertIn('Server-Timing', self.client.get(reverse('home:home')))
+        self.assertEqual(len(self.profiles), 3)
+
+    async def test_async_timing_hidden_from_customers(self):
+        ticket = await sync_to_async(baker.make)(Ticket, user=await sync_to_async(baker.make)(User))
+        await sync_to_async(self.async_client.force_login)(ticket.user)
+        response = await self.async_client.get(reverse('ticket:ticket-detail', args=(ticket.id,)))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(TICKET_PROFILING_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('home:home'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(self.profiles, [])
+
+    def test_budget_logged(self):
+        self.client.force_login(self.user)
+        with self.settings(TICKET_PROFILING_BUDGETS={'*': {'queries': 0}}), \
+                self.assertLogs('ticket.profiling', 'WARNING') as logs:
+            self.client.get(reverse('home:home'))
+        self.assertIn('home:home over budget: queries', logs.output[0])
+        self.assertTrue(self.profiles[-1][1])
+
+    def test_budget_raised(self):
+        self.client.force_login(self.user)
+        with self.settings(TICKET_PROFILING_BUDGETS={'home:home': {'queries': 0}}, TICKET_PROFILING_RAISE=True):
+            with self.assertRaises(profiling.BudgetExceeded):
+                self.client.get(reverse('home:home'))
+            self.client.get(reverse('ticket:ticket-detail', args=(self.ticket.id,)))
+
+    def test_duplicates(self):
+        with profiling.profiling() as profile:
+            list(Ticket.objects.all())
+            for _ in range(3):
+                User.objects.get(pk=self.user.pk)
+        self.assertEqual([count for _, count in profile.duplicates(threshold=3)], [3])
+        self.assertEqual(profile.duplicates(threshold=4), [])
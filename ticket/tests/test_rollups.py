@@ -0,0 +1,74 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from model_bakery import baker
+
+from ticket import rollups
+from ticket.models import DailyTicketStats, RollupWatermark, Ticket, TicketEvent
+
+
+@override_settings(TICKET_ROLLUP_OVERLAP=0)
+class TestDailyRollups(TestCase):
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.yesterday = self.now - timedelta(days=1)
+        self.ticket = baker.make(Ticket)
+        # Replace the creation event logged by the save with a dated one.
+        self.ticket.events.all().delete()
+        Ticket.objects.filter(pk=self.ticket.pk).update(created_at=self.yesterday - timedelta(hours=2))
+        self.log(TicketEvent.CREATED, self.yesterday - timedelta(hours=2), new_status='Open')
+        self.log(TicketEvent.ADMIN_REPLIED, self.yesterday)
+        self.log(TicketEvent.ADMIN_REPLIED, self.now)
+        self.log(TicketEvent.STATUS_CHANGED, self.now, old_status='Open', new_status='Closed')
+
+    def log(self, kind, created_at, **kwargs):
+        return TicketEvent.objects.create(ticket=self.ticket, kind=kind, created_at=created_at, **kwargs)
+
+    def test_days_are_aggregated(self):
+        self.assertEqual(rollups.rollup(), sorted({timezone.localdate(self.yesterday - timedelta(hours=2)),
+                                                   timezone.localdate(self.yesterday),
+                                                   timezone.localdate(self.now)}))
+        today = DailyTicketStats.objects.get(day=timezone.localdate(self.now))
+        self.assertEqual((today.closed, today.admin_replies, today.first_responses), (1, 1, 0))
+        replied = DailyTicketStats.objects.get(day=timezone.localdate(self.yesterday))
+        self.assertEqual(replied.first_responses, 1)
+        self.assertEqual(replied.median_first_response, timedelta(hours=2))
+        self.assertEqual(sum(DailyTicketStats.objects.values_list('opened', flat=True)), 1)
+
+    def test_watermark_limits_work(self):
+        rollups.rollup()
+        self.assertEqual(RollupWatermark.objects.get().position, TicketEvent.objects.latest('pk').pk)
+        self.assertEqual(rollups.rollup(), [])
+        # An event logged late for an old day is still picked up.
+        self.log(TicketEvent.STATUS_CHANGED, self.now - timedelta(days=10), old_status='Closed', new_status='Open')
+        self.assertEqual(rollups.rollup(), [timezone.localdate(self.now - timedelta(days=10))])
+        self.assertEqual(DailyTicketStats.objects.get(day=timezone.localdate(self.now - timedelta(days=10))).reopened, 1)
+
+    @override_settings(TICKET_ROLLUP_OVERLAP=3600)
+    def test_recent_events_are_revisited(self):
+        rollups.rollup()
+        self.assertLess(RollupWatermark.objects.get().position, TicketEvent.objects.latest('pk').pk)
+        self.assertEqual(rollups.rollup(), [timezone.localdate(self.now)])
+
+    def test_command_and_trend(self):
+        out = StringIO()
+        call_command('rollup_ticket_stats', stdout=out)
+        self.assertIn('day(s)', out.getvalue())
+        with self.assertNumQueries(1):
+            trend = rollups.trend(90)
+        self.assertEqual(len(trend), 90)
+        self.assertEqual(trend[-1].day, timezone.localdate())
+        self.assertEqual(trend[-1].closed, 1)
+
+    def test_dashboard_charts_trend(self):
+        rollups.rollup()
+        self.client.force_login(baker.make(User, is_staff=True))
+        response = self.client.get(reverse('home:admin'))
+        self.assertEqual(len(response.context['trend']), 90)
+        self.assertContains(response, 'Last 90 Days')
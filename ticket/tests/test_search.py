@@ -0,0 +1,62 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from model_bakery import baker
+
+from ticket import search
+from ticket.models import Ticket, Messages
+
+
+class TestTicketSearch(TestCase):
+
+    def setUp(self):
+        self.printer = baker.make(Ticket, subject='Printer jams', description='The office printer jams daily.')
+        self.login = baker.make(Ticket, subject='Cannot log in', description='Password reset mail never arrives.')
+        baker.make(Messages, ticket=self.login, content='The <b>printer</b> on floor two is fine now.')
+
+    def test_index_is_available(self):
+        self.assertTrue(search.is_available())
+
+    def test_matches_subject_description_and_messages(self):
+        results = search.search_tickets('printer')
+        self.assertEqual([result.ticket for result in results], [self.printer, self.login])
+
+    def test_snippet_is_escaped_and_highlighted(self):
+        result = search.search_tickets('floor')[0]
+        self.assertIn('<mark>floor</mark>', result.snippet)
+        self.assertIn('&lt;b&gt;', result.snippet)
+
+    def test_index_follows_updates_and_deletes(self):
+        self.printer.subject = 'Scanner broken'
+        self.printer.description = 'Nothing scans.'
+        self.printer.save()
+        self.assertEqual(search.matching_ticket_ids('scanner'), [self.printer.id])
+        self.assertEqual(search.matching_ticket_ids('jams'), [])
+        self.login.delete()
+        self.assertEqual(search.matching_ticket_ids('floor'), [])
+
+    def test_operators_are_matched_literally(self):
+        self.assertEqual(search.build_match_query('printer OR "x" NEAR'), '"printer" "OR" "x" "NEAR"*')
+        self.assertEqual(search.search_tickets('-- ()'), [])
+
+    def test_rebuild_command(self):
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('ticket_ticket_fts: 2 rows indexed.', out.getvalue())
+        self.assertEqual(len(search.search_tickets('printer')), 2)
+
+    def test_search_view_is_staff_only(self):
+        self.client.force_login(baker.make(User))
+        self.assertRedirects(self.client.get(reverse('ticket:ticket-search'), {'q': 'printer'}),
+                             reverse('home:home'))
+        self.client.force_login(baker.make(User, is_staff=True))
+        response = self.client.get(reverse('ticket:ticket-search'), {'q': 'printer'})
+        self.assertEqual(len(response.context['results']), 2)
+
+    def test_admin_search_uses_index(self):
+        self.client.force_login(baker.make(User, is_staff=True, is_superuser=True))
+        response = self.client.get(reverse('admin:ticket_ticket_changelist'), {'q': 'floor'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.login])
@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from model_bakery import baker
+
+from ticket.models import Ticket, Messages, Blob
+from ticket.storage import attachment_storage
+
+
+class TestContentAddressedStorage(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def upload(self, content=b'same screenshot', name='shot.PNG'):
+        return SimpleUploadedFile(name, content)
+
+    def test_identical_uploads_share_one_blob(self):
+        ticket = baker.make(Ticket, file=self.upload())
+        message = baker.make(Messages, ticket=ticket, file=self.upload(name='other.png'))
+        self.assertEqual(ticket.file.name, message.file.name)
+        self.assertTrue(ticket.file.name.startswith('blobs/') and ticket.file.name.endswith('.png'))
+        self.assertEqual(Blob.objects.get().ref_count, 2)
+        self.assertEqual(attachment_storage.open(ticket.file.name).read(), b'same screenshot')
+
+    def test_blob_deleted_with_last_reference(self):
+        ticket = baker.make(Ticket, file=self.upload())
+        other = baker.make(Ticket, file=self.upload())
+        path = ticket.file.path
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.delete()
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(Blob.objects.get().ref_count, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            other.file = self.upload(b'a new log')
+            other.save()
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(Blob.objects.get().name, other.file.name)
+
+    def test_migrate_existing_attachments(self):
+        legacy = [attachment_storage.path(f'tickets/2025/03/10/{name}') for name in ('a.log', 'b.log')]
+        for path in legacy:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as legacy_file:
+                legacy_file.write(b'duplicated log')
+        first = baker.make(Ticket)
+        second = baker.make(Messages)
+        Ticket.objects.filter(pk=first.pk).update(file='tickets/2025/03/10/a.log')
+        Messages.objects.filter(pk=second.pk).update(file='tickets/2025/03/10/b.log')
+
+        out = StringIO()
+        call_command('migrate_attachments', stdout=out)
+        self.assertIn('Migrated 2 attachment(s) (28 bytes) into 1 blob(s) (14 bytes)', out.getvalue())
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(Blob.objects.get(name=first.file.name).ref_count, 2)
+        self.assertFalse(any(os.path.exists(path) for path in legacy))
+
+    def test_storage_streams_content_file(self):
+        name = attachment_storage.save('notes.txt', ContentFile(b'x' * 200000))
+        self.assertEqual(attachment_storage.size(name), 200000)
+        self.assertFalse([entry for entry in os.listdir(os.path.join(self.media_root, 'blobs'))
+                          if entry.startswith('.upload-')])
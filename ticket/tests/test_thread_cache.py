@@ -0,0 +1,80 @@
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db.models import Max
+from django.test import TestCase
+from django.urls import reverse
+from model_bakery import baker
+
+from ticket import metrics, thread_cache
+from ticket.models import Ticket, Messages
+
+
+class TestThreadCache(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(metrics, 'registry', metrics.Registry())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = baker.make(User)
+        self.ticket = baker.make(Ticket, user=self.user)
+        baker.make(Messages, ticket=self.ticket, content='first answer')
+        self.url = reverse('ticket:ticket-detail', args=(self.ticket.id,))
+        self.client.force_login(self.user)
+
+    def test_unchanged_ticket_skips_message_queries(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(4):
+            # Ticket, session, user and navbar counters; no message query.
+            response = self.client.get(self.url)
+        self.assertContains(response, 'first answer')
+        self.assertEqual(thread_cache.stats(), {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+    def test_new_message_invalidates_thread(self):
+        self.client.get(self.url)
+        baker.make(Messages, ticket=self.ticket, content='second answer')
+        self.assertContains(self.client.get(self.url), 'second answer')
+
+    def test_status_change_invalidates_thread(self):
+        self.client.get(self.url)
+        self.ticket.status = 'Closed'
+        self.ticket.save()
+        response = self.client.get(self.url)
+        self.assertEqual(thread_cache.stats()['misses'], 2)
+        self.assertContains(response, 'Open Ticket')
+
+    def test_message_edit_and_delete_invalidate_thread(self):
+        message = self.ticket.messages.get()
+        self.client.get(self.url)
+        message.content = 'edited answer'
+        message.save()
+        self.assertContains(self.client.get(self.url), 'edited answer')
+        message.delete()
+        self.assertNotContains(self.client.get(self.url), 'edited answer')
+
+    def test_key_follows_the_ticket(self):
+        def key():
+            tickets = Ticket.objects.annotate(messages_updated_at=Max('messages__updated_at'))
+            return thread_cache.fragment_key(tickets.get(pk=self.ticket.pk))
+
+        first = key()
+        self.assertEqual(key(), first)
+        baker.make(Messages, ticket=self.ticket)
+        self.assertNotEqual(key(), first)
+
+    def test_stats_command(self):
+        with self.assertRaises(CommandError):
+            call_command('thread_cache_stats')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with self.settings(CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory.name}}):
+            self.client.get(self.url)
+            out = StringIO()
+            call_command('thread_cache_stats', stdout=out)
+        self.assertIn('Hits: 0, misses: 1, hit ratio: 0.0%', out.getvalue())
@@ -0,0 +1,55 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from model_bakery import baker
+
+from ticket.models import Ticket, Messages
+
+
+class TestThreadMetadata(TestCase):
+
+    def setUp(self):
+        self.user = baker.make(User)
+        self.ticket = baker.make(Ticket, user=self.user)
+
+    def test_messages_update_ticket(self):
+        self.client.force_login(self.user)
+        self.client.post(reverse('ticket:ticket-detail', args=(self.ticket.id,)), {'content': 'question'})
+        staff_message = baker.make(Messages, ticket=self.ticket, is_admin_response=True)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.message_count, 2)
+        self.assertEqual(self.ticket.last_message_at, staff_message.created_at)
+        self.assertTrue(self.ticket.last_message_is_admin)
+
+    def test_deleting_a_message_recomputes(self):
+        first = baker.make(Messages, ticket=self.ticket)
+        baker.make(Messages, ticket=self.ticket, is_admin_response=True).delete()
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.message_count, 1)
+        self.assertEqual(self.ticket.last_message_at, first.created_at)
+        self.assertFalse(self.ticket.last_message_is_admin)
+
+    def test_deleting_ticket_skips_recomputation(self):
+        baker.make(Messages, ticket=self.ticket, _quantity=3)
+        with CaptureQueriesContext(connection) as queries:
+            self.ticket.delete()
+        self.assertFalse(Ticket.objects.exists())
+        self.assertFalse([q for q in queries if q['sql'].startswith('UPDATE "ticket_ticket"')])
+
+    def test_backfill_command(self):
+        messages = baker.make(Messages, ticket=self.ticket, _quantity=3)
+        other = baker.make(Ticket)
+        Ticket.objects.update(message_count=0, last_message_at=None, last_message_is_admin=True)
+        out = StringIO()
+        call_command('backfill_thread_metadata', '--batch-size', '1', stdout=out)
+        self.assertIn('Backfilled thread metadata of 2 ticket(s).', out.getvalue())
+        self.ticket.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.ticket.message_count, self.ticket.last_message_at, self.ticket.last_message_is_admin),
+                         (3, messages[-1].created_at, False))
+        self.assertEqual((other.message_count, other.last_message_at, other.last_message_is_admin), (0, None, False))
@@ -0,0 +1,86 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from model_bakery import baker
+
+from ticket import counters, transitions
+from ticket.models import Ticket, Messages
+
+
+class TestTransitions(TestCase):
+
+    def setUp(self):
+        self.user = baker.make(User)
+        self.ticket = baker.make(Ticket, user=self.user)
+
+    def test_update_writes_status_only(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(transitions.transition(self.ticket, 'Closed'))
+        update = next(query['sql'] for query in queries if query['sql'].startswith('UPDATE "ticket_ticket"'))
+        self.assertNotIn('description', update)
+        self.assertEqual(Ticket.objects.get(pk=self.ticket.pk).status, 'Closed')
+        self.assertEqual(counters.get_counts(self.user), {'open': 0, 'in_progress': 0, 'closed': 1, 'total': 1})
+
+    def test_stale_transition_loses(self):
+        other = Ticket.objects.get(pk=self.ticket.pk)
+        self.assertTrue(transitions.transition(self.ticket, 'Closed'))
+        self.assertFalse(transitions.transition(other, 'In Progress'))
+        self.assertEqual(Ticket.objects.get(pk=self.ticket.pk).status, 'Closed')
+        self.assertEqual(counters.get_counts(), {'open': 0, 'in_progress': 0, 'closed': 1, 'total': 1})
+
+    def test_disallowed_transition(self):
+        self.ticket.status = 'Closed'
+        self.ticket.save()
+        self.assertFalse(transitions.transition(self.ticket, 'In Progress'))
+        self.assertFalse(transitions.transition(self.ticket, 'Closed'))
+
+    def test_status_changed_signal(self):
+        received = []
+
+        def receiver(**kwargs):
+            received.append((kwargs['ticket_id'], kwargs['old_status'], kwargs['new_status']))
+
+        transitions.status_changed.connect(receiver, sender=Ticket)
+        self.addCleanup(transitions.status_changed.disconnect, receiver, sender=Ticket)
+        transitions.transition(self.ticket, 'In Progress')
+        self.ticket.status = 'Closed'
+        self.ticket.save()
+        self.assertEqual(received, [(self.ticket.id, 'Open', 'In Progress'), (self.ticket.id, 'In Progress', 'Closed')])
+
+    def test_reopen_restarts_wait(self):
+        baker.make(Messages, ticket=self.ticket, is_admin_response=True)
+        transitions.transition(self.ticket, 'Closed')
+        self.assertTrue(transitions.transition(self.ticket, 'Open'))
+        self.ticket.refresh_from_db()
+        self.assertIsNotNone(self.ticket.waiting_since)
+
+
+class TestTransitionViews(TestCase):
+
+    def setUp(self):
+        self.user = baker.make(User)
+        self.staff = baker.make(User, is_staff=True)
+        self.ticket = baker.make(Ticket, user=self.user)
+
+    def test_close_and_reopen(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('ticket:ticket-close', args=(self.ticket.id,)))
+        self.assertRedirects(response, self.ticket.get_absolute_url(), fetch_redirect_response=False)
+        response = self.client.post(reverse('ticket:ticket-close', args=(self.ticket.id,)) + '?format=json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json(), {'changed': False, 'status': 'Closed'})
+        response = self.client.post(reverse('ticket:ticket-open', args=(self.ticket.id,)) + '?format=json')
+        self.assertEqual(response.json(), {'changed': True, 'status': 'Open'})
+
+    def test_in_progress_is_staff_only(self):
+        self.client.force_login(self.user)
+        self.client.post(reverse('ticket:ticket-in-progress', args=(self.ticket.id,)))
+        self.assertEqual(Ticket.objects.get(pk=self.ticket.pk).status, 'Open')
+        self.client.force_login(self.staff)
+        self.assertContains(self.client.get(reverse('ticket:ticket-in-progress', args=(self.ticket.id,))),
+                            'Mark In Progress')
+        response = self.client.post(reverse('ticket:ticket-in-progress', args=(self.ticket.id,)) + '?format=json')
+        self.assertEqual(response.json(), {'changed': True, 'status': 'In Progress'})
+        self.assertEqual(counters.get_counts()['in_progress'], 1)
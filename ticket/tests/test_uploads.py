@@ -0,0 +1,130 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from model_bakery import baker
+
+from ticket import uploads
+from ticket.models import Ticket, Messages, ChunkedUpload
+
+
+class TestChunkedUploads(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root, TICKET_UPLOAD_TEMP_DIR=os.path.join(self.media_root, 'partial'),
+            TICKET_UPLOAD_CHUNK_SIZE=4)
+        self.settings_override.enable()
+        self.user = baker.make(User)
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def start(self, size=10):
+        response = self.client.post(reverse('ticket:upload-start'), {'filename': '../dump.bin', 'size': size})
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def put(self, url, offset, data):
+        return self.client.generic('PUT', url, data, content_type='application/octet-stream',
+                                   HTTP_UPLOAD_OFFSET=str(offset))
+
+    def upload(self, content=b'0123456789'):
+        upload = self.start(len(content))
+        for offset in range(0, len(content), 4):
+            self.assertEqual(self.put(upload['url'], offset, content[offset:offset + 4]).status_code, 200)
+        return upload
+
+    def test_chunks_are_appended_in_order(self):
+        upload = self.start()
+        self.assertEqual(upload['chunk_size'], 4)
+        self.put(upload['url'], 0, b'0123')
+        response = self.put(upload['url'], 8, b'89')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 4)
+        self.assertEqual(self.put(upload['url'], 4, b'45678').status_code, 413)
+        self.put(upload['url'], 4, b'4567')
+        self.assertEqual(self.client.get(upload['url']).json(), {'offset': 8, 'size': 10, 'complete': False})
+        self.put(upload['url'], 8, b'89')
+        self.assertTrue(self.client.get(upload['url']).json()['complete'])
+        with open(uploads.temp_path(upload['id']), 'rb') as file:
+            self.assertEqual(file.read(), b'0123456789')
+
+    def test_duplicate_chunk_is_rejected(self):
+        upload = uploads.start(self.user, 'dump.bin', 10)
+
+        class Stream(BytesIO):
+            def read(self, size=-1):
+                # A retry of the same chunk is stored while this body is still arriving.
+                if not self.tell():
+                    uploads.append(upload, 0, BytesIO(b'0123'), 4)
+                return super().read(size)
+
+        with self.assertRaises(uploads.UploadError) as raised:
+            uploads.append(upload, 0, Stream(b'abcd'), 4)
+        self.assertEqual(raised.exception.status, 409)
+        self.assertEqual(ChunkedUpload.objects.get().offset, 4)
+        with open(uploads.temp_path(upload.id), 'rb') as file:
+            self.assertEqual(file.read(), b'0123')
+
+    def test_uploads_are_private(self):
+        upload = self.start()
+        self.client.force_login(baker.make(User))
+        self.assertEqual(self.client.get(upload['url']).status_code, 404)
+        self.assertEqual(self.put(upload['url'], 0, b'0123').status_code, 404)
+
+    def test_oversized_upload_is_rejected(self):
+        with self.settings(TICKET_UPLOAD_MAX_SIZE=5):
+            response = self.client.post(reverse('ticket:upload-start'), {'filename': 'dump.bin', 'size': 6})
+        self.assertEqual(response.status_code, 413)
+
+    def test_completed_upload_creates_ticket(self):
+        upload = self.upload()
+        response = self.client.post(reverse('ticket:ticket-create'),
+                                    {'subject': 'crash', 'description': 'dump attached', 'upload': upload['id']})
+        ticket = Ticket.objects.get()
+        self.assertRedirects(response, reverse('ticket:ticket-detail', args=(ticket.id,)))
+        self.assertTrue(ticket.file.name.endswith('.bin'))
+        self.assertEqual(ticket.file.read(), b'0123456789')
+        self.assertFalse(ChunkedUpload.objects.exists())
+        self.assertFalse(os.path.exists(uploads.temp_path(upload['id'])))
+
+    def test_completed_upload_attached_to_message(self):
+        ticket = baker.make(Ticket, user=self.user)
+        upload = self.upload()
+        self.client.post(reverse('ticket:ticket-detail', args=(ticket.id,)),
+                         {'content': 'log attached', 'upload': upload['id']})
+        self.assertEqual(Messages.objects.get(ticket=ticket).file.read(), b'0123456789')
+
+    def test_incomplete_upload_is_refused(self):
+        upload = self.start()
+        self.put(upload['url'], 0, b'0123')
+        response = self.client.post(reverse('ticket:ticket-create'),
+                                    {'subject': 'crash', 'description': 'dump', 'upload': upload['id']})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_cleanup_removes_abandoned_uploads(self):
+        stale = self.start()
+        fresh = self.start()
+        ChunkedUpload.objects.filter(id=stale['id']).update(updated_at=timezone.now() - timedelta(days=2))
+        orphan = uploads.temp_path('orphan')
+        open(orphan, 'wb').close()
+        os.utime(orphan, (0, 0))
+
+        out = StringIO()
+        call_command('cleanup_uploads', stdout=out)
+        self.assertIn('Removed 1 abandoned upload(s) and 1 orphaned', out.getvalue())
+        self.assertEqual(str(ChunkedUpload.objects.get().id), fresh['id'])
+        self.assertFalse(os.path.exists(uploads.temp_path(stale['id'])))
+        self.assertFalse(os.path.exists(orphan))
@@ -0,0 +1,83 @@
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from model_bakery import baker
+
+from ticket import user_cache
+
+
+class TestUserCache(TestCase):
+
+    def setUp(self):
+        # The user cache is only used with a cache shared between processes.
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        shared = self.settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory.name}})
+        shared.enable()
+        self.addCleanup(shared.disable)
+        self.user = baker.make(User)
+        self.user.set_password('secret')
+        self.user.save()
+        self.client.force_login(self.user)
+        self.url = reverse('home:home')
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        return response, [query for query in context.captured_queries if '"auth_user"' in query['sql']]
+
+    def test_steady_state_has_no_user_query(self):
+        response, queries = self.user_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        response, queries = self.user_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+
+    def test_process_local_cache_is_bypassed(self):
+        with self.settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            for _ in range(2):
+                response, queries = self.user_queries()
+                self.assertEqual(response.wsgi_request.user, self.user)
+                self.assertEqual(len(queries), 1)
+            self.assertIsNone(cache.get(user_cache.USER_KEY.format(self.user.pk)))
+
+    def test_staff_flag_change_is_seen(self):
+        self.client.get(self.url)
+        self.assertRedirects(self.client.get(reverse('home:admin')), reverse('home:home'))
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('home:admin')).status_code, 200)
+
+    def test_password_change_ends_other_sessions(self):
+        self.client.get(self.url)
+        self.user.set_password('changed')
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+    def test_deactivation_ends_sessions(self):
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+    def test_stale_entry_with_other_hash_is_ignored(self):
+        self.client.get(self.url)
+        other = baker.make(User)
+        cache.set(user_cache.USER_KEY.format(self.user.pk), other)
+        response = self.client.get(self.url)
+        self.assertEqual(response.wsgi_request.user, self.user)
+
+    def test_update_needs_explicit_invalidation(self):
+        self.client.get(self.url)
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        user_cache.invalidate([self.user.pk])
+        self.assertEqual(self.client.get(reverse('home:admin')).status_code, 200)
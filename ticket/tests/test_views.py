@@ -0,0 +1,89 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from model_bakery import baker
+
+from ticket.models import Ticket, Messages
+from ticket.tests.utils import QueryBudgetMixin
+
+
+class TestStatusListQueries(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        self.staff = baker.make(User, is_staff=True)
+        self.client.force_login(self.staff)
+
+    def test_lists_query_budget(self):
+        for status, url_name in (('Open', 'ticket:ticket-open-lists'),
+                                 ('In Progress', 'ticket:ticket-in-progress-lists'),
+                                 ('Closed', 'ticket:ticket-close-lists')):
+            with self.subTest(status=status):
+                baker.make(Ticket, status=status, _quantity=2)
+                self.assertQueriesDoNotGrow(
+                    lambda: self.client.get(reverse(url_name)),
+                    lambda: baker.make(Ticket, status=status, _quantity=20),
+                    limit=5,
+                )
+
+
+class TestAdminQueries(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        self.client.force_login(baker.make(User, is_staff=True, is_superuser=True))
+
+    def test_changelist_query_budget(self):
+        baker.make(Ticket, _quantity=2)
+        self.assertQueriesDoNotGrow(
+            lambda: self.client.get(reverse('admin:ticket_ticket_changelist')),
+            lambda: baker.make(Ticket, _quantity=20),
+            limit=10,
+        )
+
+    def test_change_view_query_budget(self):
+        ticket = baker.make(Ticket)
+        baker.make(Messages, ticket=ticket, sender=ticket.user, _quantity=2)
+        self.assertQueriesDoNotGrow(
+            lambda: self.client.get(reverse('admin:ticket_ticket_change', args=[ticket.pk])),
+            lambda: baker.make(Messages, ticket=ticket, sender=ticket.user, _quantity=20),
+            limit=15,
+        )
+
+
+class TestTicketDetailView(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        self.user = baker.make(User)
+        self.ticket = baker.make(Ticket, user=self.user)
+        self.messages = [baker.make(Messages, ticket=self.ticket, sender=self.user) for _ in range(25)]
+        self.client.force_login(self.user)
+
+    def test_detail_renders_newest_page(self):
+        response = self.client.get(reverse('ticket:ticket-detail', args=[self.ticket.id]))
+        self.assertEqual([m.id for m in response.context['thread']], [m.id for m in self.messages[5:]])
+        self.assertIsNotNone(response.context['older_cursor'])
+
+    def test_detail_query_budget(self):
+        self.assertQueriesDoNotGrow(
+            lambda: self.client.get(reverse('ticket:ticket-detail', args=[self.ticket.id])),
+            lambda: baker.make(Messages, ticket=self.ticket, _quantity=20),
+            limit=8,
+        )
+
+    def test_older_messages_fragment(self):
+        cursor = self.client.get(reverse('ticket:ticket-detail', args=[self.ticket.id])).context['older_cursor']
+        response = self.client.get(reverse('ticket:ticket-messages', args=[self.ticket.id]), {'after': cursor})
+        self.assertEqual([m.id for m in response.context['thread']], [m.id for m in self.messages[:5]])
+        self.assertNotIn('X-Older-Cursor', response)
+
+    def test_older_messages_json(self):
+        cursor = self.client.get(reverse('ticket:ticket-detail', args=[self.ticket.id])).context['older_cursor']
+        response = self.client.get(reverse('ticket:ticket-messages', args=[self.ticket.id]),
+                                   {'after': cursor, 'format': 'json'})
+        data = response.json()
+        self.assertEqual([m['id'] for m in data['messages']], [m.id for m in self.messages[:5]])
+        self.assertIsNone(data['older_cursor'])
+
+    def test_other_user_is_redirected(self):
+        self.client.force_login(baker.make(User))
+        response = self.client.get(reverse('ticket:ticket-messages', args=[self.ticket.id]))
+        self.assertRedirects(response, reverse('home:home'), fetch_redirect_response=False)
@@ -0,0 +1,135 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from model_bakery import baker
+
+from ticket import work_queue
+from ticket.models import Ticket, Messages
+
+
+class TestWorkQueue(TestCase):
+
+    def setUp(self):
+        self.user = baker.make(User)
+        self.staff = baker.make(User, is_staff=True)
+        self.ticket = baker.make(Ticket, user=self.user)
+
+    def test_queue_order_and_membership(self):
+        now = timezone.now()
+        Ticket.objects.filter(pk=self.ticket.pk).update(waiting_since=now - timedelta(hours=1))
+        oldest = baker.make(Ticket, user=self.user, waiting_since=now - timedelta(hours=5))
+        answered = baker.make(Ticket, user=self.user)
+        baker.make(Messages, ticket=answered, is_admin_response=True)
+        baker.make(Ticket, user=self.user, status='Closed')
+        self.assertEqual(list(work_queue.awaiting_reply().order_by('waiting_since', 'id')),
+                         [oldest, self.ticket])
+
+    def test_customer_message_keeps_first_wait(self):
+        started = self.ticket.waiting_since
+        baker.make(Messages, ticket=self.ticket)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.waiting_since, started)
+
+    def test_staff_reply_releases_claim(self):
+        claimed = work_queue.claim_next(self.staff)
+        self.assertEqual(claimed, self.ticket)
+        baker.make(Messages, ticket=self.ticket, is_admin_response=True)
+        self.ticket.refresh_from_db()
+        self.assertIsNone(self.ticket.waiting_since)
+        self.assertIsNone(self.ticket.claimed_by)
+        baker.make(Messages, ticket=self.ticket)
+        self.ticket.refresh_from_db()
+        self.assertIsNotNone(self.ticket.waiting_since)
+
+    def test_claims_never_overlap(self):
+        other = baker.make(Ticket, user=self.user)
+        second_staff = baker.make(User, is_staff=True)
+        first = work_queue.claim_next(self.staff)
+        second = work_queue.claim_next(second_staff)
+        self.assertEqual({first, second}, {self.ticket, other})
+        self.assertIsNone(work_queue.claim_next(baker.make(User, is_staff=True)))
+        self.assertTrue(work_queue.release(first.id, self.staff))
+        self.assertEqual(work_queue.claim_next(second_staff), first)
+
+    def test_expired_claim_is_claimable(self):
+        Ticket.objects.filter(pk=self.ticket.pk).update(
+            claimed_by=self.staff, claimed_until=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(work_queue.claim_next(baker.make(User, is_staff=True)), self.ticket)
+
+    def test_reopening_restarts_wait(self):
+        baker.make(Messages, ticket=self.ticket, is_admin_response=True)
+        ticket = Ticket.objects.get(pk=self.ticket.pk)
+        ticket.status = 'Closed'
+        ticket.save()
+        ticket.status = 'Open'
+        ticket.save()
+        ticket.refresh_from_db()
+        self.assertIsNotNone(ticket.waiting_since)
+
+    def test_backfill_computes_waiting_since(self):
+        question = baker.make(Messages, ticket=self.ticket)
+        baker.make(Messages, ticket=self.ticket, is_admin_response=True)
+        follow_up = baker.make(Messages, ticket=self.ticket)
+        baker.make(Messages, ticket=self.ticket)
+        answered = baker.make(Ticket, user=self.user)
+        baker.make(Messages, ticket=answered, is_admin_response=True)
+        Ticket.objects.update(waiting_since=None)
+        call_command('backfill_thread_metadata', stdout=StringIO())
+        self.ticket.refresh_from_db()
+        answered.refresh_from_db()
+        self.assertNotEqual(question.created_at, follow_up.created_at)
+        self.assertEqual(self.ticket.waiting_since, follow_up.created_at)
+        self.assertIsNone(answered.waiting_since)
+
+    def test_queue_uses_partial_index(self):
+        plan = work_queue.awaiting_reply().order_by('waiting_since', 'id')[:25].explain()
+        self.assertIn('ticket_work_queue_idx', plan)
+
+
+class TestWorkQueueViews(TestCase):
+
+    def setUp(self):
+        self.user = baker.make(User)
+        self.staff = baker.make(User, is_staff=True)
+        self.ticket = baker.make(Ticket, user=self.user, subject='printer')
+        self.client.force_login(self.staff)
+
+    def test_queue_is_staff_only(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('ticket:work-queue'))
+        self.assertRedirects(response, reverse('home:home'))
+
+    @override_settings(TICKET_SLA_RESPONSE_HOURS=1)
+    def test_queue_pages_flag_breaches(self):
+        now = timezone.now()
+        Ticket.objects.filter(pk=self.ticket.pk).update(waiting_since=now - timedelta(hours=2))
+        for hours in range(30):
+            baker.make(Ticket, user=self.user, waiting_since=now - timedelta(minutes=hours))
+        response = self.client.get(reverse('ticket:work-queue'), {'format': 'json'})
+        data = response.json()
+        self.assertEqual(len(data['tickets']), 25)
+        self.assertEqual(data['tickets'][0]['id'], self.ticket.id)
+        self.assertTrue(data['tickets'][0]['sla_breached'])
+        self.assertFalse(data['tickets'][1]['sla_breached'])
+        rest = self.client.get(reverse('ticket:work-queue'), {'format': 'json', 'after': data['next_cursor']})
+        self.assertEqual(len(rest.json()['tickets']), 6)
+        page = self.client.get(reverse('ticket:work-queue'))
+        self.assertContains(page, 'printer')
+        self.assertContains(page, 'SLA breached')
+
+    def test_claim_redirects_to_ticket(self):
+        response = self.client.post(reverse('ticket:work-queue-claim'))
+        self.assertRedirects(response, self.ticket.get_absolute_url(), fetch_redirect_response=False)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.claimed_by, self.staff)
+        self.assertContains(self.client.get(reverse('ticket:work-queue')), 'Release')
+        response = self.client.post(reverse('ticket:work-queue-claim'))
+        self.assertRedirects(response, reverse('ticket:work-queue'))
+        self.client.post(reverse('ticket:work-queue-release', args=(self.ticket.id,)))
+        self.ticket.refresh_from_db()
+        self.assertIsNone(self.ticket.claimed_by)
@@ -0,0 +1,34 @@
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin asserting that a block stays within a fixed number of queries.
+
+    Unlike assertNumQueries it only checks an upper bound, so views can be
+    checked against a budget that must not grow with the number of rows.
+    """
+
+    @contextmanager
+    def assertMaxQueries(self, limit):
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        executed = len(context.captured_queries)
+        if executed > limit:
+            queries = '\n'.join(query['sql'] for query in context.captured_queries)
+            self.fail(f'{executed} queries executed, budget is {limit}:\n{queries}')
+
+    def assertQueriesDoNotGrow(self, request, add_rows, limit):
+        """
+        Run request twice, with add_rows in between, and check both runs stay within limit
+        and the second run does not execute more queries than the first.
+        """
+        with self.assertMaxQueries(limit) as before:
+            request()
+        add_rows()
+        with self.assertMaxQueries(limit) as after:
+            request()
+        self.assertLessEqual(len(after.captured_queries), len(before.captured_queries))
@@ -0,0 +1,75 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.safestring import mark_safe
+
+from . import metrics
+
+FRAGMENT_KEY = 'ticket-thread:{}:{}'
+HIT = ('ticket_thread_cache_requests_total', (('result', 'hit'),))
+MISS = ('ticket_thread_cache_requests_total', (('result', 'miss'),))
+
+
+def fragment_key(ticket):
+    """
+    Build the cache key of a ticket's thread from the columns that change with it.
+
+    updated_at moves on every save and status change, messages_updated_at
+    when a message is added or edited and message_count when one is
+    deleted, so a changed thread gets a new key in every process without
+    any invalidation.
+
+    Args:
+        ticket: Ticket annotated with messages_updated_at
+
+    Returns:
+        str: Cache key
+    """
+    state = repr((ticket.updated_at, ticket.messages_updated_at, ticket.message_count))
+    return FRAGMENT_KEY.format(ticket.pk, hashlib.md5(state.encode(), usedforsecurity=False).hexdigest())
+
+
+async def aget_thread(ticket, render):
+    """
+    Return the rendered thread fragment of a ticket, rendering it on a cache miss.
+
+    A hit costs one cache read and no database query. Fragments of older
+    states are never read again and expire after
+    TICKET_THREAD_CACHE_TIMEOUT seconds, which also bounds how stale the
+    relative timestamps in them can get. Lookups are counted in the
+    ticket_thread_cache_requests_total metric.
+
+    Args:
+        ticket: Ticket annotated with messages_updated_at
+        render: Coroutine function returning a dict with the fragment under
+                html plus any other picklable values to cache with it
+
+    Returns:
+        dict: The cached or freshly rendered fragment
+    """
+    key = fragment_key(ticket)
+    fragment = await cache.aget(key)
+    if fragment is None:
+        metrics.registry.inc(*MISS)
+        fragment = await render()
+        fragment['html'] = str(fragment['html'])
+        await cache.aset(key, fragment, settings.TICKET_THREAD_CACHE_TIMEOUT)
+    else:
+        metrics.registry.inc(*HIT)
+    return dict(fragment, html=mark_safe(fragment['html']))
+
+
+def stats(samples=None):
+    """
+    Read the thread cache hit and miss counters, added up over every worker process.
+
+    Args:
+        samples: Summed metric samples, read with metrics.totals() when omitted
+
+    Returns:
+        dict: hits, misses and hit_ratio (None before the first lookup)
+    """
+    samples = metrics.totals() if samples is None else samples
+    hits, misses = samples.get(HIT, 0), samples.get(MISS, 0)
+    return {'hits': hits, 'misses': misses, 'hit_ratio': hits / (hits + misses) if hits + misses else None}
@@ -0,0 +1,96 @@
+from django.db.models import Case, Count, Exists, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Ticket, Messages
+
+
+def message_added(message):
+    """
+    Record a new message on its ticket with one UPDATE in the caller's transaction.
+
+    A customer message starts the wait for a reply unless one is already
+    running; a staff reply ends it.
+
+    Args:
+        message: The newly created Messages instance
+    """
+    if message.is_admin_response:
+        # Staff answered: the ticket leaves the work queue and its claim ends.
+        waiting = {'waiting_since': None, 'claimed_by': None, 'claimed_until': None}
+    else:
+        waiting = {'waiting_since': Coalesce('waiting_since', Value(message.created_at))}
+    Ticket.objects.filter(pk=message.ticket_id).update(
+        message_count=F('message_count') + 1,
+        last_message_at=message.created_at,
+        last_message_is_admin=message.is_admin_response,
+        **waiting,
+    )
+
+
+def reopened(ticket_ids):
+    """
+    Start a new wait for a staff reply on tickets that were reopened.
+
+    Args:
+        ticket_ids: Primary keys of the reopened tickets
+    """
+    Ticket.objects.filter(pk__in=ticket_ids).update(waiting_since=timezone.now())
+
+
+def refresh(queryset):
+    """
+    Recompute the thread metadata of the tickets in a queryset with one set-based UPDATE.
+
+    waiting_since becomes the first customer message after the last staff
+    reply, the ticket creation when nobody replied yet, or empty when the
+    last message came from staff.
+
+    Each ticket reads its messages through the messages_ticket_created_idx
+    index, so the cost depends on the size of the threads, not of the table.
+
+    Args:
+        queryset: Tickets to refresh
+
+    Returns:
+        int: Number of tickets updated
+    """
+    messages = Messages.objects.filter(ticket=OuterRef('pk'))
+    latest = messages.order_by('-created_at', '-id')
+    count = messages.order_by().values('ticket').annotate(count=Count('id')).values('count')
+    last_is_admin = Coalesce(Subquery(latest.values('is_admin_response')[:1]), Value(False))
+    replies = Messages.objects.filter(ticket=OuterRef(OuterRef('pk')), is_admin_response=True)
+    first_unanswered = messages.filter(is_admin_response=False).filter(
+        Q(created_at__gt=Subquery(replies.order_by('-created_at').values('created_at')[:1])) | ~Exists(replies)
+    ).order_by('created_at').values('created_at')[:1]
+    return queryset.update(
+        message_count=Coalesce(Subquery(count), Value(0)),
+        last_message_at=Subquery(latest.values('created_at')[:1]),
+        last_message_is_admin=last_is_admin,
+        waiting_since=Case(
+            When(last_is_admin, then=Value(None)),
+            default=Coalesce(Subquery(first_unanswered), F('created_at')),
+        ),
+    )
+
+
+def backfill(batch_size=1000, stdout=None):
+    """
+    Recompute the thread metadata of every ticket in primary key batches.
+
+    Args:
+        batch_size: Tickets updated per statement
+        stdout: Optional stream receiving progress lines
+
+    Returns:
+        int: Number of tickets updated
+    """
+    total, last_id = 0, 0
+    while True:
+        ids = list(Ticket.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return total
+        last_id = ids[-1]
+        total += refresh(Ticket.objects.filter(id__in=ids))
+        if stdout:
+            stdout.write(f'Updated {total} ticket(s) up to id {last_id}')
@@ -0,0 +1,96 @@
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Ticket
+
+# Sent inside the transaction of every ticket status change, whether it went
+# through transition() or a full save(), with ticket_id, user_id, old_status
+# and new_status. Receivers live in ticket.signals.
+status_changed = Signal()
+
+# Sent once per batch by bulk_transition(), inside the batch transaction,
+# with rows, a list of (ticket_id, user_id, old_status), and new_status.
+statuses_changed = Signal()
+
+ALLOWED_TRANSITIONS = {
+    'Open': ('In Progress', 'Closed'),
+    'In Progress': ('Open', 'Closed'),
+    'Closed': ('Open',),
+}
+
+
+def transition(ticket, status, expected=None):
+    """
+    Move a ticket to a new status with one conditional UPDATE.
+
+    Only status and updated_at are written, and only while the row still has
+    the expected status, so concurrent transitions of the same ticket cannot
+    both succeed and the rest of the row is never rewritten.
+
+    Args:
+        ticket: Ticket to change; needs pk, user_id and, without expected, status
+        status: Status to move to
+        expected: Status the row must currently have, defaults to ticket.status
+
+    Returns:
+        bool: Whether this call changed the status
+    """
+    expected = ticket.status if expected is None else expected
+    if status not in ALLOWED_TRANSITIONS.get(expected, ()):
+        return False
+    now = timezone.now()
+    with transaction.atomic():
+        changed = Ticket.objects.filter(pk=ticket.pk, status=expected).update(status=status, updated_at=now)
+        if changed:
+            status_changed.send(sender=Ticket, ticket_id=ticket.pk, user_id=ticket.user_id,
+                                old_status=expected, new_status=status)
+    if changed:
+        ticket.status = ticket._loaded_status = status
+        ticket.updated_at = now
+    return bool(changed)
+
+
+def bulk_transition(queryset, status, batch_size=500):
+    """
+    Move every ticket of a queryset that may go to status, batch by batch.
+
+    Tickets are walked in primary key order; each batch is locked, moved with
+    one UPDATE and announced with statuses_changed in its own transaction, so
+    no transaction grows with the size of the selection and the derived
+    counters move in one step per batch instead of one per ticket.
+
+    Args:
+        queryset: Tickets to move; rows that cannot go to status are skipped
+        status: Status to move to
+        batch_size: Maximum number of tickets per transaction
+
+    Yields:
+        dict: Progress with done, changed and total, first before any batch
+              and then after every batch
+    """
+    sources = [source for source, targets in ALLOWED_TRANSITIONS.items() if status in targets]
+    candidates = queryset.filter(status__in=sources).order_by('pk').values_list('pk', flat=True)
+    progress = {'done': 0, 'changed': 0, 'total': candidates.count()}
+    yield dict(progress)
+    last_pk = None
+    while True:
+        batch = candidates if last_pk is None else candidates.filter(pk__gt=last_pk)
+        ids = list(batch[:batch_size])
+        if not ids:
+            break
+        last_pk = ids[-1]
+        progress['changed'] += _transition_batch(ids, sources, status)
+        progress['done'] += len(ids)
+        yield dict(progress)
+
+
+def _transition_batch(ids, sources, status):
+    with transaction.atomic():
+        rows = list(Ticket.objects.select_for_update().filter(pk__in=ids, status__in=sources).values_list(
+            'pk', 'user_id', 'status'))
+        if not rows:
+            return 0
+        Ticket.objects.filter(pk__in=[row[0] for row in rows]).update(status=status, updated_at=timezone.now())
+        statuses_changed.send(sender=Ticket, rows=rows, new_status=status)
+    return len(rows)
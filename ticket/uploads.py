@@ -0,0 +1,161 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from . import metrics
+from .models import ChunkedUpload
+
+READ_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """
+    Raised when a chunk cannot be appended to an upload.
+
+    Attributes:
+        status: HTTP status code describing the failure
+    """
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def temp_dir():
+    return str(settings.TICKET_UPLOAD_TEMP_DIR)
+
+
+def temp_path(upload_id):
+    return os.path.join(temp_dir(), str(upload_id))
+
+
+def start(user, filename, size):
+    """
+    Register a new chunked upload and create its empty temporary file.
+
+    Args:
+        user: Owner of the upload
+        filename: Original name of the file
+        size: Total size announced by the client
+
+    Returns:
+        ChunkedUpload: The new upload
+
+    Raises:
+        UploadError: When the size is negative or above TICKET_UPLOAD_MAX_SIZE
+    """
+    if size < 0 or size > settings.TICKET_UPLOAD_MAX_SIZE:
+        raise UploadError(f'File size must be between 0 and {settings.TICKET_UPLOAD_MAX_SIZE} bytes.', 413)
+    upload = ChunkedUpload.objects.create(user=user, filename=os.path.basename(filename)[:255], size=size)
+    os.makedirs(temp_dir(), exist_ok=True)
+    open(temp_path(upload.id), 'wb').close()
+    return upload
+
+
+def append(upload, offset, stream, length):
+    """
+    Append one chunk read from stream to the temporary file of an upload.
+
+    The chunk is first copied in READ_SIZE pieces to a scratch file, so memory
+    use does not depend on the chunk size and no lock is held while the client
+    sends it. The offset is then advanced with a conditional UPDATE and the
+    chunk moved into place in the same short transaction; a retried or
+    duplicated chunk finds the offset already moved and is rejected without
+    touching the file.
+
+    Args:
+        upload: The upload to append to
+        offset: Position of the chunk announced by the client
+        stream: File-like object to read the chunk from
+        length: Number of bytes in the chunk
+
+    Returns:
+        ChunkedUpload: The upload with its new offset
+
+    Raises:
+        UploadError: 409 on an offset mismatch, 413 when the chunk is too large
+                     or goes past the announced size, 400 when the body is short
+    """
+    upload = ChunkedUpload.objects.get(pk=upload.pk)
+    if offset != upload.offset:
+        raise UploadError(f'Expected offset {upload.offset}.', 409)
+    if length > settings.TICKET_UPLOAD_CHUNK_SIZE or offset + length > upload.size:
+        raise UploadError('Chunk is too large.', 413)
+    with tempfile.TemporaryFile(dir=temp_dir()) as chunk:
+        written = 0
+        while written < length:
+            data = stream.read(min(READ_SIZE, length - written))
+            if not data:
+                break
+            chunk.write(data)
+            written += len(data)
+        if written != length:
+            raise UploadError('Chunk body is shorter than its Content-Length.')
+        chunk.seek(0)
+        with transaction.atomic():
+            updated = ChunkedUpload.objects.filter(pk=upload.pk, offset=offset).update(
+                offset=offset + written, updated_at=timezone.now())
+            if not updated:
+                raise UploadError('Another chunk was stored at this offset.', 409)
+            with open(temp_path(upload.id), 'r+b') as file:
+                file.seek(offset)
+                shutil.copyfileobj(chunk, file, READ_SIZE)
+                file.truncate(offset + written)
+    upload.offset = offset + written
+    metrics.upload_received('chunked', written)
+    return upload
+
+
+def open_completed(upload):
+    """
+    Open the assembled file of a completed upload for attaching to a model field.
+
+    Returns:
+        File: File named after the original upload
+    """
+    return File(open(temp_path(upload.id), 'rb'), name=upload.filename)
+
+
+def discard(upload):
+    """
+    Delete an upload and its temporary file.
+    """
+    try:
+        os.remove(temp_path(upload.id))
+    except FileNotFoundError:
+        pass
+    upload.delete()
+
+
+def cleanup(max_age=None):
+    """
+    Remove uploads not touched for max_age and temporary files without an upload row.
+
+    Args:
+        max_age: timedelta; defaults to TICKET_UPLOAD_EXPIRY
+
+    Returns:
+        tuple: (removed uploads, removed orphaned files)
+    """
+    if max_age is None:
+        max_age = timedelta(seconds=settings.TICKET_UPLOAD_EXPIRY)
+    cutoff = timezone.now() - max_age
+    removed = 0
+    for upload in ChunkedUpload.objects.filter(updated_at__lt=cutoff).iterator():
+        discard(upload)
+        removed += 1
+
+    orphans = 0
+    if os.path.isdir(temp_dir()):
+        known = {str(pk) for pk in ChunkedUpload.objects.values_list('id', flat=True)}
+        for entry in os.scandir(temp_dir()):
+            if entry.is_file() and entry.name not in known and entry.stat().st_mtime < cutoff.timestamp():
+                os.remove(entry.path)
+                orphans += 1
+    return removed, orphans
@@ -6,11 +6,25 @@ app_name = 'ticket'
 urlpatterns = [
 
     path('detail/<ticket_id>/', views.TicketDetailView.as_view(), name='ticket-detail'),
+    path('detail/<ticket_id>/messages/', views.TicketMessagesView.as_view(), name='ticket-messages'),
+    path('detail/<ticket_id>/events/', views.TicketEventsView.as_view(), name='ticket-events'),
+    path('detail/<ticket_id>/attachment/', views.TicketAttachmentView.as_view(), name='ticket-attachment'),
+    path('detail/<ticket_id>/attachment/<int:message_id>/', views.TicketAttachmentView.as_view(),
+         name='message-attachment'),
+    path('upload/', views.UploadStartView.as_view(), name='upload-start'),
+    path('upload/<uuid:upload_id>/', views.UploadView.as_view(), name='upload'),
     path('create/', views.TicketCreateView.as_view(), name='ticket-create'),
     path('close/<ticket_id>/', views.TicketCloseView.as_view(), name='ticket-close'),
     path('open/<ticket_id>/', views.TicketOpenView.as_view(), name='ticket-open'),
+    path('in-progress/<ticket_id>/', views.TicketInProgressView.as_view(), name='ticket-in-progress'),
+    path('bulk-status/', views.TicketBulkStatusView.as_view(), name='ticket-bulk-status'),
+    path('export/', views.TicketExportView.as_view(), name='ticket-export'),
     path('lists-open/', views.TicketOpenListView.as_view(), name='ticket-open-lists'),
     path('in-porgress-list/', views.TicketInProgressListView.as_view(), name='ticket-in-progress-lists'),
     path('close-list/', views.TicketCloseListView.as_view(), name='ticket-close-lists'),
+    path('queue/', views.TicketWorkQueueView.as_view(), name='work-queue'),
+    path('queue/claim/', views.TicketClaimView.as_view(), name='work-queue-claim'),
+    path('queue/release/<ticket_id>/', views.TicketReleaseView.as_view(), name='work-queue-release'),
+    path('search/', views.TicketSearchView.as_view(), name='ticket-search'),
 
 ]
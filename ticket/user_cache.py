@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.crypto import constant_time_compare
+
+from .checks import cache_is_shared
+
+USER_KEY = 'auth-user:{}'
+
+
+def get_user(request):
+    """
+    Return the user of the request session, from the cache when possible.
+
+    A cached user is only used while the session still names a configured
+    backend and its auth hash matches the cached user's password hash, the
+    same checks django.contrib.auth.get_user makes. Anything else, including
+    hashes signed with a fallback secret, goes through get_user itself, which
+    loads the user from the database and may flush or rotate the session.
+    The loaded user is then cached by id, so all sessions of a user share
+    one entry and a change to the user invalidates a single key.
+
+    With a process-local cache, an invalidation would only reach the process
+    that made the change, so the cache is bypassed altogether.
+
+    Args:
+        request: HTTP request object with a session
+
+    Returns:
+        User: The authenticated user or AnonymousUser
+    """
+    if not cache_is_shared():
+        return auth.get_user(request)
+    try:
+        user_id = auth._get_user_session_key(request)
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return auth.get_user(request)
+    if backend_path in settings.AUTHENTICATION_BACKENDS:
+        user = cache.get(USER_KEY.format(user_id))
+        session_hash = request.session.get(HASH_SESSION_KEY)
+        if user is not None and session_hash and constant_time_compare(session_hash, user.get_session_auth_hash()):
+            return user
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        cache.set(USER_KEY.format(user.pk), user, settings.TICKET_USER_CACHE_TIMEOUT)
+    return user
+
+
+def invalidate(user_ids):
+    """
+    Drop cached users, right away and again once the transaction commits.
+
+    The second delete keeps a concurrent request from leaving a user loaded
+    before the commit in the cache. Call it after QuerySet.update() on users,
+    which sends no signal.
+
+    Args:
+        user_ids: Primary keys of the changed users
+    """
+    def delete():
+        cache.delete_many([USER_KEY.format(user_id) for user_id in user_ids])
+
+    delete()
+    transaction.on_commit(delete)
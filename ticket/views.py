@@ -1,20 +1,52 @@
+import json
+from hmac import compare_digest
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Max, Subquery
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views.generic import FormView, DetailView, View, TemplateView
 from django.shortcuts import redirect, render, get_object_or_404
-from .forms import MessageForm, CreateTicketForm
-from .models import Ticket, Messages
+from django.template.loader import render_to_string
+from django.template.response import TemplateResponse
+from django.urls import reverse
+from django.utils import timezone
+from . import events, export, live, metrics, thread_cache, transitions, uploads, work_queue
+from .async_utils import AsyncLoginRequiredMixin, aget_object_or_404, aiterate, aload_user
+from .conditional import ConditionalGetMixin, open_count_subquery
+from .downloads import serve_attachment
+from .forms import BulkStatusForm, MessageForm, CreateTicketForm, TicketExportForm
+from .models import Ticket, Messages, ChunkedUpload, TicketCounter
+from .pagination import KeysetPaginator
+from .search import search_tickets
+
+
+def can_access_ticket(user, ticket):
+    """
+    Tell whether a user may see and act on a ticket.
 
+    Args:
+        user: Requesting user, possibly anonymous
+        ticket: Ticket being accessed
 
-class TicketDetailView(LoginRequiredMixin, View):
+    Returns:
+        bool: True for the ticket owner and staff members
     """
-    View for displaying ticket details and handling message submissions.
+    return user.pk == ticket.user_id or user.is_staff
 
-    This view allows users to view ticket details and add messages to an existing ticket.
-    Access is restricted to the ticket owner and staff members.
+
+class TicketAccessMixin:
     """
-    template_name = 'ticket/ticket-detail.html'
-    form_class = MessageForm
+    Mixin loading the ticket named in the URL and restricting access to it.
+
+    Only the ticket owner and staff members get past dispatch; everybody else
+    is redirected home with unauthorized_message.
+    """
+    unauthorized_message = 'You are not authorized to view this ticket.'
 
     def setup(self, request, *args, **kwargs):
         """
@@ -25,14 +57,23 @@ class TicketDetailView(LoginRequiredMixin, View):
             *args: Variable length argument list
             **kwargs: Arbitrary keyword arguments including ticket_id
         """
-        self.user_ticket = get_object_or_404(Ticket, id=kwargs['ticket_id'])
+        self.user_ticket = get_object_or_404(self.get_ticket_queryset(), id=kwargs['ticket_id'])
         super().setup(request, *args, **kwargs)
 
+    def get_ticket_queryset(self):
+        """
+        Return the queryset the ticket is loaded from.
+
+        Returns:
+            QuerySet: All tickets; views needing fewer columns narrow it down
+        """
+        return Ticket.objects.all()
+
     def dispatch(self, request, *args, **kwargs):
         """
         Check permissions before proceeding with request handling.
 
-        Ensures only the ticket owner or staff members can access the ticket details.
+        Ensures only the ticket owner or staff members can access the ticket.
 
         Args:
             request: HTTP request object
@@ -42,12 +83,122 @@ class TicketDetailView(LoginRequiredMixin, View):
         Returns:
             HTTP response: Redirect to home if unauthorized, otherwise proceed with request
         """
-        if not (request.user == self.user_ticket.user or request.user.is_staff):
-            messages.error(request, 'You are not authorized to view this ticket.', 'danger')
+        if not can_access_ticket(request.user, self.user_ticket):
+            messages.error(request, self.unauthorized_message, 'danger')
             return redirect('home:home')
         return super().dispatch(request, *args, **kwargs)
 
-    def get(self, request, *args, **kwargs):
+
+class AsyncTicketAccessMixin:
+    """
+    Async counterpart of TicketAccessMixin for views whose handlers are async.
+
+    The ticket is loaded with the async ORM in dispatch, before the access
+    check, so missing tickets still answer 404 to everybody. The user is
+    resolved first so get_ticket_queryset() can depend on it.
+    """
+    unauthorized_message = TicketAccessMixin.unauthorized_message
+
+    def get_ticket_queryset(self):
+        return Ticket.objects.all()
+
+    async def dispatch(self, request, *args, **kwargs):
+        """
+        Load the ticket and check permissions before proceeding with request handling.
+
+        Args:
+            request: HTTP request object
+            *args: Variable length argument list
+            **kwargs: Arbitrary keyword arguments including ticket_id
+
+        Returns:
+            HTTP response: Redirect to home if unauthorized, otherwise proceed with request
+        """
+        user = await aload_user(request)
+        self.user_ticket = await aget_object_or_404(self.get_ticket_queryset(), id=kwargs['ticket_id'])
+        if not can_access_ticket(user, self.user_ticket):
+            await sync_to_async(messages.error)(request, self.unauthorized_message, 'danger')
+            return redirect('home:home')
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class TicketDetailView(AsyncTicketAccessMixin, AsyncLoginRequiredMixin, ConditionalGetMixin, View):
+    """
+    View for displaying ticket details and handling message submissions.
+
+    This view allows users to view ticket details and add messages to an existing ticket.
+    Access is restricted to the ticket owner and staff members.
+    Only the newest messages are rendered; older ones are fetched on demand
+    from TicketMessagesView. Handlers are async and read through the async
+    ORM, so under ASGI a request does not hold a worker thread while waiting.
+    The ticket is loaded together with the validators of the page, so an
+    unchanged page is answered with 304 after a single query.
+    """
+    template_name = 'ticket/ticket-detail.html'
+    form_class = MessageForm
+    messages_per_page = 20
+
+    def get_ticket_queryset(self):
+        """
+        Load the ticket with its latest message change and the navbar badge.
+
+        Deleted messages are caught by the maintained message_count column.
+
+        Returns:
+            QuerySet: Annotated tickets
+        """
+        return Ticket.objects.annotate(
+            messages_updated_at=Max('messages__updated_at'),
+            navbar_open_count=open_count_subquery(self.request.user),
+        )
+
+    async def aget_validators(self):
+        ticket = self.user_ticket
+        last_modified = max(filter(None, (ticket.updated_at, ticket.messages_updated_at)))
+        return (ticket.updated_at, ticket.messages_updated_at, ticket.message_count,
+                ticket.navbar_open_count), last_modified
+
+    async def get_context_data(self, form):
+        """
+        Build the template context with the newest page of the conversation.
+
+        The rendered thread comes from the fragment cache, keyed on the
+        validator columns, so an unchanged ticket is served without querying
+        its messages.
+
+        Args:
+            form: Message form to render below the thread
+
+        Returns:
+            dict: Context with the ticket, the form, the rendered thread in
+                  chronological order, the cursor for loading older messages
+                  and the id of the newest message
+        """
+        thread = await thread_cache.aget_thread(self.user_ticket, self.render_thread)
+        return {
+            'ticket': self.user_ticket,
+            'form': form,
+            'thread_html': thread['html'],
+            'older_cursor': thread['older_cursor'],
+            'last_message_id': thread['last_message_id'],
+        }
+
+    async def render_thread(self):
+        """
+        Render the newest page of messages for the thread cache.
+
+        Returns:
+            dict: Fragment html, older_cursor and last_message_id
+        """
+        paginator = KeysetPaginator(self.user_ticket.messages.all(), self.messages_per_page)
+        page = await paginator.aget_page()
+        return {
+            'html': render_to_string('ticket/message-list.html', {'thread': page.object_list[::-1]}),
+            'older_cursor': page.next_cursor,
+            'last_message_id': page.object_list[0].id if page.object_list else 0,
+        }
+
+    async def get(self, request, *args, **kwargs):
         """
         Handle GET request to display ticket details and message form.
 
@@ -57,19 +208,19 @@ class TicketDetailView(LoginRequiredMixin, View):
             **kwargs: Arbitrary keyword arguments
 
         Returns:
-            HTTP response: Rendered template with ticket details and message form
+            HTTP response: 304 when the client copy is current, otherwise the
+                          rendered template with ticket details and message form
         """
-        form = self.form_class()
-        user_ticket = self.user_ticket
-        return render(request, self.template_name, {'ticket': user_ticket, 'form': form})
+        not_modified = await self.anot_modified()
+        if not_modified:
+            return not_modified
+        response = TemplateResponse(request, self.template_name, await self.get_context_data(self.form_class()))
+        return self.add_validators(response)
 
-    def post(self, request, *args, **kwargs):
+    async def post(self, request, *args, **kwargs):
         """
         Handle POST request to add a new message to the ticket.
 
-        Creates a new message associated with the ticket, differentiating between
-        regular user messages and admin responses.
-
         Args:
             request: HTTP request object
             *args: Variable length argument list
@@ -79,9 +230,30 @@ class TicketDetailView(LoginRequiredMixin, View):
             HTTP response: Redirect to ticket detail page on success,
                           or rendered template with form errors
         """
-        user_ticket = self.user_ticket
-        form = self.form_class(request.POST, request.FILES)
-        if form.is_valid():
+        form = self.form_class(request.POST, request.FILES, user=request.user)
+        if await sync_to_async(self.save_message)(form):
+            return redirect('ticket:ticket-detail', ticket_id=self.user_ticket.id)
+        return TemplateResponse(request, self.template_name, await self.get_context_data(form))
+
+    def save_message(self, form):
+        """
+        Validate the form and add its message to the ticket.
+
+        Creates a new message associated with the ticket, differentiating between
+        regular user messages and admin responses. The message and the thread
+        metadata on the ticket are written in one transaction. Runs in a worker
+        thread as forms, file storage and signal handlers are synchronous.
+
+        Args:
+            form: Bound message form
+
+        Returns:
+            bool: Whether the message was saved
+        """
+        if not form.is_valid():
+            return False
+        request, user_ticket = self.request, self.user_ticket
+        with transaction.atomic():
             if request.user.is_staff:
                 Messages.objects.create(content=form.cleaned_data['content'], sender=self.request.user,
                                         ticket=user_ticket, is_admin_response=True,
@@ -90,9 +262,137 @@ class TicketDetailView(LoginRequiredMixin, View):
                 Messages.objects.create(content=form.cleaned_data['content'], sender=self.request.user,
                                         ticket=user_ticket,
                                         file=form.cleaned_data['file'])
-            messages.success(request, 'Message has been sent.', 'success')
-            return redirect('ticket:ticket-detail', ticket_id=user_ticket.id)
-        return render(request, self.template_name, {'ticket': user_ticket, 'form': form})
+        form.discard_upload()
+        messages.success(request, 'Message has been sent.', 'success')
+        return True
+
+
+class TicketMessagesView(TicketAccessMixin, LoginRequiredMixin, View):
+    """
+    View returning the next slice of older messages of a ticket conversation.
+
+    The slice follows the `after` cursor handed out by TicketDetailView and is
+    returned as an HTML fragment, or as JSON when format=json is requested.
+    The cursor for the following slice is sent in the X-Older-Cursor header.
+    """
+    template_name = 'ticket/message-list.html'
+    messages_per_page = 20
+
+    def get(self, request, *args, **kwargs):
+        """
+        Handle GET request for one slice of older messages.
+
+        Args:
+            request: HTTP request object
+            *args: Variable length argument list
+            **kwargs: Arbitrary keyword arguments
+
+        Returns:
+            HTTP response: HTML fragment or JSON document with the messages in
+                          chronological order
+        """
+        paginator = KeysetPaginator(self.user_ticket.messages.select_related('sender'), self.messages_per_page)
+        page = paginator.get_page(after=request.GET.get('after'))
+        thread = page.object_list[::-1]
+        if request.GET.get('format') == 'json':
+            response = JsonResponse({
+                'messages': [{
+                    'id': message.id,
+                    'sender': message.sender.username,
+                    'content': message.content,
+                    'is_admin_response': message.is_admin_response,
+                    'file': reverse('ticket:message-attachment', args=(message.ticket_id, message.id))
+                    if message.file else None,
+                    'created_at': message.created_at.isoformat(),
+                } for message in thread],
+                'older_cursor': page.next_cursor,
+            })
+        else:
+            response = render(request, self.template_name, {'thread': thread})
+        if page.next_cursor:
+            response['X-Older-Cursor'] = page.next_cursor
+        return response
+
+
+class TicketEventsView(AsyncTicketAccessMixin, AsyncLoginRequiredMixin, View):
+    """
+    View streaming new messages and status changes of a ticket as server-sent events.
+
+    Access follows the same rule as TicketDetailView. Clients pass the id of
+    the newest message they have in last_event_id (or the Last-Event-ID
+    header on reconnect) and receive everything after it. Streaming needs an
+    ASGI server, where waiting streams do not hold a worker; under WSGI the
+    view answers 204, which tells EventSource not to reconnect. Past
+    TICKET_EVENTS_MAX_STREAMS open streams in the process it answers 503 and
+    the browser retries after Retry-After seconds.
+    """
+
+    def get_ticket_queryset(self):
+        return Ticket.objects.only('id', 'user_id')
+
+    async def get(self, request, *args, **kwargs):
+        """
+        Handle GET request opening the event stream.
+
+        Args:
+            request: HTTP request object
+            *args: Variable length argument list
+            **kwargs: Arbitrary keyword arguments
+
+        Returns:
+            HTTP response: text/event-stream response, 204 outside ASGI or 503
+                           when the process has too many open streams
+        """
+        if not isinstance(request, ASGIRequest):
+            return HttpResponse(status=204)
+        if live.open_streams() >= settings.TICKET_EVENTS_MAX_STREAMS:
+            response = HttpResponse(status=503)
+            response['Retry-After'] = settings.TICKET_EVENTS_RETRY_MS // 1000
+            return response
+        try:
+            last_id = int(request.headers.get('Last-Event-ID') or request.GET['last_event_id'])
+        except (KeyError, ValueError):
+            last_id = None
+        response = StreamingHttpResponse(live.stream(self.user_ticket.id, last_id),
+                                         content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class TicketAttachmentView(TicketAccessMixin, LoginRequiredMixin, View):
+    """
+    View delivering the attachment of a ticket or of one of its messages.
+
+    Attachments are only served to the ticket owner and staff members.
+    Responses carry a strong ETag and support conditional and Range requests;
+    the transfer itself can be offloaded to the front-end server with
+    TICKET_ATTACHMENT_SENDFILE.
+    """
+
+    def get_ticket_queryset(self):
+        return Ticket.objects.only('id', 'user_id', 'file', 'filename')
+
+    def get(self, request, *args, **kwargs):
+        """
+        Handle GET request for an attachment.
+
+        Args:
+            request: HTTP request object
+            *args: Variable length argument list
+            **kwargs: Arbitrary keyword arguments including an optional message_id
+
+        Returns:
+            HTTP response: The attachment, or 404 when there is none
+        """
+        if 'message_id' in kwargs:
+            owner = get_object_or_404(Messages.objects.only('id', 'file', 'filename'), id=kwargs['message_id'],
+                                      ticket_id=self.user_ticket.id)
+        else:
+            owner = self.user_ticket
+        if not owner.file:
+            raise Http404('No attachment.')
+        return serve_attachment(request, owner.file, owner.filename)
 
 
 class TicketCreateView(LoginRequiredMixin, FormView):
@@ -125,6 +425,17 @@ class TicketCreateView(LoginRequiredMixin, FormView):
             return redirect('home:register')
         return super().dispatch(request, *args, **kwargs)
 
+    def get_form_kwargs(self):
+        """
+        Pass the current user to the form so it only accepts the user's own uploads.
+
+        Returns:
+            dict: Form keyword arguments
+        """
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
+
     def form_valid(self, form):
         """
         Process valid form data to create a new ticket.
@@ -139,53 +450,136 @@ class TicketCreateView(LoginRequiredMixin, FormView):
         """
         new_ticket = form.save(commit=False)
         new_ticket.user = self.request.user
-        new_ticket.save()
+        with transaction.atomic():
+            new_ticket.save()
+        form.discard_upload()
         messages.success(self.request, 'Ticket has been created.', 'success')
         return redirect('ticket:ticket-detail', ticket_id=new_ticket.id)
 
 
-class TicketCloseView(LoginRequiredMixin, View):
+class UploadStartView(LoginRequiredMixin, View):
     """
-    View for closing an open ticket.
+    View starting a resumable chunked upload.
 
-    This view allows ticket owners or staff members to close an active ticket.
+    Expects filename and size in the POST data and returns the URL the chunks
+    are sent to. Once every chunk is stored, the returned id is submitted in
+    the upload field of the ticket or message form instead of the file.
     """
-    template_name = 'ticket/close-ticket.html'
 
-    def setup(self, request, *args, **kwargs):
+    def post(self, request, *args, **kwargs):
         """
-        Initialize view attributes before dispatch.
+        Handle POST request registering a new upload.
 
         Args:
             request: HTTP request object
             *args: Variable length argument list
-            **kwargs: Arbitrary keyword arguments including ticket_id
+            **kwargs: Arbitrary keyword arguments
+
+        Returns:
+            JsonResponse: The upload id, chunk URL, offset and maximum chunk size,
+                          or an error message
         """
-        self.user_ticket = get_object_or_404(Ticket, id=kwargs['ticket_id'])
-        super().setup(request, *args, **kwargs)
+        try:
+            size = int(request.POST.get('size', ''))
+        except ValueError:
+            return JsonResponse({'error': 'A numeric size is required.'}, status=400)
+        filename = request.POST.get('filename', '').strip()
+        if not filename:
+            return JsonResponse({'error': 'A filename is required.'}, status=400)
+        try:
+            upload = uploads.start(request.user, filename, size)
+        except uploads.UploadError as error:
+            return JsonResponse({'error': str(error)}, status=error.status)
+        return JsonResponse({
+            'id': str(upload.id),
+            'url': reverse('ticket:upload', args=(upload.id,)),
+            'offset': upload.offset,
+            'chunk_size': settings.TICKET_UPLOAD_CHUNK_SIZE,
+        }, status=201)
+
+
+class UploadView(LoginRequiredMixin, View):
+    """
+    View receiving the chunks of an upload started with UploadStartView.
 
-    def dispatch(self, request, *args, **kwargs):
+    GET reports how many bytes are stored so an interrupted client can resume,
+    PUT appends the request body at the offset given in the Upload-Offset
+    header and DELETE abandons the upload.
+    """
+
+    def get_upload(self):
+        return get_object_or_404(ChunkedUpload, id=self.kwargs['upload_id'], user=self.request.user)
+
+    @staticmethod
+    def status_response(upload, status=200):
+        return JsonResponse({'offset': upload.offset, 'size': upload.size, 'complete': upload.is_complete},
+                            status=status)
+
+    def get(self, request, *args, **kwargs):
         """
-        Check permissions before proceeding with request handling.
+        Handle GET request for the progress of an upload.
+
+        Returns:
+            JsonResponse: Stored offset, total size and completion flag
+        """
+        return self.status_response(self.get_upload())
 
-        Ensures only the ticket owner or staff members can close the ticket.
+    def put(self, request, *args, **kwargs):
+        """
+        Handle PUT request appending one chunk.
 
         Args:
-            request: HTTP request object
+            request: HTTP request object whose body is the chunk
             *args: Variable length argument list
-            **kwargs: Arbitrary keyword arguments
+            **kwargs: Arbitrary keyword arguments including upload_id
 
         Returns:
-            HTTP response: Redirect to home if unauthorized, otherwise proceed with request
+            JsonResponse: The new progress, or an error with the stored offset
         """
-        if not (request.user == self.user_ticket.user or request.user.is_staff):
-            messages.error(request, 'You can not close others ticket!!!', 'danger')
-            return redirect('home:home')
-        return super().dispatch(request, *args, **kwargs)
+        upload = self.get_upload()
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return JsonResponse({'error': 'Upload-Offset and Content-Length are required.'}, status=400)
+        try:
+            upload = uploads.append(upload, offset, request, length)
+        except uploads.UploadError as error:
+            upload.refresh_from_db(fields=['offset'])
+            return JsonResponse({'error': str(error), 'offset': upload.offset}, status=error.status)
+        return self.status_response(upload)
+
+    def delete(self, request, *args, **kwargs):
+        """
+        Handle DELETE request abandoning the upload.
+
+        Returns:
+            HttpResponse: Empty 204 response
+        """
+        uploads.discard(self.get_upload())
+        return HttpResponse(status=204)
+
+
+class TicketTransitionMixin(TicketAccessMixin, LoginRequiredMixin):
+    """
+    Mixin for the views moving a ticket to another status.
+
+    The GET handler shows a confirmation page; POST applies the change with
+    transitions.transition(), a conditional UPDATE of status and updated_at
+    guarded by the status the ticket was loaded with, so a concurrent change
+    wins and this request reports that nothing happened. With format=json the
+    outcome is returned as JSON, with status 409 when the ticket was not moved.
+    """
+    template_name = None
+    target_status = None
+    success_message = None
+
+    def get_ticket_queryset(self):
+        return Ticket.objects.only('id', 'user_id', 'subject', 'status', 'created_at')
 
     def get(self, request, *args, **kwargs):
         """
-        Handle GET request to display ticket closure confirmation page.
+        Handle GET request to display the confirmation page.
 
         Args:
             request: HTTP request object
@@ -195,14 +589,11 @@ class TicketCloseView(LoginRequiredMixin, View):
         Returns:
             HTTP response: Rendered template with ticket information for confirmation
         """
-        ticket = self.user_ticket
-        return render(request, self.template_name, {'ticket': ticket})
+        return render(request, self.template_name, {'ticket': self.user_ticket})
 
     def post(self, request, *args, **kwargs):
         """
-        Handle POST request to close the ticket.
-
-        Changes the ticket status to "Closed" and redirects to the ticket detail page.
+        Handle POST request to apply the transition.
 
         Args:
             request: HTTP request object
@@ -210,39 +601,106 @@ class TicketCloseView(LoginRequiredMixin, View):
             **kwargs: Arbitrary keyword arguments
 
         Returns:
-            HTTP response: Redirect to ticket detail page after closing the ticket
+            HTTP response: Redirect to ticket detail page, or JSON with changed
+                          and the current status when format=json is requested
         """
         ticket = self.user_ticket
-        ticket.status = "Closed"
-        ticket.save()
-        return redirect('ticket:ticket-detail', self.user_ticket.id)
+        changed = transitions.transition(ticket, self.target_status)
+        if not changed:
+            ticket.refresh_from_db(fields=['status'])
+        if request.GET.get('format') == 'json':
+            return JsonResponse({'changed': changed, 'status': ticket.status}, status=200 if changed else 409)
+        if changed:
+            messages.success(request, self.success_message, 'success')
+        else:
+            messages.warning(request, f'The ticket was not changed, its status is {ticket.status}.', 'warning')
+        return redirect('ticket:ticket-detail', ticket_id=ticket.id)
+
 
+class TicketCloseView(TicketTransitionMixin, View):
+    """
+    View for closing an open ticket.
 
-class TicketOpenView(LoginRequiredMixin, View):
+    This view allows ticket owners or staff members to close an active ticket.
+    """
+    template_name = 'ticket/close-ticket.html'
+    unauthorized_message = 'You can not close others ticket!!!'
+    target_status = 'Closed'
+    success_message = 'The ticket was closed.'
+
+
+class TicketOpenView(TicketTransitionMixin, View):
     """
     View for reopening a closed ticket.
 
     This view allows ticket owners or staff members to reopen a previously closed ticket.
     """
     template_name = 'ticket/open-ticket.html'
+    unauthorized_message = 'You can not open others ticket!!!'
+    target_status = 'Open'
+    success_message = 'The ticket was reopened.'
 
-    def setup(self, request, *args, **kwargs):
+
+class TicketInProgressView(TicketTransitionMixin, View):
+    """
+    View for marking a ticket as being worked on.
+
+    This view is restricted to staff members only.
+    """
+    template_name = 'ticket/in-progress-ticket.html'
+    unauthorized_message = 'Only staff can start work on a ticket!!!'
+    target_status = 'In Progress'
+    success_message = 'The ticket is now in progress.'
+
+    def dispatch(self, request, *args, **kwargs):
         """
-        Initialize view attributes before dispatch.
+        Check staff permissions before proceeding with request handling.
 
         Args:
             request: HTTP request object
             *args: Variable length argument list
-            **kwargs: Arbitrary keyword arguments including ticket_id
+            **kwargs: Arbitrary keyword arguments
+
+        Returns:
+            HTTP response: Redirect to home if not staff, otherwise proceed with request
         """
-        self.user_ticket = get_object_or_404(Ticket, id=kwargs['ticket_id'])
-        super().setup(request, *args, **kwargs)
+        if not request.user.is_staff:
+            messages.error(request, self.unauthorized_message, 'danger')
+            return redirect('home:home')
+        return super().dispatch(request, *args, **kwargs)
 
-    def dispatch(self, request, *args, **kwargs):
+
+class TicketBulkStatusView(AsyncLoginRequiredMixin, View):
+    """
+    View changing the status of every ticket matching a set of filters.
+
+    This view is restricted to staff members only. The POST data is a
+    BulkStatusForm; tickets are moved with transitions.bulk_transition() in
+    transactions of TICKET_BULK_BATCH_SIZE rows, and progress is streamed
+    back as newline-delimited JSON, one line per batch, ending with a line
+    carrying finished: true.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
         """
-        Check permissions before proceeding with request handling.
+        Check staff permissions before proceeding with request handling.
 
-        Ensures only the ticket owner or staff members can reopen the ticket.
+        Args:
+            request: HTTP request object
+            *args: Variable length argument list
+            **kwargs: Arbitrary keyword arguments
+
+        Returns:
+            HTTP response: 403 if not staff, otherwise proceed with request
+        """
+        user = await aload_user(request)
+        if user.is_authenticated and not user.is_staff:
+            return JsonResponse({'error': 'Staff only.'}, status=403)
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def post(self, request, *args, **kwargs):
+        """
+        Handle POST request starting the bulk change.
 
         Args:
             request: HTTP request object
@@ -250,16 +708,61 @@ class TicketOpenView(LoginRequiredMixin, View):
             **kwargs: Arbitrary keyword arguments
 
         Returns:
-            HTTP response: Redirect to home if unauthorized, otherwise proceed with request
+            HTTP response: application/x-ndjson progress stream, or 400 with the
+                          form errors
+        """
+        form = BulkStatusForm(request.POST)
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors}, status=400)
+        batches = transitions.bulk_transition(form.get_queryset(), form.cleaned_data['to_status'],
+                                              settings.TICKET_BULK_BATCH_SIZE)
+        return StreamingHttpResponse(self.stream(request, batches), content_type='application/x-ndjson')
+
+    @staticmethod
+    async def stream(request, batches):
+        # Every batch runs in the worker thread shared by the request's sync code.
+        next_batch = sync_to_async(next)
+        progress = {'done': 0, 'changed': 0, 'total': 0}
+        while True:
+            # The stream outlives the middleware, so the changes are attributed here.
+            with events.acting(request):
+                batch = await next_batch(batches, None)
+            if batch is None:
+                break
+            progress = batch
+            yield json.dumps(progress) + '\n'
+        yield json.dumps(dict(progress, finished=True)) + '\n'
+
+
+class TicketExportView(LoginRequiredMixin, View):
+    """
+    View streaming a filtered export of tickets, optionally with their messages.
+
+    This view is restricted to staff members only. The query string is a
+    TicketExportForm; rows are read in keyset chunks of
+    TICKET_EXPORT_CHUNK_SIZE tickets and sent as they are serialized, so
+    memory use does not depend on the size of the export.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        """
+        Check staff permissions before proceeding with request handling.
+
+        Args:
+            request: HTTP request object
+            *args: Variable length argument list
+            **kwargs: Arbitrary keyword arguments
+
+        Returns:
+            HTTP response: Redirect to home if not staff, otherwise proceed with request
         """
-        if not (request.user == self.user_ticket.user or request.user.is_staff):
-            messages.error(request, 'You can not open others ticket!!!', 'danger')
+        if not request.user.is_staff:
             return redirect('home:home')
         return super().dispatch(request, *args, **kwargs)
 
     def get(self, request, *args, **kwargs):
         """
-        Handle GET request to display ticket reopening confirmation page.
+        Handle GET request for an export.
 
         Args:
             request: HTTP request object
@@ -267,16 +770,54 @@ class TicketOpenView(LoginRequiredMixin, View):
             **kwargs: Arbitrary keyword arguments
 
         Returns:
-            HTTP response: Rendered template with ticket information for confirmation
+            HTTP response: Streamed CSV or JSON Lines attachment, or 400 with the
+                          form errors
         """
-        ticket = self.user_ticket
-        return render(request, self.template_name, {'ticket': ticket})
+        form = TicketExportForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors}, status=400)
+        fmt = form.cleaned_data['format']
+        content = export.stream(form.get_queryset(), fmt, form.cleaned_data['messages'],
+                                settings.TICKET_EXPORT_CHUNK_SIZE)
+        if isinstance(request, ASGIRequest):
+            content = aiterate(content)
+        content_type, extension = export.FORMATS[fmt]
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="tickets-{timezone.localdate():%Y%m%d}.{extension}"'
+        return response
+
+
+class TicketStatusListMixin(ConditionalGetMixin):
+    """
+    Mixin for the staff lists of tickets with a single status.
 
-    def post(self, request, *args, **kwargs):
+    Rows are served newest first in keyset pages, so deep pages cost the same
+    as the first one and only the displayed columns are loaded. The page is
+    read with the async ORM, and unchanged lists are answered with 304.
+    """
+    status = None
+    context_object_name = None
+    paginate_by = 25
+
+    async def aget_validators(self):
         """
-        Handle POST request to reopen the ticket.
+        Read the list validators in one query on the updated_at index.
 
-        Changes the ticket status to "Open" and redirects to the ticket detail page.
+        Any status change moves the newest updated_at; the status counter
+        catches deletions and the open counter covers the navbar badge.
+        """
+        counters = TicketCounter.objects.filter(user=None)
+        row = await Ticket.objects.order_by('-updated_at').values('updated_at').annotate(
+            status_count=Subquery(counters.filter(status=self.status).values('count')[:1]),
+            navbar_open_count=open_count_subquery(self.request.user),
+        ).afirst()
+        if row is None:
+            return (), None
+        return (row['updated_at'], row['status_count'], row['navbar_open_count']), row['updated_at']
+
+    async def get(self, request, *args, **kwargs):
+        """
+        Handle GET request with the requested page of tickets in the context.
 
         Args:
             request: HTTP request object
@@ -284,23 +825,32 @@ class TicketOpenView(LoginRequiredMixin, View):
             **kwargs: Arbitrary keyword arguments
 
         Returns:
-            HTTP response: Redirect to ticket detail page after reopening the ticket
+            HTTP response: 304 when the client copy is current, otherwise the
+                          rendered list with the page rows under context_object_name
+                          and the page itself under page
         """
-        ticket = self.user_ticket
-        ticket.status = "Open"
-        ticket.save()
-        return redirect('ticket:ticket-detail', ticket_id=ticket.id)
-
-
-class TicketOpenListView(LoginRequiredMixin, TemplateView):
+        not_modified = await self.anot_modified()
+        if not_modified:
+            return not_modified
+        paginator = KeysetPaginator(Ticket.objects.for_status_list(self.status), self.paginate_by)
+        page = await paginator.aget_page(after=request.GET.get('after'), before=request.GET.get('before'))
+        context = self.get_context_data(**kwargs)
+        context[self.context_object_name] = page.object_list
+        context['page'] = page
+        return self.add_validators(self.render_to_response(context))
+
+
+class TicketOpenListView(AsyncLoginRequiredMixin, TicketStatusListMixin, TemplateView):
     """
     View for displaying a list of all open tickets.
 
-    This view is restricted to staff members only and shows all tickets with an "Open" status.
+    This view is restricted to staff members only and pages through tickets with an "Open" status.
     """
     template_name = 'ticket/open_tickets_list.html'
+    status = 'Open'
+    context_object_name = 'open_list'
 
-    def dispatch(self, request, *args, **kwargs):
+    async def dispatch(self, request, *args, **kwargs):
         """
         Check staff permissions before proceeding with request handling.
 
@@ -314,40 +864,153 @@ class TicketOpenListView(LoginRequiredMixin, TemplateView):
         Returns:
             HTTP response: Redirect to home if not staff, otherwise proceed with request
         """
-        if not request.user.is_staff:
+        user = await aload_user(request)
+        if not user.is_staff:
             return redirect('home:home')
-        return super().dispatch(request, *args, **kwargs)
+        return await super().dispatch(request, *args, **kwargs)
 
-    def get_context_data(self, **kwargs):
+
+class TicketInProgressListView(AsyncLoginRequiredMixin, TicketStatusListMixin, TemplateView):
+    """
+    View for displaying a list of all in-progress tickets.
+
+    This view is restricted to staff members only and pages through tickets with an "In Progress" status.
+    """
+    template_name = 'ticket/in_progress_list.html'
+    status = 'In Progress'
+    context_object_name = 'in_progress_list'
+
+    async def dispatch(self, request, *args, **kwargs):
         """
-        Add open tickets list to template context.
+        Check staff permissions before proceeding with request handling.
 
-        Retrieves all tickets with "Open" status to display in the template.
+        Ensures only staff members can view the list of in-progress tickets.
 
         Args:
+            request: HTTP request object
+            *args: Variable length argument list
             **kwargs: Arbitrary keyword arguments
 
         Returns:
-            dict: Context dictionary with open_list key containing open tickets
+            HTTP response: Redirect to home if not staff, otherwise proceed with request
         """
-        context = super().get_context_data(**kwargs)
-        context['open_list'] = Ticket.objects.filter(status="Open")
-        return context
+        user = await aload_user(request)
+        if not user.is_staff:
+            return redirect('home:home')
+        return await super().dispatch(request, *args, **kwargs)
 
 
-class TicketInProgressListView(LoginRequiredMixin, TemplateView):
+class TicketCloseListView(AsyncLoginRequiredMixin, TicketStatusListMixin, TemplateView):
     """
-    View for displaying a list of all in-progress tickets.
+    View for displaying a list of all closed tickets.
 
-    This view is restricted to staff members only and shows all tickets with an "In Progress" status.
+    This view is restricted to staff members only and pages through tickets with a "Closed" status.
     """
-    template_name = 'ticket/in_progress_list.html'
+    template_name = 'ticket/close_list_tickets.html'
+    status = 'Closed'
+    context_object_name = 'close_list'
 
-    def dispatch(self, request, *args, **kwargs):
+    async def dispatch(self, request, *args, **kwargs):
         """
         Check staff permissions before proceeding with request handling.
 
-        Ensures only staff members can view the list of in-progress tickets.
+        Ensures only staff members can view the list of closed tickets.
+
+        Args:
+            request: HTTP request object
+            *args: Variable length argument list
+            **kwargs: Arbitrary keyword arguments
+
+        Returns:
+            HTTP response: Redirect to home if not staff, otherwise proceed with request
+        """
+        user = await aload_user(request)
+        if not user.is_staff:
+            return redirect('home:home')
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class TicketWorkQueueView(AsyncLoginRequiredMixin, TemplateView):
+    """
+    View listing the tickets waiting for a staff reply, longest wait first.
+
+    This view is restricted to staff members only. Tickets past their
+    TICKET_SLA_RESPONSE_HOURS deadline are flagged, and claims held by other
+    agents are shown. Rows are paged with keyset cursors over the partial
+    work queue index; format=json returns the page as JSON.
+    """
+    template_name = 'ticket/work_queue.html'
+    paginate_by = 25
+
+    async def dispatch(self, request, *args, **kwargs):
+        """
+        Check staff permissions before proceeding with request handling.
+
+        Args:
+            request: HTTP request object
+            *args: Variable length argument list
+            **kwargs: Arbitrary keyword arguments
+
+        Returns:
+            HTTP response: Redirect to home if not staff, otherwise proceed with request
+        """
+        user = await aload_user(request)
+        if not user.is_staff:
+            return redirect('home:home')
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        """
+        Handle GET request for one page of the work queue.
+
+        Args:
+            request: HTTP request object
+            *args: Variable length argument list
+            **kwargs: Arbitrary keyword arguments
+
+        Returns:
+            HTTP response: Rendered queue page, or JSON when format=json
+        """
+        paginator = KeysetPaginator(work_queue.awaiting_reply(), self.paginate_by, field='waiting_since',
+                                    oldest_first=True)
+        page = await paginator.aget_page(after=request.GET.get('after'), before=request.GET.get('before'))
+        now = timezone.now()
+        for ticket in page:
+            ticket.sla_deadline = work_queue.sla_deadline(ticket)
+            ticket.sla_breached = ticket.sla_deadline < now
+            ticket.claimed = ticket.claimed_until is not None and ticket.claimed_until > now
+        if request.GET.get('format') == 'json':
+            return JsonResponse({
+                'tickets': [{
+                    'id': ticket.id,
+                    'subject': ticket.subject,
+                    'status': ticket.status,
+                    'owner': ticket.user.username,
+                    'waiting_since': ticket.waiting_since.isoformat(),
+                    'sla_deadline': ticket.sla_deadline.isoformat(),
+                    'sla_breached': ticket.sla_breached,
+                    'claimed_by': ticket.claimed_by.username if ticket.claimed else None,
+                } for ticket in page],
+                'next_cursor': page.next_cursor,
+                'previous_cursor': page.previous_cursor,
+            })
+        context = self.get_context_data(**kwargs)
+        context['queue'] = page.object_list
+        context['page'] = page
+        return self.render_to_response(context)
+
+
+class TicketClaimView(LoginRequiredMixin, View):
+    """
+    View handing the longest-waiting unclaimed ticket to the requesting staff member.
+
+    The claim is taken with a compare-and-set update, so agents claiming at
+    the same time never receive the same ticket.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        """
+        Check staff permissions before proceeding with request handling.
 
         Args:
             request: HTTP request object
@@ -361,37 +1024,68 @@ class TicketInProgressListView(LoginRequiredMixin, TemplateView):
             return redirect('home:home')
         return super().dispatch(request, *args, **kwargs)
 
-    def get_context_data(self, **kwargs):
+    def post(self, request, *args, **kwargs):
         """
-        Add in-progress tickets list to template context.
+        Handle POST request claiming the next ticket.
+
+        Args:
+            request: HTTP request object
+            *args: Variable length argument list
+            **kwargs: Arbitrary keyword arguments
+
+        Returns:
+            HTTP response: Redirect to the claimed ticket, or back to the queue when
+                          nothing is free; JSON when format=json is requested
+        """
+        ticket = work_queue.claim_next(request.user)
+        if request.GET.get('format') == 'json':
+            return JsonResponse({
+                'ticket': ticket.id if ticket else None,
+                'claimed_until': ticket.claimed_until.isoformat() if ticket else None,
+            })
+        if ticket is None:
+            messages.info(request, 'No unclaimed ticket is waiting for a reply.', 'info')
+            return redirect('ticket:work-queue')
+        return redirect('ticket:ticket-detail', ticket_id=ticket.id)
 
-        Retrieves all tickets with "In Progress" status to display in the template.
+
+class TicketReleaseView(TicketAccessMixin, LoginRequiredMixin, View):
+    """
+    View giving up the requesting staff member's claim on a ticket.
+    """
+
+    def get_ticket_queryset(self):
+        return Ticket.objects.only('id', 'user_id')
+
+    def post(self, request, *args, **kwargs):
+        """
+        Handle POST request releasing the claim.
 
         Args:
+            request: HTTP request object
+            *args: Variable length argument list
             **kwargs: Arbitrary keyword arguments
 
         Returns:
-            dict: Context dictionary with in_progress_list key containing in-progress tickets
+            HTTP response: Redirect to the work queue
         """
-        context = super().get_context_data(**kwargs)
-        context['in_progress_list'] = Ticket.objects.filter(status="In Progress")
-        return context
+        work_queue.release(self.user_ticket.id, request.user)
+        return redirect('ticket:work-queue')
 
 
-class TicketCloseListView(LoginRequiredMixin, TemplateView):
+class TicketSearchView(LoginRequiredMixin, TemplateView):
     """
-    View for displaying a list of all closed tickets.
+    View for ranked full-text search over tickets and their messages.
 
-    This view is restricted to staff members only and shows all tickets with a "Closed" status.
+    This view is restricted to staff members only and shows the best matching
+    tickets with a highlighted snippet of the matching text.
     """
-    template_name = 'ticket/close_list_tickets.html'
+    template_name = 'ticket/search.html'
 
     def dispatch(self, request, *args, **kwargs):
         """
         Check staff permissions before proceeding with request handling.
 
-        Ensures only staff members can view the list of closed tickets.
-
         Args:
             request: HTTP request object
             *args: Variable length argument list
@@ -406,16 +1100,48 @@ class TicketCloseListView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         """
-        Add closed tickets list to template context.
-
-        Retrieves all tickets with "Closed" status to display in the template.
+        Add the search query and its results to template context.
 
         Args:
             **kwargs: Arbitrary keyword arguments
 
         Returns:
-            dict: Context dictionary with close_list key containing closed tickets
+            dict: Context dictionary with query and results keys
         """
         context = super().get_context_data(**kwargs)
-        context['close_list'] = Ticket.objects.filter(status="Closed")
-        return context
\ No newline at end of file
+        query = self.request.GET.get('q', '').strip()
+        context['query'] = query
+        context['results'] = search_tickets(query) if query else []
+        return context
+
+
+class MetricsView(View):
+    """
+    Prometheus scrape endpoint with the request, database, cache, upload and ticket metrics.
+
+    Counters are summed over every worker process through the shared cache
+    and the ticket gauges come from short-lived cached values, so a scrape
+    does not count tickets. Scrapes must send TICKET_METRICS_TOKEN as a
+    bearer token or come from a logged in staff member; without a token
+    configured, only staff members can read the metrics.
+    """
+
+    def get(self, request, *args, **kwargs):
+        """
+        Handle GET request for the metrics.
+
+        Args:
+            request: HTTP request object
+            *args: Variable length argument list
+            **kwargs: Arbitrary keyword arguments
+
+        Returns:
+            HTTP response: The metrics in the text exposition format, or 403
+                          without the token or a staff login
+        """
+        token = settings.TICKET_METRICS_TOKEN
+        authorized = bool(token) and compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+        if not authorized and not request.user.is_staff:
+            return HttpResponse('Forbidden', status=403, content_type='text/plain')
+        return HttpResponse(metrics.exposition(metrics.collect()),
+                            content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Ticket
+
+
+def awaiting_reply():
+    """
+    Tickets waiting for a staff reply, longest wait first.
+
+    The filter matches the condition of the partial ticket_work_queue_idx
+    index, so the queue is read from the index instead of scanning tickets
+    or messages.
+
+    Returns:
+        QuerySet: Unclosed tickets with a waiting_since, owner joined in
+    """
+    return Ticket.objects.filter(waiting_since__isnull=False).exclude(status='Closed').select_related(
+        'user', 'claimed_by').only('id', 'subject', 'status', 'waiting_since', 'claimed_until',
+                                   'user__username', 'claimed_by__username')
+
+
+def sla_deadline(ticket):
+    return ticket.waiting_since + timedelta(hours=settings.TICKET_SLA_RESPONSE_HOURS)
+
+
+def claimable(now=None):
+    """
+    Filter matching tickets nobody holds an unexpired claim on.
+    """
+    return Q(claimed_until__isnull=True) | Q(claimed_until__lt=now or timezone.now())
+
+
+def claim_next(user, candidates=20):
+    """
+    Claim the longest-waiting ticket that is not claimed by someone else.
+
+    Each candidate is taken with a compare-and-set UPDATE that only succeeds
+    while the ticket is still unclaimed, so concurrent agents never receive
+    the same ticket. A claim lasts TICKET_CLAIM_MINUTES and is released when
+    staff replies.
+
+    Args:
+        user: Staff member claiming work
+        candidates: Number of queue heads tried before giving up
+
+    Returns:
+        Ticket: The claimed ticket, or None when the queue has nothing free
+    """
+    now = timezone.now()
+    until = now + timedelta(minutes=settings.TICKET_CLAIM_MINUTES)
+    ids = awaiting_reply().filter(claimable(now)).order_by('waiting_since', 'id').values_list('id', flat=True)
+    for ticket_id in ids[:candidates]:
+        claimed = Ticket.objects.filter(claimable(now), pk=ticket_id, waiting_since__isnull=False).exclude(
+            status='Closed').update(claimed_by=user, claimed_until=until)
+        if claimed:
+            return Ticket.objects.get(pk=ticket_id)
+    return None
+
+
+def release(ticket_id, user):
+    """
+    Give up a claim held by user.
+
+    Returns:
+        bool: Whether a claim was released
+    """
+    return bool(Ticket.objects.filter(pk=ticket_id, claimed_by=user).update(claimed_by=None, claimed_until=None))